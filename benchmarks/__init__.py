@@ -0,0 +1 @@
+"""Benchmarks for ev_smart_charging integration."""
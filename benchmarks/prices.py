@@ -0,0 +1,66 @@
+"""Synthetic prices for the benchmarks"""
+
+from datetime import date, datetime, time, timedelta
+import math
+import random
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+PROFILE_FLAT = "flat"
+PROFILE_SPIKY = "spiky"
+PROFILES = [PROFILE_FLAT, PROFILE_SPIKY]
+
+
+def local_midnight(day: date) -> datetime:
+    """Get local midnight of day, in UTC"""
+    return dt_util.as_utc(
+        datetime.combine(day, time(), tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    )
+
+
+def next_dst_change(after: date, forward: bool) -> date:
+    """Find the first day after a date where the clock is changed
+
+    With forward, the day with 23 hours, otherwise the day with 25 hours."""
+
+    day = after + timedelta(days=1)
+    for _ in range(366):
+        length = local_midnight(day + timedelta(days=1)) - local_midnight(day)
+        if length == timedelta(hours=23 if forward else 25):
+            return day
+        day = day + timedelta(days=1)
+    raise ValueError("The time zone has no daylight saving time")
+
+
+def get_prices(
+    first_day: date,
+    days: int = 2,
+    slot_minutes: int = 60,
+    profile: str = PROFILE_SPIKY,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """Create prices, in UTC, for a number of local days
+
+    Days with a clock change get 23 or 25 hours of prices.
+    The flat profile has the same price in all slots. The spiky profile
+    follows a daily curve with random noise and occasional price spikes."""
+
+    rnd = random.Random(seed)
+    slot = timedelta(minutes=slot_minutes)
+    start = local_midnight(first_day)
+    end = local_midnight(first_day + timedelta(days=days))
+
+    prices = []
+    while start < end:
+        if profile == PROFILE_FLAT:
+            value = 100.0
+        else:
+            hour = dt_util.as_local(start).hour + dt_util.as_local(start).minute / 60
+            value = 100.0 + 60.0 * math.sin((hour - 6.0) * math.pi / 12.0)
+            value = value + rnd.uniform(-20.0, 20.0)
+            if rnd.random() < 0.05:
+                value = value * rnd.uniform(3.0, 6.0)
+        prices.append({"start": start, "end": start + slot, "value": round(value, 2)})
+        start = start + slot
+    return prices
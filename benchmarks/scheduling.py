@@ -0,0 +1,273 @@
+"""Benchmark of the scheduling helpers
+
+Run from the repository root:
+
+    python -m benchmarks.scheduling            Compare with the stored baselines
+    python -m benchmarks.scheduling --save     Store new baselines
+    python -m benchmarks.scheduling --check    Exit with an error on regressions
+
+Latencies in microseconds depend on the machine, so the baselines store them
+relative to a reference kernel that is timed in the same run. The allocations
+are stored as they are. Store new baselines in the same commit as changes to
+the scheduling helpers.
+"""
+
+import argparse
+from datetime import timedelta
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from homeassistant.util import dt as dt_util
+
+from benchmarks.prices import (
+    PROFILE_SPIKY,
+    PROFILES,
+    get_prices,
+    next_dst_change,
+)
+from custom_components.ev_smart_charging.helpers.coordinator import (
+    PriceStatistics,
+    Raw,
+    Scheduler,
+    get_charging_original,
+    get_charging_update,
+    get_lowest_hours_continuous,
+    get_lowest_hours_non_continuous,
+)
+
+BASELINE_FILE = Path(__file__).parent / "baselines" / "scheduling.json"
+TIME_ZONE = "Europe/Stockholm"
+HORIZONS = [1, 2, 7]
+SLOT_MINUTES = [60, 15]
+CHARGING_HOURS = 10
+REFERENCE = "reference"
+REFERENCE_SIZE = 1000
+
+
+def get_scenarios() -> list[dict[str, Any]]:
+    """Get the price scenarios
+
+    The prices start tomorrow, so that all of them are in the future."""
+
+    tomorrow = dt_util.now().date() + timedelta(days=1)
+    scenarios = []
+    for days in HORIZONS:
+        for slot_minutes in SLOT_MINUTES:
+            for profile in PROFILES:
+                scenarios.append(
+                    {
+                        "name": f"{days}d_{slot_minutes}min_{profile}",
+                        "prices": get_prices(tomorrow, days, slot_minutes, profile),
+                        "slot_minutes": slot_minutes,
+                    }
+                )
+    for forward, name in ((True, "dst_spring"), (False, "dst_autumn")):
+        day = next_dst_change(tomorrow, forward)
+        scenarios.append(
+            {
+                "name": f"2d_60min_{name}",
+                "prices": get_prices(day, 2, 60, PROFILE_SPIKY),
+                "slot_minutes": 60,
+            }
+        )
+    return scenarios
+
+
+def get_cases(scenario: dict[str, Any]) -> dict[str, Callable[[], Any]]:
+    """Get the functions to measure for one scenario"""
+
+    raw = Raw(scenario["prices"])
+    start_hour = scenario["prices"][0]["start"]
+    ready_hour = scenario["prices"][-1]["end"]
+    slots = CHARGING_HOURS * 60 // scenario["slot_minutes"]
+    max_price = PriceStatistics(raw).percentile(75)
+    lowest_hours = get_lowest_hours_non_continuous(start_hour, ready_hour, raw, slots)
+    charging_original = get_charging_original(lowest_hours, raw)
+
+    # One charging percent per slot gives the same number of slots as above
+    params = {
+        "ev_soc": 20.0,
+        "ev_target_soc": 20.0 + slots,
+        "min_soc": 20.0 + slots / 2,
+        "charging_pct_per_hour": 1.0,
+        "start_hour": start_hour,
+        "ready_hour": ready_hour,
+        "switch_active": True,
+        "switch_apply_limit": True,
+        "switch_continuous": False,
+        "max_price": max_price,
+        "value_in_graph": 1.0,
+    }
+    scheduler = Scheduler()
+    scheduler.create_base_schedule(params, raw)
+
+    return {
+        "get_lowest_hours_continuous": lambda: get_lowest_hours_continuous(
+            start_hour, ready_hour, raw, slots
+        ),
+        "get_lowest_hours_non_continuous": lambda: get_lowest_hours_non_continuous(
+            start_hour, ready_hour, raw, slots
+        ),
+        "get_charging_original": lambda: get_charging_original(lowest_hours, raw),
+        "get_charging_update": lambda: get_charging_update(
+            charging_original, True, True, max_price, 1.0
+        ),
+        "Scheduler.get_schedule": lambda: scheduler.get_schedule(params),
+    }
+
+
+def reference_kernel() -> float:
+    """Sort and sum prices, like the scheduling helpers do"""
+
+    values = [float((index * 7919) % 1009) for index in range(REFERENCE_SIZE)]
+    lowest = sorted(range(len(values)), key=values.__getitem__)[0 : len(values) // 4]
+    return sum(values[index] for index in lowest)
+
+
+def measure(func: Callable[[], Any], iterations: int) -> dict[str, float]:
+    """Measure the latency and the memory allocation of one call"""
+
+    func()  # Warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        func()
+        timings.append(time.perf_counter_ns() - start)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "median_us": round(statistics.median(timings) / 1000, 2),
+        "min_us": round(min(timings) / 1000, 2),
+        "peak_kib": round((peak - before) / 1024, 2),
+    }
+
+
+def run(iterations: int) -> dict[str, dict[str, float]]:
+    """Run all cases for all scenarios"""
+
+    results = {REFERENCE: measure(reference_kernel, iterations)}
+    for scenario in get_scenarios():
+        for case, func in get_cases(scenario).items():
+            results[f"{case}/{scenario['name']}"] = measure(func, iterations)
+    reference_us = results[REFERENCE]["min_us"]
+    for result in results.values():
+        result["relative"] = round(result["min_us"] / reference_us, 4)
+    return results
+
+
+def get_baselines(results: dict[str, dict[str, float]]) -> dict[str, dict[str, float]]:
+    """Get the machine independent part of the results"""
+
+    return {
+        name: {"relative": result["relative"], "peak_kib": result["peak_kib"]}
+        for name, result in results.items()
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baselines: dict[str, dict[str, float]],
+    tolerance: float,
+    memory_tolerance: float,
+) -> list[str]:
+    """Get the benchmarks that are slower or allocate more than the baseline
+
+    The latency of the baseline is scaled with the reference kernel of the
+    results, so that baselines from another machine can be used."""
+
+    regressions = []
+    reference_us = results[REFERENCE]["min_us"]
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None or name == REFERENCE:
+            continue
+        # The minimum is less sensitive to noise from other processes than the median
+        expected = {
+            "min_us": round(baseline["relative"] * reference_us, 2),
+            "peak_kib": baseline["peak_kib"],
+        }
+        for key, allowed in (("min_us", tolerance), ("peak_kib", memory_tolerance)):
+            if result[key] > expected[key] * (1.0 + allowed) and (
+                result[key] - expected[key] > 1.0
+            ):
+                regressions.append(
+                    f"{name} {key}: {result[key]} (baseline {expected[key]})"
+                )
+    return regressions
+
+
+def main(argv: list[str] = None) -> int:
+    """Run the benchmark from the command line"""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--save", action="store_true", help="store new baselines")
+    parser.add_argument("--check", action="store_true", help="fail on regressions")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.0,
+        help="allowed relative increase of the latency compared with the baseline",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.1,
+        help="allowed relative increase of the allocation compared with the baseline",
+    )
+    parser.add_argument("--json", type=Path, help="write the results to a file")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.CRITICAL)
+    dt_util.set_default_time_zone(dt_util.get_time_zone(TIME_ZONE))
+
+    results = run(args.iterations)
+    baselines = {}
+    if BASELINE_FILE.exists() and not args.save:
+        baselines = json.loads(BASELINE_FILE.read_text(encoding="utf-8"))
+
+    print(f"{'benchmark':<60} {'median us':>10} {'min us':>10} {'peak KiB':>10}")
+    for name, result in results.items():
+        line = (
+            f"{name:<60} {result['median_us']:>10} {result['min_us']:>10}"
+            f" {result['peak_kib']:>10}"
+        )
+        if name in baselines:
+            baseline_us = round(
+                baselines[name]["relative"] * results[REFERENCE]["min_us"], 2
+            )
+            line = line + f"  (baseline {baseline_us} us)"
+        print(line)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    if args.save:
+        BASELINE_FILE.parent.mkdir(exist_ok=True)
+        BASELINE_FILE.write_text(
+            json.dumps(get_baselines(results), indent=2) + "\n", encoding="utf-8"
+        )
+        print(f"Baselines stored in {BASELINE_FILE}")
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance, args.memory_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if args.check and regressions:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""End-to-end throughput benchmark with many config entries
+
+All config entries share the price, SOC and charger mock entities from
+tests/helpers/helpers.py, so every event reaches every entry.
+Run from the repository root:
+
+    python -m benchmarks.throughput
+    python -m benchmarks.throughput --entries 1 10 --bursts 5 --json result.json
+
+The results are written as JSON.
+"""
+
+import argparse
+import asyncio
+from datetime import timedelta
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any
+
+from homeassistant import loader
+from homeassistant.const import EVENT_CALL_SERVICE, EVENT_STATE_CHANGED, STATE_OFF
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from benchmarks.prices import PROFILE_SPIKY, get_prices
+from custom_components.ev_smart_charging.const import DOMAIN
+from custom_components.ev_smart_charging.coordinator import EVSmartChargingCoordinator
+from tests.const import MOCK_CONFIG_ALL
+from tests.helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+
+TIME_ZONE = "Europe/Stockholm"
+ENTRIES = [1, 10, 100]
+PROBE_INTERVAL = 0.001
+
+
+def get_price_states(seed: int) -> tuple[list, list]:
+    """Get the prices for today and tomorrow, in local time"""
+
+    prices = get_prices(dt_util.now().date(), 2, 60, PROFILE_SPIKY, seed)
+    for item in prices:
+        item["start"] = dt_util.as_local(item["start"])
+        item["end"] = dt_util.as_local(item["end"])
+    tomorrow = dt_util.now().date() + timedelta(days=1)
+    raw_today = [item for item in prices if item["start"].date() < tomorrow]
+    raw_tomorrow = [item for item in prices if item["start"].date() >= tomorrow]
+    return raw_today, raw_tomorrow
+
+
+def get_summary(values: list[float]) -> dict[str, float]:
+    """Get the mean, 95th percentile and max of values"""
+
+    if not values:
+        return {"mean": None, "p95": None, "max": None}
+    values = sorted(values)
+    return {
+        "mean": round(statistics.fmean(values), 3),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        "max": round(values[-1], 3),
+    }
+
+
+async def probe_loop_latency(latencies: list[float], stop: asyncio.Event):
+    """Measure how late the event loop wakes up a sleeping task, in ms"""
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        latencies.append((time.perf_counter() - start - PROBE_INTERVAL) * 1000)
+
+
+async def run_entries(number_of_entries: int, bursts: int) -> dict[str, Any]:
+    """Set up a number of config entries and fire bursts of events"""
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass: HomeAssistant = await async_test_home_assistant(
+            asyncio.get_running_loop()
+        )
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+        hass.config.config_dir = config_dir
+        hass.config.set_time_zone(TIME_ZONE)
+
+        entity_registry = async_entity_registry_get(hass)
+        MockPriceEntity.create(hass, entity_registry, 123)
+        MockSOCEntity.create(hass, entity_registry, "40")
+        MockTargetSOCEntity.create(hass, entity_registry, "80")
+        MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+        raw_today, raw_tomorrow = get_price_states(0)
+        MockPriceEntity.set_state(hass, raw_today, raw_tomorrow)
+
+        start = time.perf_counter()
+        for index in range(number_of_entries):
+            config_entry = MockConfigEntry(
+                domain=DOMAIN,
+                data=MOCK_CONFIG_ALL,
+                entry_id=f"entry_{index}",
+                title=f"EV {index}",
+            )
+            config_entry.add_to_hass(hass)
+            await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+        setup_time = time.perf_counter() - start
+
+        coordinators: list[EVSmartChargingCoordinator] = list(
+            hass.data[DOMAIN].values()
+        )
+        for coordinator in coordinators:
+            await coordinator.switch_active_update(True)
+            await coordinator.switch_ev_connected_update(True)
+        await hass.async_block_till_done()
+        for coordinator in coordinators:
+            coordinator.update_sensors_times = []
+
+        counters = {"state_writes": 0, "service_calls": 0}
+        input_entities = {
+            MOCK_CONFIG_ALL["price_sensor"],
+            MOCK_CONFIG_ALL["ev_soc_sensor"],
+            MOCK_CONFIG_ALL["ev_target_soc_sensor"],
+        }
+
+        @callback
+        def count_state_write(event: Event):
+            if event.data["entity_id"] not in input_entities:
+                counters["state_writes"] = counters["state_writes"] + 1
+
+        @callback
+        def count_service_call(event: Event):  # pylint: disable=unused-argument
+            counters["service_calls"] = counters["service_calls"] + 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, count_state_write)
+        hass.bus.async_listen(EVENT_CALL_SERVICE, count_service_call)
+
+        latencies = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_loop_latency(latencies, stop))
+
+        burst_times = []
+        for burst in range(bursts):
+            raw_today, raw_tomorrow = get_price_states(burst + 1)
+            start = time.perf_counter()
+            MockPriceEntity.set_state(hass, raw_today, raw_tomorrow)
+            for soc in range(3):
+                MockSOCEntity.set_state(hass, f"{40 + (burst * 3 + soc) % 40}")
+            await hass.async_block_till_done()
+            burst_times.append((time.perf_counter() - start) * 1000)
+            # Let the probe see the loop when it is idle as well
+            await asyncio.sleep(0.01)
+
+        stop.set()
+        await probe
+
+        update_times = []
+        for coordinator in coordinators:
+            update_times.extend(coordinator.update_sensors_times)
+
+        await hass.async_stop(force=True)
+
+    return {
+        "entries": number_of_entries,
+        "bursts": bursts,
+        "setup_s": round(setup_time, 3),
+        "burst_ms": get_summary(burst_times),
+        "loop_latency_ms": get_summary(latencies),
+        "update_sensors_ms": get_summary(update_times),
+        "update_sensors_calls_per_entry": len(update_times) / number_of_entries,
+        "state_writes_per_entry": counters["state_writes"] / number_of_entries,
+        "service_calls_per_entry": counters["service_calls"] / number_of_entries,
+    }
+
+
+def timed_update_sensors(update_sensors):
+    """Wrap update_sensors to record the time of each call, in ms"""
+
+    async def wrapper(self: EVSmartChargingCoordinator, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await update_sensors(self, *args, **kwargs)
+        finally:
+            if hasattr(self, "update_sensors_times"):
+                self.update_sensors_times.append((time.perf_counter() - start) * 1000)
+
+    return wrapper
+
+
+async def run(entries: list[int], bursts: int) -> list[dict[str, Any]]:
+    """Run the benchmark for each number of config entries"""
+
+    update_sensors = EVSmartChargingCoordinator.update_sensors
+    EVSmartChargingCoordinator.update_sensors = timed_update_sensors(update_sensors)
+    try:
+        return [await run_entries(number, bursts) for number in entries]
+    finally:
+        EVSmartChargingCoordinator.update_sensors = update_sensors
+
+
+def main(argv: list[str] = None) -> int:
+    """Run the benchmark from the command line"""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=ENTRIES)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--json", type=Path, help="write the results to a file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.CRITICAL)
+    results = asyncio.run(run(args.entries, args.bursts))
+
+    output = json.dumps(results, indent=2)
+    if args.json:
+        args.json.write_text(output + "\n", encoding="utf-8")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,13 @@
 """EV Smart Charging integration"""
 
 import asyncio
+import importlib
 import logging
+import time
+from types import ModuleType
 
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import __version__ as HA_VERSION
 from homeassistant.core import Config, HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers.device_registry import async_get as async_device_registry_get
@@ -13,15 +17,25 @@ from homeassistant.helpers.entity_registry import (
     EntityRegistry,
     async_entries_for_config_entry,
 )
+from homeassistant.helpers.storage import Store
 
 from .coordinator import EVSmartChargingCoordinator
+from .hub import EVSmartChargingHub
 from .const import (
     CONF_EV_CONTROLLED,
     CONF_OPPORTUNISTIC_LEVEL,
     CONF_START_HOUR,
+    DATA_FLEET,
+    DATA_HUB,
+    DATA_IMPORT_DURATION,
     DOMAIN,
+    DOMAIN_DATA,
+    ISSUE_URL,
+    NAME,
     STARTUP_MESSAGE,
+    STORAGE_VERSION,
     PLATFORMS,
+    VERSION,
 )
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
@@ -31,37 +45,66 @@ async def async_setup(
     hass: HomeAssistant, config: Config
 ):  # pylint: disable=unused-argument
     """Set up this integration using YAML is not supported."""
+    time_start = time.monotonic()
+    services, websocket_api = await hass.async_add_executor_job(
+        import_modules, ["services", "websocket_api"]
+    )
+    hass.data.setdefault(DOMAIN_DATA, {})[DATA_IMPORT_DURATION] = round(
+        time.monotonic() - time_start, 4
+    )
+    services.async_setup_services(hass)
+    websocket_api.async_setup(hass)
     return True
 
 
+def import_modules(names: list[str]) -> list[ModuleType]:
+    """Import modules of the integration that are only needed by async_setup"""
+    return [importlib.import_module(f".{name}", __package__) for name in names]
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up this integration using UI."""
 
     if hass.data.get(DOMAIN) is None:
         hass.data.setdefault(DOMAIN, {})
-        _LOGGER.debug(STARTUP_MESSAGE)
+        _LOGGER.debug(STARTUP_MESSAGE, NAME, VERSION, ISSUE_URL, HA_VERSION)
 
     coordinator = EVSmartChargingCoordinator(hass, entry)
     validation_error = coordinator.validate_input_sensors()
     if validation_error is not None:
         _LOGGER.debug("%s", validation_error)
-        for unsub in coordinator.listeners:
-            unsub()
+        coordinator.unsubscribe_listeners()
         raise ConfigEntryNotReady(validation_error)
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    domain_data = hass.data.setdefault(DOMAIN_DATA, {})
+    domain_data.setdefault(DATA_HUB, EVSmartChargingHub(hass)).add_coordinator(
+        coordinator
+    )
+    if coordinator.site_power_limit > 0.0:
+        # pylint: disable=import-outside-toplevel
+        # The fleet is only needed with a site power limit
+        from .helpers.fleet import FleetScheduler
+
+        coordinator.join_fleet(domain_data.setdefault(DATA_FLEET, FleetScheduler()))
+    await coordinator.load_state()
 
     for platform in PLATFORMS:
         if entry.options.get(platform, True):
             coordinator.platforms.append(platform)
-            hass.async_add_job(
-                hass.config_entries.async_forward_entry_setup(entry, platform)
-            )
+    await hass.config_entries.async_forward_entry_setups(entry, coordinator.platforms)
+    await coordinator.restore_state()
+    coordinator.record_startup_time("setup")
+
+    entry.async_on_unload(entry.add_update_listener(async_update_entry))
 
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    update_device_name(hass, entry)
+
+    return True
 
-    # If the name of the integration (config_entry.title) has changed,
-    # update the device name.
+
+def update_device_name(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Update the device name if the name of the integration has changed"""
     entity_registry: EntityRegistry = async_entity_registry_get(hass)
     all_entities = async_entries_for_config_entry(entity_registry, entry.entry_id)
     if all_entities:
@@ -80,8 +123,6 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                         device.id, name_by_user=entry.title
                     )
 
-    return True
-
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
@@ -97,8 +138,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
     )
     if unloaded:
-        for unsub in coordinator.listeners:
-            unsub()
+        coordinator.unsubscribe_listeners()
+        coordinator.leave_fleet()
+        hass.data[DOMAIN_DATA][DATA_HUB].remove_coordinator(coordinator)
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unloaded
@@ -110,6 +152,28 @@ async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     await async_setup_entry(hass, entry)
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Handle removal of a config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+
+
+async def async_update_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Config entry has been updated.
+
+    Options that can be applied to the running coordinator are applied in place,
+    otherwise the config entry is reloaded."""
+    coordinator: EVSmartChargingCoordinator = hass.data[DOMAIN][entry.entry_id]
+    platforms = [
+        platform for platform in PLATFORMS if entry.options.get(platform, True)
+    ]
+    if platforms == coordinator.platforms and coordinator.can_reconfigure():
+        _LOGGER.debug("Reconfigure without reload")
+        await coordinator.reconfigure()
+        update_device_name(hass, entry)
+    else:
+        await async_reload_entry(hass, entry)
+
+
 async def async_migrate_entry(hass, config_entry: ConfigEntry):
     """Migrate old entry."""
     _LOGGER.debug("Migrating from version %s", config_entry.version)
@@ -1,5 +1,6 @@
 """Button platform for EV Smart Charging."""
 import logging
+from typing import TYPE_CHECKING
 
 from homeassistant.components.button import ButtonEntity
 from homeassistant.core import HomeAssistant
@@ -12,9 +13,11 @@ from .const import (
     ICON_START,
     ICON_STOP,
 )
-from .coordinator import EVSmartChargingCoordinator
 from .entity import EVSmartChargingEntity
 
+if TYPE_CHECKING:
+    from .coordinator import EVSmartChargingCoordinator
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -31,7 +34,7 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
 class EVSmartChargingButton(EVSmartChargingEntity, ButtonEntity):
     """EV Smart Charging button class."""
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingButton.__init__()")
         super().__init__(entry)
         self.coordinator = coordinator
@@ -0,0 +1,83 @@
+"""Calendar platform for EV Smart Charging."""
+from bisect import bisect_right
+from datetime import datetime
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt
+
+from .const import CALENDAR, DOMAIN, ENTITY_NAME_CHARGING_CALENDAR
+from .entity import EVSmartChargingEntity
+
+if TYPE_CHECKING:
+    from .coordinator import EVSmartChargingCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
+    """Setup calendar platform."""
+    _LOGGER.debug("EVSmartCharging.calendar.py")
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    calendar = EVSmartChargingCalendar(entry, coordinator)
+    async_add_devices([calendar])
+    coordinator.calendar = calendar
+
+
+class EVSmartChargingCalendar(EVSmartChargingEntity, CalendarEntity):
+    """EV Smart Charging calendar class."""
+
+    _attr_name = ENTITY_NAME_CHARGING_CALENDAR
+
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
+        _LOGGER.debug("EVSmartChargingCalendar.__init__()")
+        super().__init__(entry)
+        self.coordinator = coordinator
+        self._attr_unique_id = ".".join([entry.entry_id, CALENDAR])
+        self._events: list[CalendarEvent] = []
+        self._event_ends: list[datetime] = []
+        self.charging_blocks = coordinator.scheduler.get_charging_blocks()
+
+    @property
+    def charging_blocks(self) -> list[dict[str, datetime]]:
+        """Getter for charging_blocks."""
+        return [{"start": event.start, "end": event.end} for event in self._events]
+
+    @charging_blocks.setter
+    def charging_blocks(self, new_value: list[dict[str, datetime]]):
+        if new_value != self.charging_blocks:
+            # The blocks are sorted and don't overlap, so the end times
+            # can be used to find the events in a range.
+            self._events = [
+                CalendarEvent(
+                    start=block["start"],
+                    end=block["end"],
+                    summary=self.config_entry.title,
+                )
+                for block in new_value
+            ]
+            self._event_ends = [event.end for event in self._events]
+        # The state depends on the time, so it is updated even if
+        # the blocks are unchanged.
+        self.update_ha_state()
+
+    @property
+    def event(self) -> Optional[CalendarEvent]:  # Optional to support Python 3.9
+        """Return the current or next charging event."""
+        index = bisect_right(self._event_ends, dt.now())
+        if index < len(self._events):
+            return self._events[index]
+        return None
+
+    async def async_get_events(
+        self, hass: HomeAssistant, start_date: datetime, end_date: datetime
+    ) -> list[CalendarEvent]:
+        """Return the charging events within a time range."""
+        events = []
+        index = bisect_right(self._event_ends, start_date)
+        while index < len(self._events) and self._events[index].start < end_date:
+            events.append(self._events[index])
+            index = index + 1
+        return events
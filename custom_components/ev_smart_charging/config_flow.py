@@ -9,12 +9,23 @@ from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
 
 from .const import (
+    CONF_COMPACT_ATTRIBUTES,
     CONF_DEVICE_NAME,
     CONF_EV_CONTROLLED,
     CONF_EV_SOC_SENSOR,
     CONF_EV_TARGET_SOC_SENSOR,
+    CONF_OPPORTUNISTIC_PERCENTILE,
     CONF_PRICE_SENSOR,
     CONF_CHARGER_ENTITY,
+    CONF_CHARGER_POWER,
+    CONF_SITE_POWER_LIMIT,
+    CONF_MAX_CHARGING_BLOCKS,
+    CONF_CHARGING_BLOCK_PENALTY,
+    CONF_CHARGING_CURVE,
+    CONF_FRACTIONAL_HOURS,
+    CONF_LEARNED_CHARGING_SPEED,
+    CONF_SOC_ESTIMATION,
+    DEFAULT_CHARGER_POWER,
     DOMAIN,
 )
 from .helpers.config_flow import DeviceNameCreator, FindEntity, FlowValidator
@@ -154,6 +165,56 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 CONF_EV_CONTROLLED,
                 default=get_parameter(self.config_entry, CONF_EV_CONTROLLED),
             ): cv.boolean,
+            vol.Optional(
+                CONF_COMPACT_ATTRIBUTES,
+                default=get_parameter(
+                    self.config_entry, CONF_COMPACT_ATTRIBUTES, False
+                ),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_OPPORTUNISTIC_PERCENTILE,
+                default=get_parameter(
+                    self.config_entry, CONF_OPPORTUNISTIC_PERCENTILE, 0
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+            vol.Optional(
+                CONF_CHARGER_POWER,
+                default=get_parameter(
+                    self.config_entry, CONF_CHARGER_POWER, DEFAULT_CHARGER_POWER
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.0)),
+            vol.Optional(
+                CONF_SITE_POWER_LIMIT,
+                default=get_parameter(self.config_entry, CONF_SITE_POWER_LIMIT, 0.0),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.0)),
+            vol.Optional(
+                CONF_MAX_CHARGING_BLOCKS,
+                default=get_parameter(self.config_entry, CONF_MAX_CHARGING_BLOCKS, 0),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=24)),
+            vol.Optional(
+                CONF_CHARGING_BLOCK_PENALTY,
+                default=get_parameter(
+                    self.config_entry, CONF_CHARGING_BLOCK_PENALTY, 0.0
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0.0)),
+            vol.Optional(
+                CONF_FRACTIONAL_HOURS,
+                default=get_parameter(self.config_entry, CONF_FRACTIONAL_HOURS, False),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_CHARGING_CURVE,
+                default=get_parameter(self.config_entry, CONF_CHARGING_CURVE, ""),
+            ): cv.string,
+            vol.Optional(
+                CONF_LEARNED_CHARGING_SPEED,
+                default=get_parameter(
+                    self.config_entry, CONF_LEARNED_CHARGING_SPEED, False
+                ),
+            ): cv.boolean,
+            vol.Optional(
+                CONF_SOC_ESTIMATION,
+                default=get_parameter(self.config_entry, CONF_SOC_ESTIMATION, False),
+            ): cv.boolean,
         }
 
         return self.async_show_form(
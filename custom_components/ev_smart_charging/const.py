@@ -1,7 +1,6 @@
 """Constants file"""
 
 from homeassistant.const import Platform
-from homeassistant.const import __version__ as HA_VERSION
 
 NAME = "EV Smart Charging"
 DOMAIN = "ev_smart_charging"
@@ -18,6 +17,7 @@ ICON_MIN_SOC = "mdi:battery-charging-30"
 ICON_START = "mdi:play-circle-outline"
 ICON_STOP = "mdi:stop-circle-outline"
 ICON_TIME = "mdi:clock-time-four-outline"
+ICON_TIMER = "mdi:timer-outline"
 
 # Platforms
 SENSOR = Platform.SENSOR
@@ -25,7 +25,8 @@ SWITCH = Platform.SWITCH
 BUTTON = Platform.BUTTON
 NUMBER = Platform.NUMBER
 SELECT = Platform.SELECT
-PLATFORMS = [SWITCH, SENSOR, BUTTON, NUMBER, SELECT]
+CALENDAR = Platform.CALENDAR
+PLATFORMS = [SWITCH, SENSOR, BUTTON, NUMBER, SELECT, CALENDAR]
 PLATFORM_NORDPOOL = "nordpool"
 PLATFORM_ENERGIDATASERVICE = "energidataservice"
 PLATFORM_ENTSOE = "entsoe"
@@ -34,7 +35,12 @@ PLATFORM_OCPP = "ocpp"
 
 # Entity names
 ENTITY_NAME_CHARGING_SENSOR = "Charging"
+ENTITY_NAME_CHARGING_CALENDAR = "Charging schedule"
 ENTITY_NAME_STATUS_SENSOR = "Status"
+ENTITY_NAME_COST_SENSOR = "Charging cost"
+ENTITY_NAME_AVERAGE_PRICE_SENSOR = "Charging average price"
+ENTITY_NAME_SAVINGS_SENSOR = "Charging savings"
+ENTITY_NAME_UPDATE_DURATION_SENSOR = "Update duration"
 ENTITY_NAME_ACTIVE_SWITCH = "Smart charging activated"
 ENTITY_NAME_APPLY_LIMIT_SWITCH = "Apply price limit"
 ENTITY_NAME_CONTINUOUS_SWITCH = "Continuous charging preferred"
@@ -62,7 +68,25 @@ CONF_START_HOUR = "start_hour"
 CONF_READY_HOUR = "ready_hour"
 CONF_MAX_PRICE = "maximum_price"
 CONF_OPPORTUNISTIC_LEVEL = "opportunistic_level"
+CONF_OPPORTUNISTIC_PERCENTILE = "opportunistic_percentile"
 CONF_MIN_SOC = "min_soc"
+CONF_COMPACT_ATTRIBUTES = "compact_attributes"
+CONF_CHARGER_POWER = "charger_power"
+CONF_SITE_POWER_LIMIT = "site_power_limit"
+CONF_MAX_CHARGING_BLOCKS = "max_charging_blocks"
+CONF_CHARGING_BLOCK_PENALTY = "charging_block_penalty"
+CONF_FRACTIONAL_HOURS = "fractional_hours"
+CONF_CHARGING_CURVE = "charging_curve"
+CONF_LEARNED_CHARGING_SPEED = "learned_charging_speed"
+CONF_SOC_ESTIMATION = "soc_estimation"
+
+# Services and events
+SERVICE_COMPUTE_SCHEDULE = "compute_schedule"
+EVENT_SCHEDULE_COMPUTED = f"{DOMAIN}_schedule_computed"
+
+# Sensor attributes
+ATTR_RAW_TWO_DAYS = "raw_two_days"
+ATTR_CHARGING_SCHEDULE = "charging_schedule"
 
 HOURS = [
     "None",
@@ -105,14 +129,46 @@ CHARGING_STATUS_NOT_ACTIVE = "Smart charging not active"
 # Defaults
 DEFAULT_NAME = DOMAIN
 DEFAULT_TARGET_SOC = 100
+DEFAULT_CHARGER_POWER = 11.0  # kW
+
+# Domain data, shared by all config entries
+DATA_FLEET = "fleet"
+DATA_HUB = "hub"
+DATA_IMPORT_DURATION = "import_duration"
+
+# Storage
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10  # seconds
+
+# Instrumentation
+STAGE_UPDATE_SENSORS = "update_sensors"
+STAGE_CREATE_BASE_SCHEDULE = "create_base_schedule"
+STAGE_GET_SCHEDULE = "get_schedule"
+STAGE_UPDATE_STATE = "update_state"
+TRIGGER_PRICE = "price"
+TRIGGER_SOC = "soc"
+TRIGGER_TARGET_SOC = "target_soc"
+TRIGGER_CONFIGURATION = "configuration"
+TRIGGER_HOURLY = "hourly"
+TRIGGER_FLEET = "fleet"
+TRIGGER_PARTIAL_HOUR = "partial_hour"
+TRIGGER_OTHER = "other"
+CACHE_PRICE_STATISTICS = "price_statistics"
+CACHE_BASE_SCHEDULE = "base_schedule"
+
+# Base schedules with more price slots than this are solved in the executor
+EXECUTOR_MIN_SLOTS = 96
+
+# Days of recorder history used to learn the charging speed
+CHARGING_SPEED_HISTORY_DAYS = 14
 
-STARTUP_MESSAGE = f"""
+STARTUP_MESSAGE = """
 -------------------------------------------------------------------
-{NAME}
-Version: {VERSION}
+%s
+Version: %s
 This is a custom integration!
 If you have any issues with this you need to open an issue here:
-{ISSUE_URL}
-Home Assistant: {HA_VERSION}
+%s
+Home Assistant: %s
 -------------------------------------------------------------------
 """
@@ -1,30 +1,44 @@
 """Coordinator for EV Smart Charging"""
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import partial
 import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable
 from homeassistant.config_entries import (
     ConfigEntry,
 )
-from homeassistant.const import SERVICE_TURN_ON, SERVICE_TURN_OFF
+from homeassistant.const import (
+    ATTR_UNIT_OF_MEASUREMENT,
+    SERVICE_TURN_ON,
+    SERVICE_TURN_OFF,
+)
 from homeassistant.core import HomeAssistant, State, callback, Event
-from homeassistant.helpers.device_registry import EVENT_DEVICE_REGISTRY_UPDATED
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import async_get as async_device_registry_get
 from homeassistant.helpers.device_registry import DeviceRegistry
 from homeassistant.helpers.event import (
+    async_track_point_in_utc_time,
     async_track_state_change,
-    async_track_time_change,
 )
 from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
 from homeassistant.helpers.entity_registry import (
     EntityRegistry,
     async_entries_for_config_entry,
 )
+from homeassistant.helpers.storage import Store
 from homeassistant.const import STATE_ON, STATE_OFF
 from homeassistant.util import dt
 
-from custom_components.ev_smart_charging.helpers.price_adaptor import PriceAdaptor
+from custom_components.ev_smart_charging.helpers.price_adaptor import (
+    PriceAdaptor,
+    PriceData,
+)
 
 from .const import (
+    CACHE_BASE_SCHEDULE,
+    CACHE_PRICE_STATISTICS,
+    CHARGING_SPEED_HISTORY_DAYS,
     CHARGING_STATUS_CHARGING,
     CHARGING_STATUS_DISCONNECTED,
     CHARGING_STATUS_KEEP_ON,
@@ -33,35 +47,82 @@ from .const import (
     CHARGING_STATUS_WAITING_CHARGING,
     CHARGING_STATUS_WAITING_NEW_PRICE,
     CONF_CHARGER_ENTITY,
+    CONF_CHARGER_POWER,
+    CONF_CHARGING_BLOCK_PENALTY,
+    CONF_CHARGING_CURVE,
     CONF_EV_CONTROLLED,
+    CONF_MAX_CHARGING_BLOCKS,
     CONF_MAX_PRICE,
     CONF_MIN_SOC,
     CONF_OPPORTUNISTIC_LEVEL,
+    CONF_OPPORTUNISTIC_PERCENTILE,
     CONF_PCT_PER_HOUR,
     CONF_READY_HOUR,
     CONF_PRICE_SENSOR,
     CONF_EV_SOC_SENSOR,
     CONF_EV_TARGET_SOC_SENSOR,
+    CONF_FRACTIONAL_HOURS,
+    CONF_LEARNED_CHARGING_SPEED,
+    CONF_SITE_POWER_LIMIT,
+    CONF_SOC_ESTIMATION,
     CONF_START_HOUR,
+    DEFAULT_CHARGER_POWER,
     DEFAULT_TARGET_SOC,
+    DOMAIN,
+    EXECUTOR_MIN_SLOTS,
     READY_HOUR_NONE,
+    STAGE_CREATE_BASE_SCHEDULE,
+    STAGE_GET_SCHEDULE,
+    STAGE_UPDATE_SENSORS,
+    STAGE_UPDATE_STATE,
     START_HOUR_NONE,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
     SWITCH,
+    TRIGGER_CONFIGURATION,
+    TRIGGER_FLEET,
+    TRIGGER_PARTIAL_HOUR,
+    TRIGGER_HOURLY,
+    TRIGGER_OTHER,
+    TRIGGER_PRICE,
+    TRIGGER_SOC,
+    TRIGGER_TARGET_SOC,
 )
 from .helpers.coordinator import (
+    ChargingCurve,
     Raw,
     Scheduler,
+    get_charging_stored,
     get_charging_value,
     get_ready_hour_utc,
     get_start_hour_utc,
+    solve_base_schedule,
+)
+from .helpers.general import (
+    Validator,
+    get_cost_units,
+    get_parameter,
+    get_platform,
 )
-from .helpers.general import Validator, get_parameter, get_platform
+from .helpers.speed import (
+    ChargingSpeedEstimator,
+    SocEstimator,
+    get_history_observations,
+)
+from .helpers.timing import Instrumentation
 from .sensor import (
     EVSmartChargingSensor,
+    EVSmartChargingSensorAveragePrice,
     EVSmartChargingSensorCharging,
+    EVSmartChargingSensorCost,
+    EVSmartChargingSensorSavings,
     EVSmartChargingSensorStatus,
+    EVSmartChargingSensorUpdateDuration,
 )
 
+if TYPE_CHECKING:
+    from .helpers.fleet import FleetScheduler
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -74,9 +135,21 @@ class EVSmartChargingCoordinator:
         self.config_entry = config_entry
         self.platforms = []
         self.listeners = []
+        self.sensor_listeners = []
+        self.schedule_listeners = []
+
+        # Seconds from the creation of the coordinator
+        self.time_created = time.monotonic()
+        self.startup_timing = {"setup": None, "first_schedule": None}
+        self.instrumentation = Instrumentation()
 
         self.sensor = None
         self.sensor_status = None
+        self.sensor_cost = None
+        self.sensor_average_price = None
+        self.sensor_savings = None
+        self.sensor_update_duration = None
+        self.calendar = None
         self.switch_active = None
         self.switch_apply_limit = None
         self.switch_apply_limit_entity_id = None
@@ -101,6 +174,10 @@ class EVSmartChargingCoordinator:
             self.charger_switch = get_parameter(self.config_entry, CONF_CHARGER_ENTITY)
 
         self.scheduler = Scheduler()
+        self.store = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{self.config_entry.entry_id}"
+        )
+        self.stored_data = None
 
         self.ev_soc = None
         self.ev_soc_before_last_charging = -1
@@ -112,6 +189,8 @@ class EVSmartChargingCoordinator:
         self.tomorrow_valid_previous = False
 
         self.raw_two_days = None
+        self.price_data: PriceData = None
+        self.price_statistics = None
         self._charging_schedule = None
         self.charging_pct_per_hour = get_parameter(
             self.config_entry, CONF_PCT_PER_HOUR, 6.0
@@ -142,17 +221,31 @@ class EVSmartChargingCoordinator:
         self.number_opportunistic_level = int(
             get_parameter(self.config_entry, CONF_OPPORTUNISTIC_LEVEL, 50.0)
         )
+        self.read_scheduling_options()
 
-        self.auto_charging_state = STATE_OFF
-
-        # Update state once per hour.
-        self.listeners.append(
-            async_track_time_change(hass, self.update_hourly, minute=0, second=0)
+        # Site power sharing with the other config entries, 0 means not used
+        self.charger_power = float(
+            get_parameter(self.config_entry, CONF_CHARGER_POWER, DEFAULT_CHARGER_POWER)
         )
-        # Listen for changes to the device.
-        self.listeners.append(
-            hass.bus.async_listen(EVENT_DEVICE_REGISTRY_UPDATED, self.device_updated)
+        self.site_power_limit = float(
+            get_parameter(self.config_entry, CONF_SITE_POWER_LIMIT, 0.0)
         )
+        self.fleet: "FleetScheduler" = None
+        self.speed_estimator = ChargingSpeedEstimator()
+        self.soc_estimator = SocEstimator()
+        # Last SOC reported by the SOC entity, self.ev_soc may be an estimate
+        self.ev_soc_reading = None
+
+        self.auto_charging_state = STATE_OFF
+
+        # The hourly update and the device listener are in the hub
+        self.hub = None
+        # Timer for the minute when a partly used hour starts or stops charging
+        self.partial_hour_listener = None
+        # Timer for when the estimated SOC reaches the target SOC
+        self.soc_target_listener = None
+        # Increased for each base schedule, to discard stale executor results
+        self.solve_generation = 0
 
     @callback
     async def device_updated(self, event: Event):  # pylint: disable=unused-argument
@@ -184,7 +277,7 @@ class EVSmartChargingCoordinator:
     ):  # pylint: disable=unused-argument
         """Called every hour"""
         _LOGGER.debug("EVSmartChargingCoordinator.update_hourly()")
-        await self.update_sensors()
+        await self.update_sensors(trigger=TRIGGER_HOURLY)
 
     @callback
     async def update_state(
@@ -220,6 +313,15 @@ class EVSmartChargingCoordinator:
             time_now = dt.now()
             current_value = self.auto_charging_state == STATE_ON
 
+            # Only charge the planned minutes of a partly used hour
+            partial_hour = self.scheduler.get_partial_hour()
+            if (
+                partial_hour is not None
+                and partial_hour["start"] <= time_now < partial_hour["end"]
+                and not partial_hour["on"] <= time_now < partial_hour["off"]
+            ):
+                turn_on_charging = False
+
             # Handle self.switch_keep_on
             if self.switch_keep_on:
                 # Only if price limit is not used and the EV is connected
@@ -263,6 +365,10 @@ class EVSmartChargingCoordinator:
                 # Turn off charging
                 self.auto_charging_state = STATE_OFF
                 await self.turn_off_charging()
+            self.speed_estimator.set_charging(self.auto_charging_state == STATE_ON)
+            self.soc_estimator.set_charging(
+                dt.utcnow(), self.auto_charging_state == STATE_ON
+            )
 
             if (
                 self.scheduler.charging_stop_time is not None
@@ -279,6 +385,11 @@ class EVSmartChargingCoordinator:
                 self.sensor.charging_number_of_hours = (
                     self.scheduler.get_charging_number_of_hours()
                 )
+                self.update_cost_sensors(
+                    self.scheduler.get_charging_cost(),
+                    self.scheduler.get_charging_average_price(),
+                    self.scheduler.get_charging_savings(),
+                )
                 if self.sensor_status:
                     if self.auto_charging_state == STATE_ON:
                         self.sensor_status.native_value = CHARGING_STATUS_CHARGING
@@ -292,6 +403,7 @@ class EVSmartChargingCoordinator:
                 self.sensor.charging_start_time = None
                 self.sensor.charging_stop_time = None
                 self.sensor.charging_number_of_hours = 0
+                self.update_cost_sensors(None, None, None)
                 if self.sensor_status:
                     if not self.switch_active:
                         self.sensor_status.native_value = CHARGING_STATUS_NOT_ACTIVE
@@ -311,6 +423,135 @@ class EVSmartChargingCoordinator:
                 self._charging_schedule = Scheduler.get_empty_schedule()
                 self.sensor.charging_schedule = self._charging_schedule
 
+        self.store.async_delay_save(self.get_stored_data, STORAGE_SAVE_DELAY)
+
+    def update_cost_sensors(
+        self, cost: float, average_price: float, savings: float
+    ) -> None:
+        """Update the cost, average price and savings sensors"""
+        for sensor, value in (
+            (self.sensor_cost, cost),
+            (self.sensor_average_price, average_price),
+            (self.sensor_savings, savings),
+        ):
+            if sensor is not None and sensor.native_value != value:
+                sensor.native_value = value
+
+    def update_cost_units(self, price_unit: str) -> None:
+        """Update the units of the cost, average price and savings sensors"""
+        cost_unit, price_unit = get_cost_units(price_unit, self.hass.config.currency)
+        for sensor, unit in (
+            (self.sensor_cost, cost_unit),
+            (self.sensor_average_price, price_unit),
+            (self.sensor_savings, cost_unit),
+        ):
+            if sensor is not None:
+                sensor.set_unit(unit)
+
+    def get_stored_data(self) -> dict[str, Any]:
+        """Get the state to be stored for a restart"""
+        data = self.scheduler.get_stored_base_schedule()
+        keep_on_completion_time = None
+        if self.switch_keep_on_completion_time is not None:
+            keep_on_completion_time = self.switch_keep_on_completion_time.isoformat()
+        data.update(
+            {
+                "switch_keep_on_completion_time": keep_on_completion_time,
+                "ev_soc": self.ev_soc,
+                "ev_soc_before_last_charging": self.ev_soc_before_last_charging,
+                "auto_charging_state": self.auto_charging_state,
+                "charging_speed_observations": self.speed_estimator.get_stored(),
+            }
+        )
+        return data
+
+    async def load_state(self):
+        """Load the state stored before a restart"""
+        # Must be done before the first update, since the store returns
+        # pending data once a save has been scheduled. Until restore_state()
+        # has run, the updates only read the input sensors.
+        self.stored_data = await self.store.async_load()
+
+    async def restore_state(self):
+        """Restore the state stored before a restart"""
+        data = self.stored_data
+        self.stored_data = None
+        if self.sensor is None:
+            return
+
+        if data is not None:
+            _LOGGER.debug("EVSmartChargingCoordinator.restore_state()")
+            self.speed_estimator.add_history(
+                data.get("charging_speed_observations", [])
+            )
+
+            # The schedule is only valid if the SOC is unchanged
+            if (
+                self.ev_soc is not None
+                and self.ev_soc == data["ev_soc"]
+                and self.raw_two_days is not None
+                and self.scheduler.restore_base_schedule(data, self.raw_two_days)
+            ):
+                _LOGGER.debug("Schedule restored")
+                self.ev_soc_previous = self.ev_soc
+                self.ev_soc_before_last_charging = data["ev_soc_before_last_charging"]
+                if data["switch_keep_on_completion_time"] is not None:
+                    self.switch_keep_on_completion_time = dt.parse_datetime(
+                        data["switch_keep_on_completion_time"]
+                    )
+                # The charger is assumed to be in the state it was left in,
+                # so it is not commanded again unless the decision changes.
+                self.auto_charging_state = data["auto_charging_state"]
+                self.sensor.native_value = self.auto_charging_state
+                self.speed_estimator.set_charging(self.auto_charging_state == STATE_ON)
+                self.soc_estimator.set_charging(
+                    dt.utcnow(), self.auto_charging_state == STATE_ON
+                )
+                if self.fleet is not None and self.in_fleet_demand():
+                    self.fleet.restore_demand(
+                        self.config_entry.entry_id,
+                        self.get_scheduling_params(),
+                        self.raw_two_days,
+                    )
+
+        if self.learned_charging_speed and not self.speed_estimator.observations:
+            self.hass.async_create_task(self.backfill_charging_speed())
+
+        # The updates during the platform setup have only read the input
+        # sensors, so the schedule is made now, with all switches in place.
+        await self.update_sensors()
+
+    async def backfill_charging_speed(self):
+        """Learn the charging speed from the recorder history"""
+        if "recorder" not in self.hass.config.components:
+            return
+        # pylint: disable=import-outside-toplevel
+        # The recorder is optional, so it is only imported when it is loaded
+        from homeassistant.components.recorder import get_instance, history
+
+        time_end = dt.utcnow()
+        entity_ids = [self.ev_soc_entity_id, self.sensor.entity_id]
+        states = await get_instance(self.hass).async_add_executor_job(
+            partial(
+                history.get_significant_states,
+                self.hass,
+                time_end - timedelta(days=CHARGING_SPEED_HISTORY_DAYS),
+                time_end,
+                entity_ids,
+                significant_changes_only=False,
+                no_attributes=True,
+            )
+        )
+        observations = await self.hass.async_add_executor_job(
+            get_history_observations,
+            states.get(self.ev_soc_entity_id, []),
+            states.get(self.sensor.entity_id, []),
+        )
+        _LOGGER.debug(
+            "Charging speed observations from history = %s", len(observations)
+        )
+        self.speed_estimator.add_history(observations)
+
     async def turn_on_charging(self, state: bool = True):
         """Turn on charging"""
 
@@ -350,17 +591,37 @@ class EVSmartChargingCoordinator:
                 self.sensor = sensor
             if isinstance(sensor, EVSmartChargingSensorStatus):
                 self.sensor_status = sensor
+            if isinstance(sensor, EVSmartChargingSensorCost):
+                self.sensor_cost = sensor
+            if isinstance(sensor, EVSmartChargingSensorAveragePrice):
+                self.sensor_average_price = sensor
+            if isinstance(sensor, EVSmartChargingSensorSavings):
+                self.sensor_savings = sensor
+            if isinstance(sensor, EVSmartChargingSensorUpdateDuration):
+                self.sensor_update_duration = sensor
 
         self.price_entity_id = get_parameter(self.config_entry, CONF_PRICE_SENSOR)
         self.price_adaptor.set_price_platform(
             get_platform(self.hass, self.price_entity_id)
         )
+        self.track_input_sensors()
+
+        self._charging_schedule = Scheduler.get_empty_schedule()
+        self.sensor.charging_schedule = self._charging_schedule
+        await self.update_sensors()
+
+    def track_input_sensors(self):
+        """Listen for state changes of the input sensors"""
+        for unsub in self.sensor_listeners:
+            unsub()
+        self.sensor_listeners = []
+
         self.ev_soc_entity_id = get_parameter(self.config_entry, CONF_EV_SOC_SENSOR)
         self.ev_target_soc_entity_id = get_parameter(
             self.config_entry, CONF_EV_TARGET_SOC_SENSOR
         )
 
-        self.listeners.append(
+        self.sensor_listeners.append(
             async_track_state_change(
                 self.hass,
                 [
@@ -371,7 +632,7 @@ class EVSmartChargingCoordinator:
             )
         )
         if len(self.ev_target_soc_entity_id) > 0:
-            self.listeners.append(
+            self.sensor_listeners.append(
                 async_track_state_change(
                     self.hass,
                     [
@@ -385,9 +646,168 @@ class EVSmartChargingCoordinator:
             self.sensor.ev_target_soc = DEFAULT_TARGET_SOC
             self.ev_target_soc = DEFAULT_TARGET_SOC
 
-        self._charging_schedule = Scheduler.get_empty_schedule()
-        self.sensor.charging_schedule = self._charging_schedule
-        await self.update_sensors()
+    def join_fleet(self, fleet: "FleetScheduler"):
+        """Share the site power limit with the other config entries"""
+        self.fleet = fleet
+        fleet.add_vehicle(
+            self.config_entry.entry_id,
+            self.scheduler,
+            self.charger_power,
+            self.site_power_limit,
+            self.fleet_replanned,
+        )
+
+    def leave_fleet(self):
+        """Stop sharing the site power limit"""
+        if self.fleet is not None:
+            self.fleet.remove_vehicle(self.config_entry.entry_id)
+            self.fleet = None
+
+    def in_fleet_demand(self) -> bool:
+        """Check if the EV can charge, and so uses site power"""
+        return self.switch_active is True and self.switch_ev_connected is True
+
+    @callback
+    def fleet_replanned(self):
+        """Called when the fleet has changed the base schedule"""
+        _LOGGER.debug("EVSmartChargingCoordinator.fleet_replanned()")
+        self.hass.async_create_task(self.update_sensors(trigger=TRIGGER_FLEET))
+
+    def unsubscribe_listeners(self):
+        """Remove all listeners"""
+        for unsub in self.listeners + self.sensor_listeners:
+            unsub()
+        self.listeners = []
+        self.sensor_listeners = []
+        if self.partial_hour_listener is not None:
+            self.partial_hour_listener()
+            self.partial_hour_listener = None
+        if self.soc_target_listener is not None:
+            self.soc_target_listener()
+            self.soc_target_listener = None
+
+    def track_partial_hour(self):
+        """Update the charger when a partly used hour starts or stops charging"""
+        if self.partial_hour_listener is not None:
+            self.partial_hour_listener()
+            self.partial_hour_listener = None
+
+        partial_hour = self.scheduler.get_partial_hour()
+        if partial_hour is None:
+            return
+        time_now = dt.utcnow()
+        # The hourly update handles the start and the end of the hour
+        for point in [partial_hour["on"], partial_hour["off"]]:
+            if time_now < point and point not in [
+                partial_hour["start"],
+                partial_hour["end"],
+            ]:
+                _LOGGER.debug("Partial hour update at %s", point)
+                self.partial_hour_listener = async_track_point_in_utc_time(
+                    self.hass, self.update_partial_hour, point
+                )
+                return
+
+    @callback
+    async def update_partial_hour(
+        self, date_time: datetime = None
+    ):  # pylint: disable=unused-argument
+        """Called when a partly used hour starts or stops charging"""
+        _LOGGER.debug("EVSmartChargingCoordinator.update_partial_hour()")
+        self.partial_hour_listener = None
+        await self.update_sensors(trigger=TRIGGER_PARTIAL_HOUR)
+
+    def track_soc_target(self):
+        """Update the charger when the estimated SOC reaches the target SOC"""
+        if self.soc_target_listener is not None:
+            self.soc_target_listener()
+            self.soc_target_listener = None
+
+        if not self.soc_estimation or self.ev_target_soc is None:
+            return
+        time_now = dt.utcnow()
+        point = self.soc_estimator.get_time_at_soc(time_now, self.ev_target_soc)
+        if point is not None and time_now < point:
+            _LOGGER.debug("Target SOC update at %s", point)
+            self.soc_target_listener = async_track_point_in_utc_time(
+                self.hass, self.update_soc_target, point
+            )
+
+    @callback
+    async def update_soc_target(
+        self, date_time: datetime = None
+    ):  # pylint: disable=unused-argument
+        """Called when the estimated SOC reaches the target SOC"""
+        _LOGGER.debug("EVSmartChargingCoordinator.update_soc_target()")
+        self.soc_target_listener = None
+        await self.update_sensors(trigger=TRIGGER_SOC)
+
+    def can_reconfigure(self) -> bool:
+        """Check if the updated options can be applied without a reload"""
+        # A new price sensor can be from a different price platform,
+        # so it needs a full setup. The same for joining or leaving the fleet.
+        return (
+            self.sensor is not None
+            and self.price_entity_id
+            == get_parameter(self.config_entry, CONF_PRICE_SENSOR)
+            and self.charger_power
+            == float(
+                get_parameter(
+                    self.config_entry, CONF_CHARGER_POWER, DEFAULT_CHARGER_POWER
+                )
+            )
+            and self.site_power_limit
+            == float(get_parameter(self.config_entry, CONF_SITE_POWER_LIMIT, 0.0))
+        )
+
+    def read_scheduling_options(self):
+        """Read the scheduling options that can be changed without a reload"""
+        # 0 means that the last price is compared with the opportunistic level
+        self.opportunistic_percentile = int(
+            get_parameter(self.config_entry, CONF_OPPORTUNISTIC_PERCENTILE, 0)
+        )
+        # Limits on the charging blocks, 0 means not used
+        self.max_charging_blocks = int(
+            get_parameter(self.config_entry, CONF_MAX_CHARGING_BLOCKS, 0)
+        )
+        self.charging_block_penalty = float(
+            get_parameter(self.config_entry, CONF_CHARGING_BLOCK_PENALTY, 0.0)
+        )
+        self.fractional_hours = bool(
+            get_parameter(self.config_entry, CONF_FRACTIONAL_HOURS, False)
+        )
+        self.learned_charging_speed = bool(
+            get_parameter(self.config_entry, CONF_LEARNED_CHARGING_SPEED, False)
+        )
+        self.soc_estimation = bool(
+            get_parameter(self.config_entry, CONF_SOC_ESTIMATION, False)
+        )
+        # Breakpoints [soc, pct_per_hour] of the charging speed, empty if not used
+        try:
+            self.charging_curve = ChargingCurve.parse(
+                get_parameter(self.config_entry, CONF_CHARGING_CURVE, "")
+            )
+        except ValueError:
+            _LOGGER.error("Charging curve not valid")
+            self.charging_curve = []
+
+    async def reconfigure(self):
+        """Apply updated options to the running coordinator"""
+        _LOGGER.debug("EVSmartChargingCoordinator.reconfigure()")
+
+        charger_switch = None
+        if len(get_parameter(self.config_entry, CONF_CHARGER_ENTITY)) > 0:
+            charger_switch = get_parameter(self.config_entry, CONF_CHARGER_ENTITY)
+        if charger_switch != self.charger_switch:
+            # Make sure the old charger is not left on
+            if self.auto_charging_state == STATE_ON:
+                await self.turn_off_charging()
+                self.auto_charging_state = STATE_OFF
+            self.charger_switch = charger_switch
+
+        self.read_scheduling_options()
+        self.track_input_sensors()
+        await self.update_configuration()
 
     async def switch_active_update(self, state: bool):
         """Handle the Active switch"""
@@ -534,10 +954,15 @@ class EVSmartChargingCoordinator:
         old_state: State = None,
         new_state: State = None,
         configuration_updated: bool = False,
+        trigger: str = None,
     ):  # pylint: disable=unused-argument
         """Price or EV sensors have been updated."""
 
         _LOGGER.debug("EVSmartChargingCoordinator.update_sensors()")
+        time_start = time.perf_counter()
+        if trigger is None:
+            trigger = self.get_trigger(entity_id, configuration_updated)
+        self.instrumentation.count_trigger(trigger)
         _LOGGER.debug("entity_id = %s", entity_id)
         # _LOGGER.debug("old_state = %s", old_state)
         _LOGGER.debug("new_state = %s", new_state)
@@ -547,33 +972,21 @@ class EVSmartChargingCoordinator:
             self.ev_soc_before_last_charging = -1
 
         price_state = self.hass.states.get(self.price_entity_id)
-        if self.price_adaptor.is_price_state(price_state):
-            self.sensor.current_price = self.price_adaptor.get_current_price(
-                price_state
-            )
-            self.raw_today_local = self.price_adaptor.get_raw_today_local(price_state)
-            self.raw_tomorrow_local = self.price_adaptor.get_raw_tomorrow_local(
-                price_state
-            )
-            self.tomorrow_valid = self.raw_tomorrow_local.is_valid()
-
-            # Fix to take care of Nordpool bug
-            # https://github.com/custom-components/nordpool/issues/235
-            if self.tomorrow_valid:
-                datetime_today = self.raw_today_local.get_raw()[0]["start"]
-                datetime_tomorrow = self.raw_tomorrow_local.get_raw()[0]["start"]
-                if datetime_today == datetime_tomorrow:
-                    _LOGGER.debug("Nordpool bug detected and avoided")
-                    self.raw_tomorrow_local = Raw([])
-                    self.tomorrow_valid = False
-
-            # Change to UTC time
-            self.raw_two_days = self.raw_today_local.copy().to_utc()
-            self.raw_two_days.extend(self.raw_tomorrow_local.copy().to_utc())
-            # Change to local time
-            self.sensor.raw_two_days_local = (
-                self.raw_two_days.copy().to_local().get_raw()
+        price_data = self.get_price_data(price_state)
+        if price_data is not None:
+            self.sensor.current_price = price_data.get_current_price()
+            self.raw_today_local = price_data.raw_today_local
+            self.raw_tomorrow_local = price_data.raw_tomorrow_local
+            self.tomorrow_valid = price_data.tomorrow_valid
+            self.raw_two_days = price_data.raw_two_days
+            self.sensor.raw_two_days_local = price_data.raw_two_days_local
+            self.update_cost_units(price_state.attributes.get(ATTR_UNIT_OF_MEASUREMENT))
+            # The statistics are only calculated when the prices have changed
+            self.instrumentation.count_cache(
+                CACHE_PRICE_STATISTICS, price_data is self.price_data
             )
+            self.price_data = price_data
+            self.price_statistics = price_data.price_statistics
             # To handle non-live SOC
             # Update self.ev_soc_last if new price and ready_hour == None
             if self.tomorrow_valid and not self.tomorrow_valid_previous:
@@ -587,6 +1000,16 @@ class EVSmartChargingCoordinator:
         if Validator.is_soc_state(ev_soc_state):
             self.sensor.ev_soc = ev_soc_state.state
             self.ev_soc = float(ev_soc_state.state)
+            if self.ev_soc != self.ev_soc_reading:
+                self.ev_soc_reading = self.ev_soc
+                self.speed_estimator.add_soc(ev_soc_state.last_changed, self.ev_soc)
+            # Attribute-only updates of the SOC entity are not new readings
+            self.soc_estimator.add_reading(ev_soc_state.last_changed, self.ev_soc)
+            if self.soc_estimation:
+                self.ev_soc = self.soc_estimator.get_soc(
+                    dt.utcnow(), self.charging_pct_per_hour, self.get_charging_curve()
+                )
+                _LOGGER.debug("Estimated SOC = %s", self.ev_soc)
             # To handle non-live SOC
             if self.ev_soc != self.ev_soc_previous:
                 self.ev_soc_previous = self.ev_soc
@@ -602,29 +1025,13 @@ class EVSmartChargingCoordinator:
             else:
                 _LOGGER.error("Target SOC sensor not valid: %s", ev_target_soc_state)
 
-        # Check if Opportunistic charging should be used
-        if self.switch_opportunistic is True and (
-            self.raw_two_days.last_value()
-            < (self.max_price * self.number_opportunistic_level / 100.0)
-        ):
-            max_price = self.max_price * self.number_opportunistic_level / 100.0
-        else:
-            max_price = self.max_price
+        if self.stored_data is not None:
+            # The platforms are set up before restore_state(), which applies
+            # the stored schedule instead of a new one
+            _LOGGER.debug("Waiting for the stored state to be restored")
+            return
 
-        scheduling_params = {
-            "ev_soc": self.ev_soc,
-            "ev_target_soc": self.ev_target_soc,
-            "min_soc": self.number_min_soc,
-            "charging_pct_per_hour": self.charging_pct_per_hour,
-            "start_hour": get_start_hour_utc(
-                self.start_hour_local, self.ready_hour_local
-            ),
-            "ready_hour": get_ready_hour_utc(self.ready_hour_local),
-            "switch_active": self.switch_active,
-            "switch_apply_limit": self.switch_apply_limit,
-            "switch_continuous": self.switch_continuous,
-            "max_price": max_price,
-        }
+        scheduling_params = self.get_scheduling_params()
 
         time_now_local = dt.now()
         time_now_hour_local = dt.now().hour
@@ -666,7 +1073,8 @@ class EVSmartChargingCoordinator:
                         not_charging = False
 
         if (
-            (self.ev_soc is not None and self.ev_target_soc is not None)
+            self.raw_two_days is not None
+            and (self.ev_soc is not None and self.ev_target_soc is not None)
             and (self.ev_soc > self.ev_soc_before_last_charging)
             and (
                 (self.ev_soc >= self.ev_target_soc)
@@ -676,7 +1084,24 @@ class EVSmartChargingCoordinator:
                 )
             )
         ):
-            self.scheduler.create_base_schedule(scheduling_params, self.raw_two_days)
+            self.instrumentation.count_cache(CACHE_BASE_SCHEDULE, False)
+            with self.instrumentation.measure(STAGE_CREATE_BASE_SCHEDULE):
+                if self.fleet is not None and self.in_fleet_demand():
+                    # After a fleet replan, the fleet has already planned this EV
+                    if trigger != TRIGGER_FLEET:
+                        self.fleet.update_demand(
+                            self.config_entry.entry_id,
+                            scheduling_params,
+                            self.raw_two_days,
+                        )
+                elif not await self.create_base_schedule(scheduling_params):
+                    # A newer update has replaced this one
+                    return
+        elif self.scheduler.base_schedule_exists():
+            self.instrumentation.count_cache(CACHE_BASE_SCHEDULE, True)
+
+        if self.fleet is not None and not self.in_fleet_demand():
+            self.fleet.clear_demand(self.config_entry.entry_id)
 
         # If the ready_hour is updated to next day before next day's prices are available,
         # then remove the schedule
@@ -689,18 +1114,320 @@ class EVSmartChargingCoordinator:
 
         if self.scheduler.base_schedule_exists() is True:
             scheduling_params.update(
-                {"value_in_graph": self.raw_two_days.max_value() * 0.75}
+                {"value_in_graph": self.price_statistics.max * 0.75}
             )
-            new_charging = self.scheduler.get_schedule(scheduling_params)
+            with self.instrumentation.measure(STAGE_GET_SCHEDULE):
+                new_charging = self.scheduler.get_schedule(scheduling_params)
             if new_charging is not None:
+                self.record_startup_time("first_schedule")
                 self._charging_schedule = new_charging
                 self.sensor.charging_schedule = (
                     Raw(self._charging_schedule).copy().to_local().get_raw()
                 )
+        self.track_partial_hour()
 
         _LOGGER.debug("self._max_price = %s", self.max_price)
         _LOGGER.debug("Current price = %s", self.sensor.current_price)
-        await self.update_state()  # Update the charging status
+        with self.instrumentation.measure(STAGE_UPDATE_STATE):
+            await self.update_state()  # Update the charging status
+        self.track_soc_target()
+        if self.calendar:
+            self.calendar.charging_blocks = self.scheduler.get_charging_blocks()
+        self.notify_schedule_listeners()
+
+        self.instrumentation.record(STAGE_UPDATE_SENSORS, time_start)
+        if self.sensor_update_duration:
+            timing = self.instrumentation.get_stage(STAGE_UPDATE_SENSORS)
+            self.sensor_update_duration.update_timing(timing.as_dict())
+
+    async def create_base_schedule(self, scheduling_params: dict[str, Any]) -> bool:
+        """Create the base schedule
+
+        Large inputs are solved in the executor. Returns False if a newer
+        update started while solving, and the result was discarded."""
+
+        self.solve_generation = self.solve_generation + 1
+        generation = self.solve_generation
+        if len(self.raw_two_days.get_raw()) <= EXECUTOR_MIN_SLOTS:
+            self.scheduler.create_base_schedule(scheduling_params, self.raw_two_days)
+            return True
+
+        solution = await self.hass.async_add_executor_job(
+            solve_base_schedule, scheduling_params, self.raw_two_days
+        )
+        discarded = generation != self.solve_generation
+        self.instrumentation.count_executor_job(discarded)
+        if discarded:
+            _LOGGER.debug("Discarded stale base schedule")
+            return False
+        self.scheduler.set_base_schedule(solution)
+        return True
+
+    def get_price_data(self, price_state: State) -> PriceData:
+        """Get the prices of a price state, or None if it is not valid
+
+        The prices are shared with other config entries with the same sensor."""
+        if self.price_data is not None and self.price_data.price_state is price_state:
+            return self.price_data
+        if self.hub is not None:
+            return self.hub.get_price_data(
+                self.price_entity_id, self.price_adaptor, price_state
+            )
+        if self.price_adaptor.is_price_state(price_state):
+            return PriceData(self.price_adaptor, price_state)
+        return None
+
+    def get_trigger(self, entity_id: str, configuration_updated: bool) -> str:
+        """Get the source of a call to update_sensors"""
+        if configuration_updated:
+            return TRIGGER_CONFIGURATION
+        if entity_id is not None and entity_id == self.price_entity_id:
+            return TRIGGER_PRICE
+        if entity_id is not None and entity_id == self.ev_soc_entity_id:
+            return TRIGGER_SOC
+        if entity_id is not None and entity_id == self.ev_target_soc_entity_id:
+            return TRIGGER_TARGET_SOC
+        return TRIGGER_OTHER
+
+    def get_scheduling_params(self) -> dict[str, Any]:
+        """Get the parameters for the scheduler"""
+
+        # Check if Opportunistic charging should be used
+        max_price = self.max_price
+        if self.switch_opportunistic is True and self.price_statistics is not None:
+            opportunistic_price = (
+                self.max_price * self.number_opportunistic_level / 100.0
+            )
+            if self.opportunistic_percentile > 0:
+                reference_price = self.price_statistics.percentile(
+                    self.opportunistic_percentile
+                )
+            else:
+                reference_price = self.price_statistics.last
+            if reference_price is not None and reference_price < opportunistic_price:
+                max_price = opportunistic_price
+
+        return {
+            "ev_soc": self.ev_soc,
+            "ev_target_soc": self.ev_target_soc,
+            "min_soc": self.number_min_soc,
+            "charging_pct_per_hour": self.charging_pct_per_hour,
+            "start_hour": get_start_hour_utc(
+                self.start_hour_local, self.ready_hour_local
+            ),
+            "ready_hour": get_ready_hour_utc(self.ready_hour_local),
+            "switch_active": self.switch_active,
+            "switch_apply_limit": self.switch_apply_limit,
+            "switch_continuous": self.switch_continuous,
+            "max_price": max_price,
+            "max_charging_blocks": self.max_charging_blocks,
+            "charging_block_penalty": self.charging_block_penalty,
+            "fractional_hours": self.fractional_hours,
+            "charging_curve": self.get_charging_curve(),
+        }
+
+    def get_charging_curve(self) -> list[list[float]]:
+        """Get the breakpoints of the charging speed, learned or configured"""
+        if self.learned_charging_speed:
+            return self.speed_estimator.get_charging_curve(
+                self.charging_pct_per_hour, self.charging_curve
+            )
+        return self.charging_curve
+
+    async def compute_schedule(self, overrides: dict[str, Any]) -> dict[str, Any]:
+        """Calculate a schedule for hypothetical inputs
+
+        The current prices are used. Nothing in the coordinator is changed.
+        Large inputs are solved in the executor."""
+
+        raw_two_days = self.raw_two_days
+        if raw_two_days is None or not raw_two_days.is_valid():
+            raise HomeAssistantError("No prices available")
+        price_statistics = self.price_statistics
+
+        params = self.get_scheduling_params()
+        for key in (
+            "ev_soc",
+            "ev_target_soc",
+            "min_soc",
+            "charging_pct_per_hour",
+            "max_price",
+        ):
+            if key in overrides:
+                params[key] = overrides[key]
+        if params["ev_soc"] is None or params["ev_target_soc"] is None:
+            raise HomeAssistantError("EV SOC and EV target SOC must be known")
+
+        start_hour_local = self.start_hour_local
+        if "start_hour" in overrides:
+            try:
+                start_hour_local = int(overrides["start_hour"][0:2])
+            except ValueError:
+                start_hour_local = START_HOUR_NONE
+        ready_hour_local = self.ready_hour_local
+        if "ready_hour" in overrides:
+            try:
+                ready_hour_local = int(overrides["ready_hour"][0:2])
+            except ValueError:
+                ready_hour_local = READY_HOUR_NONE
+            if ready_hour_local == 0:
+                # Treat 00:00 as 24:00
+                ready_hour_local = 24
+        params["start_hour"] = get_start_hour_utc(start_hour_local, ready_hour_local)
+        params["ready_hour"] = get_ready_hour_utc(ready_hour_local)
+
+        params["switch_active"] = True
+        params["switch_apply_limit"] = overrides.get(
+            "apply_limit", bool(self.switch_apply_limit)
+        )
+        params["switch_continuous"] = overrides.get(
+            "continuous", self.switch_continuous is not False
+        )
+        params["value_in_graph"] = 1.0
+
+        scheduler = Scheduler()
+        if len(raw_two_days.get_raw()) <= EXECUTOR_MIN_SLOTS:
+            scheduler.create_base_schedule(params, raw_two_days)
+        else:
+            scheduler.set_base_schedule(
+                await self.hass.async_add_executor_job(
+                    solve_base_schedule, params, raw_two_days
+                )
+            )
+        schedule = scheduler.get_schedule(params)
+
+        slots = []
+        for item, price in zip(schedule, raw_two_days.get_raw()):
+            if item["value"] != 0.0:
+                slots.append(
+                    {
+                        "start": dt.as_local(price["start"]),
+                        "end": dt.as_local(price["end"]),
+                        "value": price["value"],
+                    }
+                )
+
+        return {
+            "charging_is_planned": scheduler.get_charging_is_planned(),
+            "charging_start_time": scheduler.get_charging_start_time(),
+            "charging_stop_time": scheduler.get_charging_stop_time(),
+            "charging_number_of_hours": scheduler.get_charging_number_of_hours(),
+            "cost": scheduler.get_charging_cost(),
+            "average_price": scheduler.get_charging_average_price(),
+            "savings": scheduler.get_charging_savings(),
+            "slots": slots,
+            "slots_within_limit": (
+                price_statistics.count_within_limit(params["max_price"])
+                if params["max_price"] > 0.0
+                else None
+            ),
+        }
+
+    def get_snapshot(self) -> dict[str, Any]:
+        """Get the inputs and the result of the scheduling
+
+        The snapshot can be replayed offline with replay_snapshot()."""
+        # pylint: disable=import-outside-toplevel
+        # Snapshots are only taken for the diagnostics
+        from .helpers.replay import SNAPSHOT_VERSION, get_schedule_result
+
+        params = self.get_scheduling_params()
+        params["start_hour"] = params["start_hour"].isoformat()
+        params["ready_hour"] = params["ready_hour"].isoformat()
+        params["value_in_graph"] = None
+        params["unavailable_hours"] = None
+        if self.fleet is not None:
+            unavailable_hours = self.fleet.get_unavailable_hours(
+                self.config_entry.entry_id
+            )
+            if unavailable_hours is not None:
+                params["unavailable_hours"] = sorted(
+                    hour.isoformat() for hour in unavailable_hours
+                )
+        if self.price_statistics is not None and self.price_statistics.max is not None:
+            params["value_in_graph"] = self.price_statistics.max * 0.75
+
+        schedule = None
+        if self.scheduler.base_schedule_exists():
+            schedule = self.scheduler.schedule
+
+        return {
+            "version": SNAPSHOT_VERSION,
+            "time": dt.utcnow().isoformat(),
+            "time_zone": str(dt.DEFAULT_TIME_ZONE),
+            "prices": (
+                get_charging_stored(self.raw_two_days.get_raw())
+                if self.raw_two_days is not None
+                else []
+            ),
+            "inputs": {
+                "current_price": self.sensor.current_price if self.sensor else None,
+                "ev_soc": self.ev_soc,
+                "ev_target_soc": self.ev_target_soc,
+                "ev_soc_before_last_charging": self.ev_soc_before_last_charging,
+                "tomorrow_valid": self.tomorrow_valid,
+                "switches": {
+                    "active": self.switch_active,
+                    "apply_limit": self.switch_apply_limit,
+                    "continuous": self.switch_continuous,
+                    "ev_connected": self.switch_ev_connected,
+                    "keep_on": self.switch_keep_on,
+                    "opportunistic": self.switch_opportunistic,
+                },
+                "numbers": {
+                    "charging_pct_per_hour": self.charging_pct_per_hour,
+                    "max_price": self.max_price,
+                    "min_soc": self.number_min_soc,
+                    "opportunistic_level": self.number_opportunistic_level,
+                    "opportunistic_percentile": self.opportunistic_percentile,
+                },
+                "selects": {
+                    "start_hour": self.start_hour_local,
+                    "ready_hour": self.ready_hour_local,
+                },
+            },
+            "params": params,
+            "base_schedule": self.scheduler.get_stored_base_schedule(),
+            "result": get_schedule_result(self.scheduler, schedule, dt.utcnow())
+            | {
+                "auto_charging_state": self.auto_charging_state,
+                "status": (
+                    self.sensor_status.native_value if self.sensor_status else None
+                ),
+            },
+        }
+
+    def get_schedule_data(self) -> dict[str, Any]:
+        """Get the schedule and prices, in local time"""
+        return {
+            "schedule": self.sensor.charging_schedule if self.sensor else None,
+            "prices": self.sensor.raw_two_days_local if self.sensor else None,
+        }
+
+    @callback
+    def async_subscribe_schedule(
+        self, update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Listen for updates of the schedule and prices"""
+        self.schedule_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            if update_callback in self.schedule_listeners:
+                self.schedule_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def notify_schedule_listeners(self):
+        """Tell the listeners that the schedule or prices may have changed"""
+        for update_callback in list(self.schedule_listeners):
+            update_callback()
+
+    def record_startup_time(self, stage: str):
+        """Record the time from the creation of the coordinator to a startup stage"""
+        if self.startup_timing.get(stage) is None:
+            self.startup_timing[stage] = round(time.monotonic() - self.time_created, 4)
 
     def get_entity_id_from_unique_id(self, unique_id: str) -> str:
         """Get the Entity ID for the entity with the unique_id"""
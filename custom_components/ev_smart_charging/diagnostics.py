@@ -0,0 +1,25 @@
+"""Diagnostics support for EV Smart Charging."""
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_IMPORT_DURATION, DOMAIN, DOMAIN_DATA
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "startup_timing": {
+            "import": hass.data[DOMAIN_DATA].get(DATA_IMPORT_DURATION),
+            **coordinator.startup_timing,
+        },
+        "instrumentation": coordinator.instrumentation.as_dict(),
+        "snapshot": coordinator.get_snapshot(),
+        "fleet": coordinator.fleet.as_dict() if coordinator.fleet else None,
+        "charging_speed": coordinator.speed_estimator.as_dict(),
+        "soc_estimate": coordinator.soc_estimator.as_dict(),
+    }
@@ -18,7 +18,8 @@ class EVSmartChargingEntity(Entity):
 
     def update_ha_state(self):
         """Update the HA state"""
-        if self.entity_id is not None:
+        # Disabled entities get an entity_id, but are not added to hass
+        if self.entity_id is not None and self.hass is not None:
             self.async_schedule_update_ha_state()
 
     @property
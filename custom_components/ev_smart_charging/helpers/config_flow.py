@@ -12,11 +12,13 @@ from homeassistant.helpers.entity_registry import (
     RegistryEntry,
 )
 
+from custom_components.ev_smart_charging.helpers.coordinator import ChargingCurve
 from custom_components.ev_smart_charging.helpers.price_adaptor import PriceAdaptor
 
 # pylint: disable=relative-beyond-top-level
 from ..const import (
     CONF_CHARGER_ENTITY,
+    CONF_CHARGING_CURVE,
     CONF_EV_SOC_SENSOR,
     CONF_EV_TARGET_SOC_SENSOR,
     DOMAIN,
@@ -97,6 +99,13 @@ class FlowValidator:
                 user_input[CONF_CHARGER_ENTITY] = ""
                 return ("base", "charger_control_switch_not_switch")
 
+        # Validate the charging curve, only in the options
+        if CONF_CHARGING_CURVE in user_input:
+            try:
+                ChargingCurve.parse(user_input[CONF_CHARGING_CURVE])
+            except ValueError:
+                return ("base", "charging_curve_invalid")
+
         return None
 
 
@@ -205,28 +214,28 @@ class DeviceNameCreator:
     def create(hass: HomeAssistant) -> str:
         """Create device name"""
         device_registry: DeviceRegistry = async_device_registry_get(hass)
-        devices = device_registry.devices
-        # Find existing EV Smart Charging devices
-        ev_devices = []
-        for device in devices:
-            for item in devices[device].identifiers:
-                if item[0] == DOMAIN:
-                    ev_devices.append(device)
+        # Collect the names used by existing EV Smart Charging config entries
+        # and their devices. The devices are looked up by identifier, so
+        # devices from other integrations are never visited.
+        used_names = set()
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            used_names.add(entry.title)
+            device = device_registry.async_get_device({(DOMAIN, entry.entry_id)})
+            if device is not None:
+                used_names.add(device.name)
+                used_names.add(device.name_by_user)
         # If this is the first device. just return NAME
-        if len(ev_devices) == 0:
+        if NAME not in used_names:
             return NAME
-        # Find the highest number at the end of the name
-        higest = 1
-        for device in ev_devices:
-            device_name: str = devices[device].name
-            if device_name == NAME:
-                pass
-            else:
+        # Find the lowest free number to append after NAME
+        used_numbers = set()
+        for name in used_names:
+            if name is not None and name.startswith(f"{NAME} "):
                 try:
-                    device_number = int(device_name[len(NAME) :])
-                    if device_number > higest:
-                        higest = device_number
+                    used_numbers.add(int(name[len(NAME) :]))
                 except ValueError:
                     pass
-        # Add ONE to the highest value and append after NAME
-        return f"{NAME} {higest+1}"
+        number = 2
+        while number in used_numbers:
+            number = number + 1
+        return f"{NAME} {number}"
@@ -1,9 +1,12 @@
 """Helpers for coordinator"""
 
+from bisect import bisect_right
 from copy import deepcopy
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate
 import logging
-from math import ceil
+from math import ceil, floor, inf
 from typing import Any
 from homeassistant.util import dt
 
@@ -82,6 +85,7 @@ class Raw:
         self, raw: list[dict[str, Any]], platform: str = PLATFORM_NORDPOOL
     ) -> None:
         self.data = []
+        self.statistics: PriceStatistics = None
         if raw:
             for item in raw:
                 item_new = convert_raw_item(item, platform)
@@ -108,8 +112,15 @@ class Raw:
         """Extend raw data with data from raw2."""
         if self.valid and raw2 is not None and raw2.is_valid():
             self.data.extend(raw2.get_raw())
+            self.statistics = None
         return self
 
+    def get_statistics(self) -> "PriceStatistics":
+        """Get the price statistics, calculated once until the data is extended"""
+        if self.statistics is None:
+            self.statistics = PriceStatistics(self)
+        return self.statistics
+
     def max_value(self) -> float:
         """Return the largest value"""
         largest = None
@@ -165,23 +176,158 @@ class Raw:
         return self
 
 
+class PriceStatistics:
+    """Statistics of the prices, calculated once per price update"""
+
+    def __init__(self, raw: Raw) -> None:
+        values = [item["value"] for item in raw.get_raw()]
+        self.count = len(values)
+        self.sorted_values = sorted(values)
+        # cumulative[i] is the sum of the first i prices
+        self.cumulative = list(accumulate(values, initial=0.0))
+        if self.count > 0:
+            self.min = self.sorted_values[0]
+            self.max = self.sorted_values[-1]
+            self.mean = self.cumulative[-1] / self.count
+            self.last = values[-1]
+        else:
+            self.min = None
+            self.max = None
+            self.mean = None
+            self.last = None
+
+    def percentile(self, pct: float) -> float:
+        """Return the percentile of the prices, with linear interpolation"""
+        if self.count == 0:
+            return None
+        position = (self.count - 1) * min(max(pct, 0.0), 100.0) / 100.0
+        lower = self.sorted_values[floor(position)]
+        upper = self.sorted_values[ceil(position)]
+        return lower + (upper - lower) * (position - floor(position))
+
+    def count_within_limit(self, max_price: float) -> int:
+        """Return the number of prices not above max_price"""
+        return bisect_right(self.sorted_values, max_price)
+
+    def window_sum(self, start: int, length: int) -> float:
+        """Return the sum of length prices, starting at index start"""
+        return self.cumulative[start + length] - self.cumulative[start]
+
+    def window_mean(self, start: int, length: int) -> float:
+        """Return the mean of length prices, starting at index start"""
+        return self.window_sum(start, length) / length
+
+
+def get_compact(
+    items: list[dict[str, Any]], run_length: bool = False
+) -> dict[str, Any]:
+    """Encode items as a start time, a slot width and an array of values
+
+    With run_length, the values are given as an array of values and an array
+    of the number of times each value is repeated.
+    Return None if the items are not contiguous slots of equal width."""
+
+    if not items:
+        return None
+
+    width = dt.as_utc(items[0]["end"]) - dt.as_utc(items[0]["start"])
+    previous_end = dt.as_utc(items[0]["start"])
+    values = []
+    for item in items:
+        start = dt.as_utc(item["start"])
+        end = dt.as_utc(item["end"])
+        if start != previous_end or end - start != width:
+            return None
+        previous_end = end
+        values.append(item["value"])
+
+    result = {
+        "start": items[0]["start"],
+        "width": int(width.total_seconds()),
+    }
+    if not run_length:
+        result["values"] = values
+        return result
+
+    run_values = []
+    run_counts = []
+    for value in values:
+        if run_values and run_values[-1] == value:
+            run_counts[-1] = run_counts[-1] + 1
+        else:
+            run_values.append(value)
+            run_counts.append(1)
+    result["values"] = run_values
+    result["counts"] = run_counts
+    return result
+
+
+def get_delta(
+    previous: list[dict[str, Any]], current: list[dict[str, Any]]
+) -> dict[str, Any]:
+    """Get the items that have changed since the previous list
+
+    Items are identified by their start time. Return None if nothing changed."""
+
+    previous_items = {item["start"]: item for item in previous or []}
+    changed = []
+    for item in current or []:
+        if previous_items.pop(item["start"], None) != item:
+            changed.append(item)
+    removed = list(previous_items)
+
+    if not changed and not removed:
+        return None
+    return {"changed": changed, "removed": removed}
+
+
 def get_lowest_hours(
     start_hour: datetime,
     ready_hour: datetime,
     continuous: bool,
     raw_two_days: Raw,
     hours: int,
+    time_now: datetime = None,
+    unavailable_hours: set[datetime] = None,
+    max_blocks: int = 0,
+    block_penalty: float = 0.0,
 ) -> list:
-    """From the two-day prices, calculate the cheapest set of hours"""
+    """From the two-day prices, calculate the cheapest set of hours
+
+    time_now is the current time, dt.utcnow() if not given. Hours with a start
+    time in unavailable_hours are not used. For non-continuous charging,
+    max_blocks limits the number of continuous blocks, 0 for no limit, and
+    block_penalty is added to the cost of each block."""
 
     if continuous:
-        return get_lowest_hours_continuous(start_hour, ready_hour, raw_two_days, hours)
+        return get_lowest_hours_continuous(
+            start_hour, ready_hour, raw_two_days, hours, time_now, unavailable_hours
+        )
 
-    return get_lowest_hours_non_continuous(start_hour, ready_hour, raw_two_days, hours)
+    if max_blocks > 0 or block_penalty > 0.0:
+        return get_lowest_hours_blocks(
+            start_hour,
+            ready_hour,
+            raw_two_days,
+            hours,
+            max_blocks,
+            block_penalty,
+            time_now,
+            unavailable_hours,
+        )
+
+    return get_lowest_hours_non_continuous(
+        start_hour, ready_hour, raw_two_days, hours, time_now, unavailable_hours
+    )
 
 
 def get_lowest_hours_non_continuous(
-    start_hour: datetime, ready_hour: datetime, raw_two_days: Raw, hours: int
+    start_hour: datetime,
+    ready_hour: datetime,
+    raw_two_days: Raw,
+    hours: int,
+    time_now: datetime = None,
+    unavailable_hours: set[datetime] = None,
 ) -> list:
     """From the two-day prices, calculate the cheapest non-continues set of hours
 
@@ -195,19 +341,32 @@ def get_lowest_hours_non_continuous(
     price = []
     for item in raw_two_days.get_raw():
         price.append(item["value"])
-    time_start = dt.utcnow()
+    time_start = time_now or dt.utcnow()
     if start_hour > time_start:
         time_start = start_hour
     time_end = ready_hour
     time_start_index = None
     time_end_index = None
-    for index in range(len(price)):
-        item = raw_two_days.get_raw()[index]
+    for index, item in enumerate(raw_two_days.get_raw()):
         if item["end"] > time_start and time_start_index is None:
             time_start_index = index
         if item["start"] < time_end:
             time_end_index = index
 
+    if time_start_index is None or time_end_index is None:
+        # No price slot left before the ready hour
+        return []
+
+    if unavailable_hours:
+        available = [
+            index
+            for index in range(time_start_index, time_end_index + 1)
+            if raw_two_days.get_raw()[index]["start"] not in unavailable_hours
+        ]
+        if len(available) <= hours:
+            return available
+        return sorted(sorted(available, key=price.__getitem__)[0:hours])
+
     if (time_end_index - time_start_index) < hours:
         return list(range(time_start_index, time_end_index + 1))
 
@@ -219,23 +378,26 @@ def get_lowest_hours_non_continuous(
 
 
 def get_lowest_hours_continuous(
-    start_hour: datetime, ready_hour: datetime, raw_two_days: Raw, hours: int
+    start_hour: datetime,
+    ready_hour: datetime,
+    raw_two_days: Raw,
+    hours: int,
+    time_now: datetime = None,
+    unavailable_hours: set[datetime] = None,
 ) -> list:
     """From the two-day prices, calculate the cheapest continues set of hours
 
-    A continues range of hours will be choosen."""
+    A continues range of hours will be choosen. If unavailable hours leave no
+    such range, the cheapest available hours are used."""
 
     _LOGGER.debug("ready_hour = %s", ready_hour)
 
     if hours == 0:
         return []
 
-    price = []
-    for item in raw_two_days.get_raw():
-        price.append(item["value"])
     lowest_index = None
     lowest_price = None
-    time_start = dt.utcnow()
+    time_start = time_now or dt.utcnow()
     if start_hour > time_start:
         time_start = start_hour
     time_end = ready_hour
@@ -244,30 +406,172 @@ def get_lowest_hours_continuous(
     # ) + timedelta(days=1)
     time_start_index = None
     time_end_index = None
-    for index in range(len(price)):
-        item = raw_two_days.get_raw()[index]
+    for index, item in enumerate(raw_two_days.get_raw()):
         if item["end"] > time_start and time_start_index is None:
             time_start_index = index
         if item["start"] < time_end:
             time_end_index = index
 
-    if (time_end_index - time_start_index) < hours:
+    if time_start_index is None or time_end_index is None:
+        # No price slot left before the ready hour
+        return []
+
+    if (time_end_index - time_start_index) < hours and not unavailable_hours:
         return list(range(time_start_index, time_end_index + 1))
 
+    statistics = raw_two_days.get_statistics()
     for index in range(time_start_index, time_end_index - hours + 2):
+        if unavailable_hours and any(
+            item["start"] in unavailable_hours
+            for item in raw_two_days.get_raw()[index : index + hours]
+        ):
+            continue
         if lowest_index is None:
             lowest_index = index
-            lowest_price = sum(price[index : (index + hours)])
+            lowest_price = statistics.window_sum(index, hours)
             continue
-        new_price = sum(price[index : (index + hours)])
+        new_price = statistics.window_sum(index, hours)
         if new_price < lowest_price:
             lowest_index = index
             lowest_price = new_price
 
+    if lowest_index is None:
+        return get_lowest_hours_non_continuous(
+            start_hour, ready_hour, raw_two_days, hours, time_now, unavailable_hours
+        )
+
     res = list(range(lowest_index, lowest_index + hours))
     return res
 
 
+def get_lowest_hours_blocks(
+    start_hour: datetime,
+    ready_hour: datetime,
+    raw_two_days: Raw,
+    hours: int,
+    max_blocks: int,
+    block_penalty: float,
+    time_now: datetime = None,
+    unavailable_hours: set[datetime] = None,
+) -> list:
+    """From the two-day prices, calculate the cheapest set of hours in few blocks
+
+    At most max_blocks continuous blocks are used, 0 for no limit, and
+    block_penalty is added to the cost of each block. If the hours don't fit
+    in max_blocks blocks, the cheapest non-continuous hours are used."""
+
+    if hours == 0:
+        return []
+
+    raw = raw_two_days.get_raw()
+    time_start = time_now or dt.utcnow()
+    if start_hour > time_start:
+        time_start = start_hour
+    time_start_index = None
+    time_end_index = None
+    for index, item in enumerate(raw):
+        if item["end"] > time_start and time_start_index is None:
+            time_start_index = index
+        if item["start"] < ready_hour:
+            time_end_index = index
+
+    if time_start_index is None or time_end_index is None:
+        # No price slot left before the ready hour
+        return []
+
+    prices = [
+        None
+        if unavailable_hours and item["start"] in unavailable_hours
+        else item["value"]
+        for item in raw[time_start_index : time_end_index + 1]
+    ]
+    if sum(1 for price in prices if price is not None) <= hours:
+        return [
+            index + time_start_index
+            for index, price in enumerate(prices)
+            if price is not None
+        ]
+
+    selected = get_cheapest_blocks(prices, hours, max_blocks, block_penalty)
+    if selected is None:
+        return get_lowest_hours_non_continuous(
+            start_hour, ready_hour, raw_two_days, hours, time_now, unavailable_hours
+        )
+    return [index + time_start_index for index in selected]
+
+
+def get_cheapest_blocks(
+    prices: list[float], hours: int, max_blocks: int, block_penalty: float
+) -> list[int]:
+    """Get the indexes of the cheapest hours, counting block_penalty per block
+
+    Prices that are None can't be used. At most max_blocks blocks are used,
+    0 for no limit. Returns None if the hours don't fit.
+
+    Dynamic programming over the prices. The state is the number of used
+    hours, the number of blocks and if the previous hour is used, so the
+    time is O(len(prices) * hours * max_blocks)."""
+
+    limit_blocks = max_blocks > 0
+    # state (used hours, blocks, previous hour used) -> cost
+    costs = {(0, 0, False): 0.0}
+    # For each hour, state -> (previous state, hour used)
+    steps = []
+    for index, price in enumerate(prices):
+        remaining = len(prices) - index - 1
+        new_costs = {}
+        step = {}
+        for state, cost in costs.items():
+            used, blocks, on = state
+            # Don't use the hour
+            new_state = (used, blocks, False)
+            if used + remaining >= hours and cost < new_costs.get(new_state, inf):
+                new_costs[new_state] = cost
+                step[new_state] = (state, False)
+            # Use the hour
+            if price is None or used == hours:
+                continue
+            new_cost = cost + price
+            new_blocks = blocks
+            if not on:
+                new_cost = new_cost + block_penalty
+                if limit_blocks:
+                    new_blocks = blocks + 1
+                    if new_blocks > max_blocks:
+                        continue
+            new_state = (used + 1, new_blocks, True)
+            if new_cost < new_costs.get(new_state, inf):
+                new_costs[new_state] = new_cost
+                step[new_state] = (state, True)
+        costs = new_costs
+        steps.append(step)
+
+    final = [(cost, state) for state, cost in costs.items() if state[0] == hours]
+    if not final:
+        return None
+    state = min(final)[1]
+    selected = []
+    for index in range(len(prices) - 1, -1, -1):
+        state, used = steps[index][state]
+        if used:
+            selected.append(index)
+    return selected[::-1]
+
+
+def get_asap_prices(
+    start_hour: datetime, raw_two_days: Raw, hours: int, time_now: datetime = None
+) -> list:
+    """Get the prices of the hours used if charging starts as soon as possible"""
+
+    time_start = time_now or dt.utcnow()
+    if start_hour > time_start:
+        time_start = start_hour
+    raw = raw_two_days.get_raw()
+    # bisect has no key argument before Python 3.10
+    start_index = bisect_right([item["end"] for item in raw], time_start)
+    return [item["value"] for item in raw[start_index : start_index + hours]]
+
+
 def get_charging_original(lowest_hours: list[int], raw_two_days: Raw) -> list:
     """Calculate charging information"""
 
@@ -283,6 +587,52 @@ def get_charging_original(lowest_hours: list[int], raw_two_days: Raw) -> list:
     return result
 
 
+def get_charging_restored(
+    stored: list[dict[str, Any]], raw_two_days: Raw, time_now: datetime = None
+) -> list:
+    """Map a stored charging schedule onto the current prices
+
+    Return None if the remaining charging hours don't match the current prices."""
+
+    time_now = time_now or dt.utcnow()
+    charging_items = {}
+    for item in stored:
+        if item["value"] is not None:
+            charging_items[dt.parse_datetime(item["start"])] = item
+
+    result = []
+    for item in raw_two_days.get_raw():
+        new_item = deepcopy(item)
+        stored_item = charging_items.pop(item["start"], None)
+        if stored_item is None:
+            new_item["value"] = None
+        elif stored_item["value"] != item["value"] and item["end"] > time_now:
+            return None
+        result.append(new_item)
+
+    # Charging hours that are not part of the current prices
+    for item in charging_items.values():
+        if dt.parse_datetime(item["end"]) > time_now:
+            return None
+
+    return result
+
+
+def get_charging_stored(charging_original: list) -> list[dict[str, Any]]:
+    """Convert charging information to a format that can be stored"""
+
+    result = []
+    for item in charging_original:
+        result.append(
+            {
+                "start": item["start"].isoformat(),
+                "end": item["end"].isoformat(),
+                "value": item["value"],
+            }
+        )
+    return result
+
+
 def get_charging_update(
     charging_original: list,
     active: bool,
@@ -306,19 +656,191 @@ def get_charging_update(
     return result
 
 
+class ChargingCurve:
+    """Charging speed that depends on the SOC
+
+    Below the first breakpoint, the charging speed is charging_pct_per_hour.
+    From each breakpoint [soc, pct_per_hour], the speed of the breakpoint is
+    used. The hours needed to reach the start of each segment are precomputed,
+    so the hours between two SOCs are found with a binary search."""
+
+    def __init__(
+        self, charging_pct_per_hour: float, breakpoints: list[list[float]]
+    ) -> None:
+        self.starts = [0.0]
+        self.speeds = [charging_pct_per_hour]
+        for soc, speed in sorted(breakpoints):
+            if soc <= self.starts[-1]:
+                self.speeds[-1] = speed
+            else:
+                self.starts.append(soc)
+                self.speeds.append(speed)
+        self.hours = [0.0]
+        for index in range(1, len(self.starts)):
+            self.hours.append(
+                self.hours[-1]
+                + (self.starts[index] - self.starts[index - 1]) / self.speeds[index - 1]
+            )
+
+    def get_speed(self, soc: float) -> float:
+        """Get the charging speed at soc, in % per hour"""
+        return self.speeds[bisect_right(self.starts, soc) - 1]
+
+    def get_hours_from_zero(self, soc: float) -> float:
+        """Get the hours needed to charge from 0% to soc"""
+        index = bisect_right(self.starts, soc) - 1
+        return self.hours[index] + (soc - self.starts[index]) / self.speeds[index]
+
+    def get_soc(self, ev_soc: float, hours: float) -> float:
+        """Get the SOC after charging from ev_soc during hours, at most 100"""
+        hours_from_zero = self.get_hours_from_zero(min(max(ev_soc, 0.0), 100.0)) + hours
+        index = bisect_right(self.hours, hours_from_zero) - 1
+        soc = (
+            self.starts[index]
+            + (hours_from_zero - self.hours[index]) * self.speeds[index]
+        )
+        return min(round(soc, 6), 100.0)
+
+    def get_hours(self, ev_soc: float, ev_target_soc: float) -> float:
+        """Get the hours needed to charge from ev_soc to ev_target_soc"""
+        ev_soc = min(max(ev_soc, 0.0), 100.0)
+        ev_target_soc = min(max(ev_target_soc, 0.0), 100.0)
+        # Rounded, so that the boundaries of the segments give whole hours
+        return round(
+            max(
+                self.get_hours_from_zero(ev_target_soc)
+                - self.get_hours_from_zero(ev_soc),
+                0.0,
+            ),
+            6,
+        )
+
+    @staticmethod
+    def parse(text: str) -> list[list[float]]:
+        """Parse breakpoints written as "soc:pct_per_hour, ...", like "80:3, 90:1.5"
+
+        Raises ValueError if the text is not valid."""
+
+        breakpoints = []
+        for part in text.replace(";", ",").split(","):
+            if not part.strip():
+                continue
+            soc, speed = (float(value) for value in part.split(":"))
+            if not 0.0 <= soc <= 100.0 or speed <= 0.0:
+                raise ValueError(f"Invalid charging curve breakpoint: {part}")
+            breakpoints.append([soc, speed])
+        return sorted(breakpoints)
+
+
+@lru_cache(maxsize=32)
+def get_cached_charging_curve(
+    charging_pct_per_hour: float, breakpoints: tuple[tuple[float, float], ...]
+) -> ChargingCurve:
+    """Get a charging curve, reused while the speeds are unchanged"""
+    return ChargingCurve(charging_pct_per_hour, [list(item) for item in breakpoints])
+
+
+def get_charging_time(
+    ev_soc: float,
+    ev_target_soc: float,
+    charing_pct_per_hour: float,
+    charging_curve: list[list[float]] = None,
+) -> float:
+    """Calculate the charging time in hours, at most 24"""
+    if charging_curve:
+        charging_time = get_cached_charging_curve(
+            charing_pct_per_hour, tuple(tuple(item) for item in charging_curve)
+        ).get_hours(ev_soc, ev_target_soc)
+    else:
+        charging_time = (ev_target_soc - ev_soc) / charing_pct_per_hour
+    return min(max(charging_time, 0), 24)
+
+
 def get_charging_hours(
-    ev_soc: float, ev_target_soc: float, charing_pct_per_hour: float
+    ev_soc: float,
+    ev_target_soc: float,
+    charing_pct_per_hour: float,
+    charging_curve: list[list[float]] = None,
 ) -> int:
     """Calculate the number of charging hours"""
     charging_hours = ceil(
-        min(max(((ev_target_soc - ev_soc) / charing_pct_per_hour), 0), 24)
+        get_charging_time(ev_soc, ev_target_soc, charing_pct_per_hour, charging_curve)
     )
     return charging_hours
 
 
-def get_charging_value(charging):
-    """Get value for charging now"""
-    time_now = dt.now()
+def get_charging_fraction(
+    ev_soc: float,
+    ev_target_soc: float,
+    charing_pct_per_hour: float,
+    charging_curve: list[list[float]] = None,
+) -> float:
+    """Calculate the part of the last charging hour that is needed"""
+    charging_hours = get_charging_time(
+        ev_soc, ev_target_soc, charing_pct_per_hour, charging_curve
+    )
+    if charging_hours == 0:
+        return 1.0
+    return charging_hours - (ceil(charging_hours) - 1)
+
+
+def get_partial_hour(
+    schedule: list, schedule_prices: list, fraction: float
+) -> dict[str, Any]:
+    """Get the charging hour that is only partly used, or None
+
+    The partial hour is the most expensive hour at the start or the end of a
+    charging block, so that no block is split. At the end of a block, or in a
+    single hour, charging stops early. At the start of a block, it starts
+    late. The minutes are rounded up."""
+
+    minutes = ceil(round(fraction * 60, 6))
+    if minutes >= 60 or schedule is None:
+        return None
+
+    def is_charging(index: int) -> bool:
+        return 0 <= index < len(schedule) and schedule[index]["value"] != 0.0
+
+    partial = None
+    partial_price = None
+    for index, item in enumerate(schedule):
+        if not is_charging(index):
+            continue
+        charging_before = (
+            is_charging(index - 1) and schedule[index - 1]["end"] == item["start"]
+        )
+        charging_after = (
+            is_charging(index + 1) and schedule[index + 1]["start"] == item["end"]
+        )
+        if charging_before and charging_after:
+            continue
+        price = schedule_prices[index]["value"]
+        if partial_price is not None and price < partial_price:
+            continue
+        partial_price = price
+        if charging_after:
+            # Start of a block
+            partial = {
+                "start": item["start"],
+                "end": item["end"],
+                "on": item["end"] - timedelta(minutes=minutes),
+                "off": item["end"],
+            }
+        else:
+            partial = {
+                "start": item["start"],
+                "end": item["end"],
+                "on": item["start"],
+                "off": item["start"] + timedelta(minutes=minutes),
+            }
+    if partial is not None:
+        partial["minutes"] = minutes
+    return partial
+
+
+def get_charging_value(charging, time_now: datetime = None):
+    """Get value for charging now, or at time_now"""
+    time_now = time_now or dt.now()
     for item in charging:
         if item["start"] <= time_now < item["end"]:
             return item["value"]
@@ -365,17 +887,122 @@ def get_start_hour_utc(start_hour_local: int, ready_hour_local: int) -> datetime
     return dt.as_utc(time_local)
 
 
+def get_solved_fraction(
+    params: dict[str, Any], soc: float, lowest_hours: list, charging_hours: int
+) -> float:
+    """Get the part of the last hour that is needed, if all hours were found"""
+    if not params.get("fractional_hours") or len(lowest_hours) != charging_hours:
+        return 1.0
+    return get_charging_fraction(
+        params["ev_soc"],
+        soc,
+        params["charging_pct_per_hour"],
+        params.get("charging_curve"),
+    )
+
+
+def solve_base_schedule(params: dict[str, Any], raw_two_days: Raw) -> dict[str, Any]:
+    """Solve the base schedules, without changing any Scheduler
+
+    Safe to run in the executor. Returns None if the parameters are missing."""
+
+    if (
+        "ev_soc" not in params
+        or "ev_target_soc" not in params
+        or "min_soc" not in params
+    ):
+        return None
+
+    charging_hours: int = get_charging_hours(
+        params["ev_soc"],
+        params["ev_target_soc"],
+        params["charging_pct_per_hour"],
+        params.get("charging_curve"),
+    )
+    _LOGGER.debug("charging_hours = %s", charging_hours)
+    lowest_hours = get_lowest_hours(
+        params["start_hour"],
+        params["ready_hour"],
+        params["switch_continuous"],
+        raw_two_days,
+        charging_hours,
+        params.get("time_now"),
+        params.get("unavailable_hours"),
+        params.get("max_charging_blocks", 0),
+        params.get("charging_block_penalty", 0.0),
+    )
+    _LOGGER.debug("lowest_hours = %s", lowest_hours)
+    solution = {
+        "schedule_base": get_charging_original(lowest_hours, raw_two_days),
+        "fraction": get_solved_fraction(
+            params, params["ev_target_soc"], lowest_hours, charging_hours
+        ),
+        "schedule_base_min_soc": [],
+        "fraction_min_soc": 1.0,
+        "asap_prices": get_asap_prices(
+            params["start_hour"], raw_two_days, charging_hours, params.get("time_now")
+        ),
+    }
+
+    if params["min_soc"] == 0.0:
+        return solution
+
+    charging_hours: int = get_charging_hours(
+        params["ev_soc"],
+        params["min_soc"],
+        params["charging_pct_per_hour"],
+        params.get("charging_curve"),
+    )
+    _LOGGER.debug("charging_hours_min_soc = %s", charging_hours)
+    lowest_hours = get_lowest_hours(
+        params["start_hour"],
+        params["ready_hour"],
+        params["switch_continuous"],
+        raw_two_days,
+        charging_hours,
+        params.get("time_now"),
+        params.get("unavailable_hours"),
+        params.get("max_charging_blocks", 0),
+        params.get("charging_block_penalty", 0.0),
+    )
+    _LOGGER.debug("lowest_hours_min_soc = %s", lowest_hours)
+    solution["schedule_base_min_soc"] = get_charging_original(
+        lowest_hours, raw_two_days
+    )
+    solution["fraction_min_soc"] = get_solved_fraction(
+        params, params["min_soc"], lowest_hours, charging_hours
+    )
+    if charging_hours > len(solution["asap_prices"]):
+        solution["asap_prices"] = get_asap_prices(
+            params["start_hour"],
+            raw_two_days,
+            charging_hours,
+            params.get("time_now"),
+        )
+    return solution
+
+
 class Scheduler:
     """Class to handle charging schedules"""
 
     def __init__(self) -> None:
         self.schedule_base = []
         self.schedule_base_min_soc = []
+        # Part of the last hour that is needed, 1.0 to use whole hours
+        self.fraction = 1.0
+        self.fraction_min_soc = 1.0
         self.schedule = None
+        self.schedule_prices = None
+        self.partial_hour = None
+        self.asap_prices = []
         self.charging_is_planned = False
         self.charging_start_time = None
         self.charging_stop_time = None
         self.charging_number_of_hours = 0
+        self.charging_blocks = []
+        self.charging_cost = None
+        self.charging_average_price = None
+        self.charging_savings = None
 
     def create_base_schedule(
         self,
@@ -383,54 +1010,67 @@ class Scheduler:
         raw_two_days: Raw,
     ) -> None:
         """Create the base schedule"""
+        self.set_base_schedule(solve_base_schedule(params, raw_two_days))
 
-        if (
-            "ev_soc" not in params
-            or "ev_target_soc" not in params
-            or "min_soc" not in params
-        ):
+    def set_base_schedule(self, solution: dict[str, Any]) -> None:
+        """Set the base schedule from a solution of solve_base_schedule()"""
+        if solution is None:
             return
+        self.schedule_base = solution["schedule_base"]
+        self.schedule_base_min_soc = solution["schedule_base_min_soc"]
+        self.fraction = solution["fraction"]
+        self.fraction_min_soc = solution["fraction_min_soc"]
+        self.asap_prices = solution["asap_prices"]
+
+    def get_stored_base_schedule(self) -> dict[str, Any]:
+        """Get the base schedules in a format that can be stored"""
+        return {
+            "schedule_base": get_charging_stored(self.schedule_base),
+            "schedule_base_min_soc": get_charging_stored(self.schedule_base_min_soc),
+            "fraction": self.fraction,
+            "fraction_min_soc": self.fraction_min_soc,
+            "asap_prices": self.asap_prices,
+        }
 
-        charging_hours: int = get_charging_hours(
-            params["ev_soc"],
-            params["ev_target_soc"],
-            params["charging_pct_per_hour"],
-        )
-        _LOGGER.debug("charging_hours = %s", charging_hours)
-        lowest_hours = get_lowest_hours(
-            params["start_hour"],
-            params["ready_hour"],
-            params["switch_continuous"],
-            raw_two_days,
-            charging_hours,
-        )
-        _LOGGER.debug("lowest_hours = %s", lowest_hours)
-        self.schedule_base = get_charging_original(lowest_hours, raw_two_days)
-
-        if params["min_soc"] == 0.0:
-            self.schedule_base_min_soc = []
-            return
+    def restore_base_schedule(
+        self, stored: dict[str, Any], raw_two_days: Raw, time_now: datetime = None
+    ) -> bool:
+        """Restore stored base schedules, if they match the current prices"""
 
-        charging_hours: int = get_charging_hours(
-            params["ev_soc"],
-            params["min_soc"],
-            params["charging_pct_per_hour"],
-        )
-        _LOGGER.debug("charging_hours_min_soc = %s", charging_hours)
-        lowest_hours = get_lowest_hours(
-            params["start_hour"],
-            params["ready_hour"],
-            params["switch_continuous"],
-            raw_two_days,
-            charging_hours,
+        if not stored.get("schedule_base"):
+            return False
+        schedule_base = get_charging_restored(
+            stored["schedule_base"], raw_two_days, time_now
         )
-        _LOGGER.debug("lowest_hours_min_soc = %s", lowest_hours)
-        self.schedule_base_min_soc = get_charging_original(lowest_hours, raw_two_days)
+        if schedule_base is None:
+            return False
+        schedule_base_min_soc = []
+        if stored.get("schedule_base_min_soc"):
+            schedule_base_min_soc = get_charging_restored(
+                stored["schedule_base_min_soc"], raw_two_days, time_now
+            )
+            if schedule_base_min_soc is None:
+                return False
+
+        self.schedule_base = schedule_base
+        self.schedule_base_min_soc = schedule_base_min_soc
+        self.fraction = stored.get("fraction", 1.0)
+        self.fraction_min_soc = stored.get("fraction_min_soc", 1.0)
+        self.asap_prices = stored.get("asap_prices", [])
+        return True
 
     def base_schedule_exists(self) -> bool:
         """Return true if base schedule exists"""
         return len(self.schedule_base) > 0
 
+    def get_base_schedule_hours(self) -> set[datetime]:
+        """Get the start times of the hours used by the base schedules"""
+        return {
+            item["start"]
+            for item in self.schedule_base + self.schedule_base_min_soc
+            if item["value"] is not None
+        }
+
     def get_schedule(self, params: dict[str, Any]) -> list:
         """Calculate the schedule"""
 
@@ -466,33 +1106,82 @@ class Scheduler:
         ):
             _LOGGER.debug("Use schedule_min_soc")
             self.schedule = schedule_min_soc
+            self.schedule_prices = self.schedule_base_min_soc
+            self.partial_hour = self.calc_partial_hour(self.fraction_min_soc)
             self.calc_schedule_summary()
             return self.schedule
 
         _LOGGER.debug("Use schedule")
         self.schedule = schedule
+        self.schedule_prices = self.schedule_base
+        self.partial_hour = self.calc_partial_hour(self.fraction)
         self.calc_schedule_summary()
         return self.schedule
 
+    def calc_partial_hour(self, fraction: float) -> dict[str, Any]:
+        """Calculate the partly used hour, if no hours were removed by the price
+        limit"""
+        if fraction >= 1.0 or Raw(self.schedule).number_of_nonzero() != sum(
+            1 for item in self.schedule_prices if item["value"] is not None
+        ):
+            return None
+        return get_partial_hour(self.schedule, self.schedule_prices, fraction)
+
     def calc_schedule_summary(self):
         """Calculate summary of schedule"""
 
         number_of_hours = 0
         first_start = None
         last_stop = None
+        blocks = []
+        cost = 0.0
+        # Hours charged, with the partly used hour
+        hours_used = 0.0
+        partial_hour = self.partial_hour if self.schedule is not None else None
         if self.schedule is not None:
-            for item in self.schedule:
+            for index, item in enumerate(self.schedule):
                 if item["value"] != 0.0:
+                    start = item["start"]
+                    end = item["end"]
+                    used = 1.0
+                    if partial_hour is not None and start == partial_hour["start"]:
+                        start = partial_hour["on"]
+                        end = partial_hour["off"]
+                        used = partial_hour["minutes"] / 60
                     number_of_hours = number_of_hours + 1
-                    last_stop = dt.as_local(item["end"])
+                    hours_used = hours_used + used
+                    cost = cost + self.schedule_prices[index]["value"] * used
+                    if blocks and blocks[-1]["end"] == start:
+                        blocks[-1]["end"] = end
+                    else:
+                        blocks.append({"start": start, "end": end})
+                    last_stop = dt.as_local(end)
                     if first_start is None:
-                        first_start = dt.as_local(item["start"])
+                        first_start = dt.as_local(start)
 
+        self.charging_blocks = [
+            {"start": dt.as_local(block["start"]), "end": dt.as_local(block["end"])}
+            for block in blocks
+        ]
         self.charging_is_planned = number_of_hours != 0
         self.charging_number_of_hours = number_of_hours
         self.charging_start_time = first_start
         self.charging_stop_time = last_stop
 
+        self.charging_cost = None
+        self.charging_average_price = None
+        self.charging_savings = None
+        if number_of_hours != 0:
+            self.charging_cost = cost
+            self.charging_average_price = cost / hours_used
+            # Compared with charging the same number of hours as soon as possible
+            if len(self.asap_prices) >= number_of_hours:
+                asap_cost = sum(self.asap_prices[: number_of_hours - 1])
+                asap_cost = asap_cost + self.asap_prices[number_of_hours - 1] * (
+                    hours_used - (number_of_hours - 1)
+                )
+                self.charging_savings = asap_cost - cost
+
     def get_charging_is_planned(self):
         """Get charging_is_planned"""
         return self.charging_is_planned
@@ -509,11 +1198,33 @@ class Scheduler:
         """Get charging_number_of_hours"""
         return self.charging_number_of_hours
 
+    def get_partial_hour(self) -> dict[str, Any]:
+        """Get the partly used hour, with the times when charging is on"""
+        return self.partial_hour
+
+    def get_charging_blocks(self) -> list[dict[str, datetime]]:
+        """Get the continuous periods of planned charging, in local time"""
+        return self.charging_blocks
+
+    def get_charging_cost(self) -> float:
+        """Get the sum of the prices of the planned charging hours"""
+        return self.charging_cost
+
+    def get_charging_average_price(self) -> float:
+        """Get the average price of the planned charging hours"""
+        return self.charging_average_price
+
+    def get_charging_savings(self) -> float:
+        """Get the cost saved compared with charging as soon as possible"""
+        return self.charging_savings
+
     def set_empty_schedule(self):
         """Create an empty schedule"""
         self.schedule_base = []
         self.schedule_base_min_soc = []
         self.schedule = None
+        self.partial_hour = None
+        self.asap_prices = []
         self.calc_schedule_summary()
 
     @staticmethod
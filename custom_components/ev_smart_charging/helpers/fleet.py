@@ -0,0 +1,239 @@
+"""Fleet scheduling of several EVs sharing the power of one site"""
+
+from datetime import datetime
+import logging
+from typing import Any, Callable
+
+from homeassistant.util import dt
+
+from .coordinator import Raw, Scheduler, get_charging_hours
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_window_length(params: dict[str, Any], raw_two_days: Raw) -> int:
+    """Get the number of hours from now, or start_hour, to ready_hour"""
+    time_start = max(params.get("time_now") or dt.utcnow(), params["start_hour"])
+    return sum(
+        1
+        for item in raw_two_days.get_raw()
+        if item["end"] > time_start and item["start"] < params["ready_hour"]
+    )
+
+
+class FleetVehicle:
+    """One config entry in the fleet"""
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        power: float,
+        site_power_limit: float,
+        replanned: Callable[[], None],
+    ) -> None:
+        self.scheduler = scheduler
+        self.power = power
+        self.site_power_limit = site_power_limit
+        self.replanned = replanned
+        self.params: dict[str, Any] = None
+        self.raw_two_days: Raw = None
+        self.changed = False
+        # The base schedule was restored, and is kept at the next solve
+        self.restored = False
+        # Place in the planning order, fixed while the vehicle has a demand
+        self.order: tuple = None
+        self.unavailable_hours: frozenset[datetime] = None
+        self.hours: set[datetime] = set()
+
+    def get_priority(self, vehicle_id: str) -> tuple:
+        """Get the order in which the vehicles are planned
+
+        Vehicles below the minimum SOC come first, then the vehicles with the
+        least spare time before the ready hour."""
+        below_min_soc = self.params["ev_soc"] < self.params["min_soc"]
+        hours = get_charging_hours(
+            self.params["ev_soc"],
+            self.params["ev_target_soc"],
+            self.params["charging_pct_per_hour"],
+            self.params.get("charging_curve"),
+        )
+        slack = get_window_length(self.params, self.raw_two_days) - hours
+        return (not below_min_soc, slack, vehicle_id)
+
+
+class FleetScheduler:
+    """Plan the charging of all vehicles of a site together
+
+    The vehicles are planned one at a time, in priority order, with each
+    vehicle's own Scheduler. Hours where a vehicle would exceed the site power
+    limit are unavailable to it. A vehicle is only planned again if its demand
+    or its unavailable hours have changed.
+
+    The order is set when a vehicle gets a demand, and is kept until the
+    demand is cleared. A change to one vehicle then only affects the vehicles
+    after it, instead of reordering the fleet when a SOC changes."""
+
+    def __init__(self) -> None:
+        self.vehicles: dict[str, FleetVehicle] = {}
+        self.solves = 0
+        self.plans = 0
+        self.reuses = 0
+
+    @property
+    def site_power_limit(self) -> float:
+        """The lowest site power limit of the vehicles, in kW"""
+        return min(
+            (vehicle.site_power_limit for vehicle in self.vehicles.values()),
+            default=0.0,
+        )
+
+    def add_vehicle(
+        self,
+        vehicle_id: str,
+        scheduler: Scheduler,
+        power: float,
+        site_power_limit: float,
+        replanned: Callable[[], None],
+    ) -> None:
+        """Add a vehicle. replanned is called when other vehicles change its plan"""
+        self.vehicles[vehicle_id] = FleetVehicle(
+            scheduler, power, site_power_limit, replanned
+        )
+
+    def remove_vehicle(self, vehicle_id: str) -> None:
+        """Remove a vehicle and give its hours to the other vehicles"""
+        if self.vehicles.pop(vehicle_id, None) is not None:
+            self.solve()
+
+    def update_demand(
+        self, vehicle_id: str, params: dict[str, Any], raw_two_days: Raw
+    ) -> None:
+        """Plan a vehicle with new scheduling parameters"""
+        vehicle = self.vehicles[vehicle_id]
+        vehicle.params = params
+        vehicle.raw_two_days = raw_two_days
+        vehicle.changed = True
+        vehicle.restored = False
+        if vehicle.order is None:
+            vehicle.order = (True, vehicle.get_priority(vehicle_id))
+        self.solve(vehicle_id)
+
+    def restore_demand(
+        self, vehicle_id: str, params: dict[str, Any], raw_two_days: Raw
+    ) -> None:
+        """Add a vehicle with a base schedule restored after a restart
+
+        The hours of the restored schedule are kept, and the other vehicles
+        are planned around them."""
+        vehicle = self.vehicles[vehicle_id]
+        vehicle.params = params
+        vehicle.raw_two_days = raw_two_days
+        vehicle.changed = False
+        vehicle.restored = True
+        vehicle.hours = vehicle.scheduler.get_base_schedule_hours()
+        # Restored schedules are placed first, in the order they start, so a
+        # schedule that is charging is kept and the others are planned around it
+        vehicle.order = (False, tuple(sorted(vehicle.hours)), vehicle_id)
+        self.solve(vehicle_id)
+
+    def clear_demand(self, vehicle_id: str) -> None:
+        """Remove the demand of a vehicle that will not charge"""
+        vehicle = self.vehicles.get(vehicle_id)
+        if vehicle is not None and vehicle.params is not None:
+            vehicle.params = None
+            vehicle.raw_two_days = None
+            vehicle.restored = False
+            vehicle.order = None
+            vehicle.unavailable_hours = None
+            vehicle.hours = set()
+            self.solve()
+
+    def solve(self, caller: str = None) -> list[str]:
+        """Plan the vehicles that are affected by a change
+
+        Returns the vehicles that got new hours. Their replanned callback is
+        called, except for the caller."""
+
+        self.solves = self.solves + 1
+        power_limit = self.site_power_limit
+        usage: dict[datetime, float] = {}
+        changed_vehicles = []
+        vehicles = sorted(
+            (
+                (vehicle.order, vehicle_id, vehicle)
+                for vehicle_id, vehicle in self.vehicles.items()
+                if vehicle.params is not None
+            ),
+            key=lambda item: item[0],
+        )
+        for _, vehicle_id, vehicle in vehicles:
+            unavailable_hours = frozenset(
+                hour
+                for hour, power in usage.items()
+                if power + vehicle.power > power_limit
+            )
+            if vehicle.restored:
+                self.reuses = self.reuses + 1
+                vehicle.restored = False
+                vehicle.unavailable_hours = unavailable_hours
+            elif vehicle.changed or unavailable_hours != vehicle.unavailable_hours:
+                self.plans = self.plans + 1
+                vehicle.changed = False
+                vehicle.unavailable_hours = unavailable_hours
+                vehicle.scheduler.create_base_schedule(
+                    vehicle.params | {"unavailable_hours": unavailable_hours},
+                    vehicle.raw_two_days,
+                )
+                hours = vehicle.scheduler.get_base_schedule_hours()
+                if hours != vehicle.hours:
+                    vehicle.hours = hours
+                    changed_vehicles.append(vehicle_id)
+            else:
+                self.reuses = self.reuses + 1
+            for hour in vehicle.hours:
+                usage[hour] = usage.get(hour, 0.0) + vehicle.power
+
+        _LOGGER.debug("Fleet vehicles with new hours = %s", changed_vehicles)
+        for vehicle_id in changed_vehicles:
+            if vehicle_id != caller:
+                self.vehicles[vehicle_id].replanned()
+        return changed_vehicles
+
+    def get_unavailable_hours(self, vehicle_id: str) -> frozenset[datetime]:
+        """Get the hours that were unavailable at the last plan of a vehicle"""
+        vehicle = self.vehicles.get(vehicle_id)
+        if vehicle is None:
+            return None
+        return vehicle.unavailable_hours
+
+    def get_usage(self) -> dict[datetime, float]:
+        """Get the planned power per hour, in kW"""
+        usage = {}
+        for vehicle in self.vehicles.values():
+            for hour in vehicle.hours:
+                usage[hour] = usage.get(hour, 0.0) + vehicle.power
+        return dict(sorted(usage.items()))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the state of the fleet, in a format suitable for diagnostics"""
+        return {
+            "site_power_limit": self.site_power_limit,
+            "solves": self.solves,
+            "plans": self.plans,
+            "reuses": self.reuses,
+            "vehicles": {
+                vehicle_id: {
+                    "power": vehicle.power,
+                    "hours": sorted(hour.isoformat() for hour in vehicle.hours),
+                    "unavailable_hours": (
+                        sorted(hour.isoformat() for hour in vehicle.unavailable_hours)
+                        if vehicle.unavailable_hours is not None
+                        else None
+                    ),
+                }
+                for vehicle_id, vehicle in self.vehicles.items()
+            },
+            "usage": {
+                hour.isoformat(): power for hour, power in self.get_usage().items()
+            },
+        }
@@ -62,3 +62,14 @@ def get_platform(hass: HomeAssistant, entity_id: str):
         return None
     platform = entry.platform
     return platform
+
+
+def get_cost_units(price_unit: str, currency: str) -> tuple[str, str]:
+    """Get the units of a cost and of a price, from the unit of the price sensor
+
+    The currency is used if the price sensor has no unit, like "SEK/kWh"."""
+    if price_unit and "/" in price_unit:
+        return price_unit.split("/")[0].strip(), price_unit
+    if price_unit:
+        return price_unit, f"{price_unit}/kWh"
+    return currency, f"{currency}/kWh"
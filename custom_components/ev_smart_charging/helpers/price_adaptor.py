@@ -22,6 +22,44 @@ from custom_components.ev_smart_charging.helpers.coordinator import Raw
 _LOGGER = logging.getLogger(__name__)
 
 
+class PriceData:
+    """Prices parsed from one state of a price sensor
+
+    Config entries with the same price sensor share the parsed prices, so
+    nothing in here may be changed after it has been created."""
+
+    def __init__(self, price_adaptor: "PriceAdaptor", price_state: State) -> None:
+        self.price_state = price_state
+        self.platform = price_adaptor.get_price_platform()
+        self.current_price = price_adaptor.get_current_price(price_state)
+        self.raw_today_local = price_adaptor.get_raw_today_local(price_state)
+        self.raw_tomorrow_local = price_adaptor.get_raw_tomorrow_local(price_state)
+        self.tomorrow_valid = self.raw_tomorrow_local.is_valid()
+
+        # Fix to take care of Nordpool bug
+        # https://github.com/custom-components/nordpool/issues/235
+        if self.tomorrow_valid:
+            datetime_today = self.raw_today_local.get_raw()[0]["start"]
+            datetime_tomorrow = self.raw_tomorrow_local.get_raw()[0]["start"]
+            if datetime_today == datetime_tomorrow:
+                _LOGGER.debug("Nordpool bug detected and avoided")
+                self.raw_tomorrow_local = Raw([])
+                self.tomorrow_valid = False
+
+        # Change to UTC time
+        self.raw_two_days = self.raw_today_local.copy().to_utc()
+        self.raw_two_days.extend(self.raw_tomorrow_local.copy().to_utc())
+        # Change to local time
+        self.raw_two_days_local = self.raw_two_days.copy().to_local().get_raw()
+        self.price_statistics = self.raw_two_days.get_statistics()
+
+    def get_current_price(self) -> float:
+        """Return the current price"""
+        if self.platform == PLATFORM_ENTSOE:
+            return self.raw_today_local.get_value(dt.now())
+        return self.current_price
+
+
 class PriceAdaptor:
     """PriceAdaptor class"""
 
@@ -32,6 +70,10 @@ class PriceAdaptor:
         """Set the Price platform"""
         self._price_platform = price_platform
 
+    def get_price_platform(self) -> str:
+        """Get the Price platform"""
+        return self._price_platform
+
     def is_price_state(self, price_state: State) -> bool:
         """Check that argument is a Price sensor state"""
         if price_state is not None:
@@ -0,0 +1,91 @@
+"""Offline replay of the scheduling"""
+
+from datetime import datetime
+from typing import Any
+
+from homeassistant.util import dt
+
+from custom_components.ev_smart_charging.helpers.coordinator import (
+    Raw,
+    Scheduler,
+    get_charging_stored,
+    get_charging_value,
+)
+
+# Version of the snapshot format. Increase if the format is changed.
+SNAPSHOT_VERSION = 1
+
+
+def get_raw_from_stored(stored: list[dict[str, Any]]) -> Raw:
+    """Get Raw from prices in the format of get_charging_stored()"""
+    return Raw(
+        [
+            {
+                "start": dt.parse_datetime(item["start"]),
+                "end": dt.parse_datetime(item["end"]),
+                "value": item["value"],
+            }
+            for item in stored
+        ]
+    )
+
+
+def get_isoformat(time: datetime) -> str:
+    """Get a datetime in ISO format, or None"""
+    if time is None:
+        return None
+    return time.isoformat()
+
+
+def get_schedule_result(
+    scheduler: Scheduler, schedule: list, time_now: datetime
+) -> dict[str, Any]:
+    """Get the schedule and the decision, in a format that can be stored"""
+    return {
+        "schedule": get_charging_stored(schedule) if schedule is not None else None,
+        "charging_is_planned": scheduler.get_charging_is_planned(),
+        "charging_start_time": get_isoformat(scheduler.get_charging_start_time()),
+        "charging_stop_time": get_isoformat(scheduler.get_charging_stop_time()),
+        "charging_number_of_hours": scheduler.get_charging_number_of_hours(),
+        "charging_value": (
+            get_charging_value(schedule, time_now) if schedule is not None else None
+        ),
+    }
+
+
+def replay_snapshot(
+    snapshot: dict[str, Any], recalculate: bool = False
+) -> dict[str, Any]:
+    """Run the Scheduler on the inputs of a snapshot
+
+    The clock is set to the time of the snapshot, so the result only depends
+    on the snapshot. The base schedules of the snapshot are used, unless
+    recalculate is set or they don't match the prices."""
+
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {snapshot.get('version')}")
+
+    time_now = dt.parse_datetime(snapshot["time"])
+    raw_two_days = get_raw_from_stored(snapshot["prices"])
+    params = dict(snapshot["params"])
+    params["start_hour"] = dt.parse_datetime(params["start_hour"])
+    params["ready_hour"] = dt.parse_datetime(params["ready_hour"])
+    params["time_now"] = time_now
+    if params.get("unavailable_hours") is not None:
+        params["unavailable_hours"] = {
+            dt.parse_datetime(hour) for hour in params["unavailable_hours"]
+        }
+
+    scheduler = Scheduler()
+    if recalculate or not scheduler.restore_base_schedule(
+        snapshot["base_schedule"], raw_two_days, time_now
+    ):
+        if raw_two_days.is_valid():
+            scheduler.create_base_schedule(params, raw_two_days)
+
+    schedule = None
+    if scheduler.base_schedule_exists():
+        schedule = scheduler.get_schedule(params)
+    else:
+        scheduler.set_empty_schedule()
+    return get_schedule_result(scheduler, schedule, time_now)
@@ -0,0 +1,273 @@
+"""Charging speed learned from the SOC changes while charging, and the SOC
+estimated from it between the SOC readings"""
+
+from collections import deque
+from datetime import datetime, timedelta
+import logging
+from typing import Any
+
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import State
+
+from .coordinator import ChargingCurve, get_cached_charging_curve
+from .general import Validator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Width of the SOC bands with one speed estimate each, in %
+BAND_WIDTH = 10
+# Number of observations kept
+HISTORY_SIZE = 200
+# Weight of a new observation in the estimate of its band
+SMOOTHING = 0.2
+# Observations needed before the estimate of a band is used
+MIN_OBSERVATIONS = 3
+# Shorter periods between two SOC readings are not used
+MIN_DURATION = timedelta(minutes=5)
+
+
+def get_band(soc: float) -> int:
+    """Get the SOC band of a SOC"""
+    return int(min(max(soc, 0.0), 99.999) // BAND_WIDTH)
+
+
+class ChargingSpeedEstimator:
+    """Charging speed per SOC band, from the SOC readings while charging
+
+    An observation is the SOC increase between two SOC readings, with the
+    charger on all the time in between. The last observations are kept in a
+    ring buffer, and each band has an exponentially weighted average of the
+    speeds observed from a SOC in that band."""
+
+    def __init__(self) -> None:
+        # (soc_start, soc_end, hours)
+        self.observations: deque[tuple[float, float, float]] = deque(
+            maxlen=HISTORY_SIZE
+        )
+        # band -> [speed in % per hour, number of observations]
+        self.bands: dict[int, list[float]] = {}
+        self.charging = False
+        self.last_reading: tuple[datetime, float] = None
+
+    def set_charging(self, charging: bool):
+        """Called when the charger is turned on or off"""
+        if charging != self.charging:
+            self.charging = charging
+            # The period with the change can't be used
+            self.last_reading = None
+
+    def add_soc(self, time: datetime, soc: float) -> bool:
+        """Called with a new SOC reading. Returns True if it gave an observation"""
+        observed = False
+        if self.charging and self.last_reading is not None:
+            last_time, last_soc = self.last_reading
+            if soc >= last_soc and time - last_time < MIN_DURATION:
+                # Measured over a longer period with the next reading
+                return False
+            if soc > last_soc:
+                self.add_observation(
+                    last_soc, soc, (time - last_time) / timedelta(hours=1)
+                )
+                observed = True
+        self.last_reading = (time, soc) if self.charging else None
+        return observed
+
+    def add_observation(self, soc_start: float, soc_end: float, hours: float):
+        """Add the SOC increase during hours of charging"""
+        observation = (round(soc_start, 2), round(soc_end, 2), round(hours, 4))
+        self.observations.append(observation)
+        self.update_band(*observation)
+
+    def update_band(self, soc_start: float, soc_end: float, hours: float):
+        """Update the estimate of the band where the observation started"""
+        speed = (soc_end - soc_start) / hours
+        band = self.bands.get(get_band(soc_start))
+        if band is None:
+            self.bands[get_band(soc_start)] = [speed, 1]
+        else:
+            band[0] = band[0] + SMOOTHING * (speed - band[0])
+            band[1] = band[1] + 1
+
+    def add_history(self, observations: list[tuple[float, float, float]]):
+        """Add observations that are older than the current ones"""
+        newer = list(self.observations)
+        self.observations.clear()
+        self.observations.extend(tuple(item) for item in observations)
+        self.observations.extend(newer)
+        self.bands = {}
+        for observation in self.observations:
+            self.update_band(*observation)
+
+    def get_speed(self, soc: float) -> float:
+        """Get the learned speed at a SOC, or None if not enough is known"""
+        band = self.bands.get(get_band(soc))
+        if band is None or band[1] < MIN_OBSERVATIONS:
+            return None
+        return band[0]
+
+    def get_charging_curve(
+        self, charging_pct_per_hour: float, charging_curve: list[list[float]]
+    ) -> list[list[float]]:
+        """Get the configured charging curve, with the learned speed in the
+        bands with enough observations"""
+
+        learned = {
+            band: values[0]
+            for band, values in self.bands.items()
+            if values[1] >= MIN_OBSERVATIONS
+        }
+        if not learned:
+            return charging_curve
+
+        configured = ChargingCurve(charging_pct_per_hour, charging_curve)
+        breakpoints = {
+            soc: speed for soc, speed in charging_curve if get_band(soc) not in learned
+        }
+        for band, speed in learned.items():
+            breakpoints[float(band * BAND_WIDTH)] = round(speed, 3)
+            # The configured speed applies again after the band
+            end = float((band + 1) * BAND_WIDTH)
+            if end < 100 and band + 1 not in learned and end not in breakpoints:
+                breakpoints[end] = configured.get_speed(end)
+        return [[soc, speed] for soc, speed in sorted(breakpoints.items())]
+
+    def get_stored(self) -> list[list[float]]:
+        """Get the observations in a format that can be stored"""
+        return [list(item) for item in self.observations]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the estimates, in a format suitable for diagnostics"""
+        return {
+            "observations": len(self.observations),
+            "bands": {
+                f"{band * BAND_WIDTH}-{(band + 1) * BAND_WIDTH}": {
+                    "speed": round(values[0], 3),
+                    "observations": values[1],
+                }
+                for band, values in sorted(self.bands.items())
+            },
+        }
+
+
+def get_history_observations(
+    soc_states: list[State], charging_states: list[State]
+) -> list[tuple[float, float, float]]:
+    """Get the observations from the recorded SOC and charging states
+
+    Only uses the states, so it can run in the executor."""
+
+    events = [
+        (state.last_changed, 0, state.state)
+        for state in charging_states
+        if state.state in [STATE_ON, STATE_OFF]
+    ] + [
+        (state.last_changed, 1, float(state.state))
+        for state in soc_states
+        if Validator.is_soc_state(state)
+    ]
+    estimator = ChargingSpeedEstimator()
+    # A change of the charging state is handled before a SOC at the same time
+    for time, kind, value in sorted(events, key=lambda event: event[0:2]):
+        if kind == 0:
+            estimator.set_charging(value == STATE_ON)
+        else:
+            estimator.add_soc(time, value)
+    _LOGGER.debug("Observations from history = %s", len(estimator.observations))
+    return list(estimator.observations)
+
+
+class SocEstimator:
+    """SOC estimated from the last SOC reading and the charger on-time since
+
+    The charger on-time after the reading is converted to a SOC increase with
+    the charging curve. A new SOC reading replaces the estimate, and the
+    difference between them is kept as the last correction."""
+
+    def __init__(self) -> None:
+        self.reading: tuple[datetime, float] = None
+        # Charger on-time since the reading, not including the current period
+        self.charged_hours = 0.0
+        # Start of the current period with the charger on, None if off
+        self.charging_since: datetime = None
+        # Charging curve of the last estimate
+        self.curve: ChargingCurve = None
+        self.estimate: float = None
+        self.correction: float = None
+
+    def set_charging(self, time: datetime, charging: bool):
+        """Called when the charger is turned on or off"""
+        if charging and self.charging_since is None:
+            self.charging_since = time
+        elif not charging and self.charging_since is not None:
+            self.charged_hours = self.charged_hours + self.get_period_hours(time)
+            self.charging_since = None
+
+    def add_reading(self, time: datetime, soc: float) -> bool:
+        """Called with the SOC state. Returns True if it was a new reading"""
+        if self.reading is not None and time <= self.reading[0]:
+            return False
+        if self.reading is not None and self.curve is not None:
+            estimate = self.curve.get_soc(
+                self.reading[1], self.charged_hours + self.get_period_hours(time)
+            )
+            self.correction = round(estimate - soc, 2)
+            _LOGGER.debug("SOC estimate corrected by %s", -self.correction)
+        self.reading = (time, soc)
+        self.charged_hours = 0.0
+        if self.charging_since is not None:
+            self.charging_since = max(self.charging_since, time)
+        self.estimate = soc
+        return True
+
+    def get_period_hours(self, time: datetime) -> float:
+        """Get the hours of the current period with the charger on"""
+        if self.charging_since is None:
+            return 0.0
+        start = self.charging_since
+        if self.reading is not None:
+            start = max(start, self.reading[0])
+        return max((time - start) / timedelta(hours=1), 0.0)
+
+    def get_soc(
+        self,
+        time: datetime,
+        charging_pct_per_hour: float,
+        charging_curve: list[list[float]],
+    ) -> float:
+        """Get the estimated SOC at time, or None if there is no reading"""
+        if self.reading is None:
+            return None
+        hours = self.charged_hours + self.get_period_hours(time)
+        self.curve = get_cached_charging_curve(
+            charging_pct_per_hour, tuple(tuple(item) for item in charging_curve)
+        )
+        self.estimate = round(self.curve.get_soc(self.reading[1], hours), 2)
+        return self.estimate
+
+    def get_time_at_soc(self, time: datetime, soc: float) -> datetime:
+        """Get the time when the estimate at time reaches soc
+
+        Returns None if the charger is off or the estimate is already at soc."""
+        if self.charging_since is None or self.estimate is None or self.curve is None:
+            return None
+        if self.estimate >= soc:
+            return None
+        return time + timedelta(hours=self.curve.get_hours(self.estimate, soc))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the estimate, in a format suitable for diagnostics"""
+        return {
+            "reading": (
+                {"time": self.reading[0].isoformat(), "soc": self.reading[1]}
+                if self.reading is not None
+                else None
+            ),
+            "charged_hours": round(self.charged_hours, 4),
+            "charging_since": (
+                self.charging_since.isoformat()
+                if self.charging_since is not None
+                else None
+            ),
+            "estimate": self.estimate,
+            "correction": self.correction,
+        }
@@ -0,0 +1,119 @@
+"""Timing instrumentation of the coordinator"""
+
+from collections import deque
+from contextlib import contextmanager
+import time
+from typing import Any
+
+# Number of durations kept for each stage
+ROLLING_SIZE = 100
+# Upper limits, in ms, of the histogram buckets. The last bucket has no limit.
+HISTOGRAM_BUCKETS = [1, 5, 10, 50, 100, 500]
+
+
+class StageTiming:
+    """Call counter and rolling latency histogram for one stage"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.durations = deque(maxlen=ROLLING_SIZE)
+
+    def record(self, duration: float):
+        """Record the duration of one call, in ms"""
+        self.count = self.count + 1
+        self.total = self.total + duration
+        self.durations.append(duration)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get the counters and the histogram of the latest durations"""
+
+        durations = sorted(self.durations)
+        histogram = {f"<{limit}ms": 0 for limit in HISTOGRAM_BUCKETS}
+        histogram[f">={HISTOGRAM_BUCKETS[-1]}ms"] = 0
+        for duration in durations:
+            for limit in HISTOGRAM_BUCKETS:
+                if duration < limit:
+                    histogram[f"<{limit}ms"] += 1
+                    break
+            else:
+                histogram[f">={HISTOGRAM_BUCKETS[-1]}ms"] += 1
+
+        result = {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "last_ms": None,
+            "mean_ms": None,
+            "p95_ms": None,
+            "max_ms": None,
+            "histogram": histogram,
+        }
+        if durations:
+            result["last_ms"] = round(self.durations[-1], 3)
+            result["mean_ms"] = round(sum(durations) / len(durations), 3)
+            result["p95_ms"] = round(durations[int(len(durations) * 0.95)], 3)
+            result["max_ms"] = round(durations[-1], 3)
+        return result
+
+
+class Instrumentation:
+    """Timing of stages, update triggers, cache hits and executor jobs of a
+    coordinator"""
+
+    def __init__(self) -> None:
+        self.stages: dict[str, StageTiming] = {}
+        self.triggers: dict[str, int] = {}
+        self.caches: dict[str, dict[str, int]] = {}
+        self.executor = {"jobs": 0, "discarded": 0}
+
+    def record(self, stage: str, start: float):
+        """Record the time since start, a value of time.perf_counter()"""
+        self.stages.setdefault(stage, StageTiming()).record(
+            (time.perf_counter() - start) * 1000
+        )
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Measure the time spent in a block of code"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, start)
+
+    def count_trigger(self, trigger: str):
+        """Count an update caused by trigger"""
+        self.triggers[trigger] = self.triggers.get(trigger, 0) + 1
+
+    def count_cache(self, cache: str, hit: bool):
+        """Count a hit or a miss of a cache"""
+        counters = self.caches.setdefault(cache, {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += 1
+
+    def count_executor_job(self, discarded: bool):
+        """Count a job run in the executor, and if its result was stale"""
+        self.executor["jobs"] += 1
+        if discarded:
+            self.executor["discarded"] += 1
+
+    def get_stage(self, stage: str) -> StageTiming:
+        """Get the timing of a stage, or None if it has not run"""
+        return self.stages.get(stage)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get all counters, in a format suitable for diagnostics"""
+
+        caches = {}
+        for cache, counters in self.caches.items():
+            lookups = counters["hits"] + counters["misses"]
+            caches[cache] = counters | {
+                "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else None
+            }
+        return {
+            "stages": {
+                stage: timing.as_dict() for stage, timing in self.stages.items()
+            },
+            "triggers": dict(self.triggers),
+            "caches": caches,
+            "executor": dict(self.executor),
+        }
@@ -0,0 +1,94 @@
+"""Listeners and prices shared by all config entries"""
+
+import asyncio
+from datetime import datetime
+import logging
+
+from homeassistant.core import Event, HomeAssistant, State, callback
+from homeassistant.helpers.device_registry import EVENT_DEVICE_REGISTRY_UPDATED
+from homeassistant.helpers.event import async_track_time_change
+
+from .coordinator import EVSmartChargingCoordinator
+from .helpers.price_adaptor import PriceAdaptor, PriceData
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EVSmartChargingHub:
+    """One hourly tick and one device registry listener for all config entries
+
+    The config entries are updated together, so that the service calls to
+    the chargers are made concurrently. Prices are parsed once per price
+    sensor state, and shared by the config entries using that sensor."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.coordinators: dict[str, EVSmartChargingCoordinator] = {}
+        self.price_data: dict[str, PriceData] = {}
+        self.listeners = []
+
+    def add_coordinator(self, coordinator: EVSmartChargingCoordinator):
+        """Add the coordinator of a config entry"""
+        if not self.coordinators:
+            # Update state once per hour.
+            self.listeners.append(
+                async_track_time_change(
+                    self.hass, self.update_hourly, minute=0, second=0
+                )
+            )
+            # Listen for changes to the devices.
+            self.listeners.append(
+                self.hass.bus.async_listen(
+                    EVENT_DEVICE_REGISTRY_UPDATED, self.device_updated
+                )
+            )
+        self.coordinators[coordinator.config_entry.entry_id] = coordinator
+        coordinator.hub = self
+
+    def remove_coordinator(self, coordinator: EVSmartChargingCoordinator):
+        """Remove the coordinator of a config entry"""
+        self.coordinators.pop(coordinator.config_entry.entry_id, None)
+        coordinator.hub = None
+        if not self.coordinators:
+            for unsub in self.listeners:
+                unsub()
+            self.listeners = []
+            self.price_data = {}
+
+    @callback
+    async def update_hourly(self, date_time: datetime = None):
+        """Called every hour"""
+        _LOGGER.debug("EVSmartChargingHub.update_hourly()")
+        await asyncio.gather(
+            *(
+                coordinator.update_hourly(date_time)
+                for coordinator in list(self.coordinators.values())
+            )
+        )
+
+    @callback
+    async def device_updated(self, event: Event):
+        """Called when a device is updated"""
+        await asyncio.gather(
+            *(
+                coordinator.device_updated(event)
+                for coordinator in list(self.coordinators.values())
+            )
+        )
+
+    def get_price_data(
+        self, entity_id: str, price_adaptor: PriceAdaptor, price_state: State
+    ) -> PriceData:
+        """Get the prices of a price state, or None if it is not valid"""
+        price_data = self.price_data.get(entity_id)
+        if (
+            price_data is not None
+            and price_data.price_state is price_state
+            and price_data.platform == price_adaptor.get_price_platform()
+        ):
+            return price_data
+        if not price_adaptor.is_price_state(price_state):
+            return None
+        price_data = PriceData(price_adaptor, price_state)
+        self.price_data[entity_id] = price_data
+        return price_data
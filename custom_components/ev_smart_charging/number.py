@@ -1,6 +1,6 @@
 """Number platform for EV Smart Charging."""
 import logging
-from typing import Union
+from typing import TYPE_CHECKING, Union
 
 from homeassistant.components.number import (
     RestoreNumber,
@@ -23,10 +23,12 @@ from .const import (
     ICON_CASH,
     NUMBER,
 )
-from .coordinator import EVSmartChargingCoordinator
 from .entity import EVSmartChargingEntity
 from .helpers.general import get_parameter
 
+if TYPE_CHECKING:
+    from .coordinator import EVSmartChargingCoordinator
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -50,7 +52,7 @@ class EVSmartChargingNumber(EVSmartChargingEntity, RestoreNumber):
     # To support HA 2022.7
     _attr_native_value: Union[float, None] = None  # Using Union to support Python 3.9
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingNumber.__init__()")
         super().__init__(entry)
         self.coordinator = coordinator
@@ -82,7 +84,7 @@ class EVSmartChargingNumberChargingSpeed(EVSmartChargingNumber):
     _attr_native_max_value = 100.0
     _attr_native_step = 0.1
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingNumberChargingSpeed.__init__()")
         super().__init__(entry, coordinator)
         if self.value is None:
@@ -106,7 +108,7 @@ class EVSmartChargingNumberPriceLimit(EVSmartChargingNumber):
     _attr_native_max_value = 10000.0
     _attr_native_step = 0.01
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingNumberPriceLimit.__init__()")
         super().__init__(entry, coordinator)
         if self.value is None:
@@ -130,7 +132,7 @@ class EVSmartChargingNumberMinSOC(EVSmartChargingNumber):
     _attr_native_max_value = 100.0
     _attr_native_step = 1.0
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingNumberMinSOC.__init__()")
         super().__init__(entry, coordinator)
         if self.value is None:
@@ -153,7 +155,7 @@ class EVSmartChargingNumberOpportunistic(EVSmartChargingNumber):
     _attr_native_max_value = 100.0
     _attr_native_step = 1.0
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingNumberOpportunistic.__init__()")
         super().__init__(entry, coordinator)
         if self.value is None:
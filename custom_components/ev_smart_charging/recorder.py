@@ -0,0 +1,10 @@
+"""Recorder platform for EV Smart Charging."""
+from homeassistant.core import HomeAssistant, callback
+
+from .const import ATTR_CHARGING_SCHEDULE, ATTR_RAW_TWO_DAYS
+
+
+@callback
+def exclude_attributes(hass: HomeAssistant) -> set[str]:
+    """Exclude the price and schedule series from being recorded in the database."""
+    return {ATTR_RAW_TWO_DAYS, ATTR_CHARGING_SCHEDULE}
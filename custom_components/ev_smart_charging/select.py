@@ -1,6 +1,6 @@
 """Select platform for EV Smart Charging."""
 import logging
-from typing import Union
+from typing import TYPE_CHECKING, Union
 
 from homeassistant.components.select import SelectEntity
 from homeassistant.core import HomeAssistant, State
@@ -18,10 +18,12 @@ from .const import (
     SELECT,
     START_HOUR_NONE,
 )
-from .coordinator import EVSmartChargingCoordinator
 from .entity import EVSmartChargingEntity
 from .helpers.general import get_parameter
 
+if TYPE_CHECKING:
+    from .coordinator import EVSmartChargingCoordinator
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -42,7 +44,7 @@ class EVSmartChargingSelect(EVSmartChargingEntity, SelectEntity, RestoreEntity):
 
     _attr_current_option: Union[str, None] = None  # Using Union to support Python 3.9
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSelect.__init__()")
         super().__init__(entry)
         self.coordinator = coordinator
@@ -68,7 +70,7 @@ class EVSmartChargingSelectStartHour(EVSmartChargingSelect):
     _attr_entity_category = EntityCategory.CONFIG
     _attr_options = HOURS
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSelectReadyHour.__init__()")
         super().__init__(entry, coordinator)
         if self.state is None:
@@ -95,7 +97,7 @@ class EVSmartChargingSelectReadyHour(EVSmartChargingSelect):
     _attr_entity_category = EntityCategory.CONFIG
     _attr_options = HOURS
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSelectReadyHour.__init__()")
         super().__init__(entry, coordinator)
         if self.state is None:
@@ -1,19 +1,32 @@
 """Sensor platform for EV Smart Charging."""
 import logging
+from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.core import HomeAssistant
-from homeassistant.const import STATE_OFF
+from homeassistant.const import STATE_OFF, UnitOfTime
+from homeassistant.helpers.entity import EntityCategory
 
 
 from .const import (
+    ATTR_CHARGING_SCHEDULE,
+    ATTR_RAW_TWO_DAYS,
     CHARGING_STATUS_NOT_ACTIVE,
+    CONF_COMPACT_ATTRIBUTES,
     DOMAIN,
+    ENTITY_NAME_AVERAGE_PRICE_SENSOR,
     ENTITY_NAME_CHARGING_SENSOR,
+    ENTITY_NAME_COST_SENSOR,
+    ENTITY_NAME_SAVINGS_SENSOR,
     ENTITY_NAME_STATUS_SENSOR,
+    ENTITY_NAME_UPDATE_DURATION_SENSOR,
+    ICON_CASH,
+    ICON_TIMER,
     SENSOR,
 )
 from .entity import EVSmartChargingEntity
+from .helpers.coordinator import get_compact
+from .helpers.general import get_parameter
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,6 +38,10 @@ async def async_setup_entry(hass: HomeAssistant, entry, async_add_devices):
     sensors = []
     sensors.append(EVSmartChargingSensorCharging(entry))
     sensors.append(EVSmartChargingSensorStatus(entry))
+    sensors.append(EVSmartChargingSensorCost(entry))
+    sensors.append(EVSmartChargingSensorAveragePrice(entry))
+    sensors.append(EVSmartChargingSensorSavings(entry))
+    sensors.append(EVSmartChargingSensorUpdateDuration(entry))
     async_add_devices(sensors)
     await coordinator.add_sensor(sensors)
 
@@ -44,6 +61,12 @@ class EVSmartChargingSensor(EVSmartChargingEntity, SensorEntity):
         self._attr_native_value = new_value
         self.update_ha_state()
 
+    def set_unit(self, unit: str) -> None:
+        """Set the unit of the value reported by the sensor."""
+        if self.native_unit_of_measurement != unit:
+            self._attr_native_unit_of_measurement = unit
+            self.update_ha_state()
+
 
 class EVSmartChargingSensorCharging(EVSmartChargingSensor):
     """EV Smart Charging sensor class."""
@@ -71,6 +94,15 @@ class EVSmartChargingSensorCharging(EVSmartChargingSensor):
 
     @property
     def extra_state_attributes(self) -> dict:
+        raw_two_days = self._raw_two_days
+        charging_schedule = self._charging_schedule
+        if get_parameter(self.config_entry, CONF_COMPACT_ATTRIBUTES, False):
+            # Fall back to the verbose format if the slots are irregular
+            if (compact := get_compact(raw_two_days)) is not None:
+                raw_two_days = compact
+            if (compact := get_compact(charging_schedule, True)) is not None:
+                charging_schedule = compact
+
         return {
             "current_price": self._current_price,
             "EV SOC": self._ev_soc,
@@ -79,8 +111,8 @@ class EVSmartChargingSensorCharging(EVSmartChargingSensor):
             "Charging start time": self._charging_start_time,
             "Charging stop time": self._charging_stop_time,
             "Charging number of hours": self._charging_number_of_hours,
-            "raw_two_days": self._raw_two_days,
-            "charging_schedule": self._charging_schedule,
+            ATTR_RAW_TWO_DAYS: raw_two_days,
+            ATTR_CHARGING_SCHEDULE: charging_schedule,
         }
 
     @property
@@ -184,3 +216,71 @@ class EVSmartChargingSensorStatus(EVSmartChargingSensor):
         super().__init__(entry)
 
         self._attr_native_value = CHARGING_STATUS_NOT_ACTIVE
+
+
+class EVSmartChargingSensorCost(EVSmartChargingSensor):
+    """EV Smart Charging cost sensor class.
+
+    The sum of the prices of the planned charging hours."""
+
+    _attr_name = ENTITY_NAME_COST_SENSOR
+    _attr_icon = ICON_CASH
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, entry):
+        _LOGGER.debug("EVSmartChargingSensorCost.__init__()")
+        super().__init__(entry)
+
+
+class EVSmartChargingSensorAveragePrice(EVSmartChargingSensor):
+    """EV Smart Charging average price sensor class."""
+
+    _attr_name = ENTITY_NAME_AVERAGE_PRICE_SENSOR
+    _attr_icon = ICON_CASH
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, entry):
+        _LOGGER.debug("EVSmartChargingSensorAveragePrice.__init__()")
+        super().__init__(entry)
+
+
+class EVSmartChargingSensorSavings(EVSmartChargingSensor):
+    """EV Smart Charging savings sensor class.
+
+    The cost saved compared with charging as soon as possible."""
+
+    _attr_name = ENTITY_NAME_SAVINGS_SENSOR
+    _attr_icon = ICON_CASH
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, entry):
+        _LOGGER.debug("EVSmartChargingSensorSavings.__init__()")
+        super().__init__(entry)
+
+
+class EVSmartChargingSensorUpdateDuration(EVSmartChargingSensor):
+    """EV Smart Charging update duration sensor class.
+
+    Diagnostic sensor with the duration of the latest update, in ms."""
+
+    _attr_name = ENTITY_NAME_UPDATE_DURATION_SENSOR
+    _attr_icon = ICON_TIMER
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, entry):
+        _LOGGER.debug("EVSmartChargingSensorUpdateDuration.__init__()")
+        super().__init__(entry)
+        self._attr_extra_state_attributes = {}
+
+    def update_timing(self, timing: dict[str, Any]):
+        """Update with the timing of the updates"""
+        self._attr_extra_state_attributes = {
+            "count": timing["count"],
+            "mean_ms": timing["mean_ms"],
+            "p95_ms": timing["p95_ms"],
+            "max_ms": timing["max_ms"],
+        }
+        self.native_value = timing["last_ms"]
@@ -0,0 +1,67 @@
+"""Services for EV Smart Charging."""
+from typing import Any
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+
+from .const import (
+    DOMAIN,
+    EVENT_SCHEDULE_COMPUTED,
+    HOURS,
+    SERVICE_COMPUTE_SCHEDULE,
+)
+
+ATTR_ENTRY_ID = "entry_id"
+
+COMPUTE_SCHEDULE_FIELDS = {
+    vol.Optional("ev_soc"): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+    vol.Optional("ev_target_soc"): vol.All(
+        vol.Coerce(float), vol.Range(min=0, max=100)
+    ),
+    vol.Optional("min_soc"): vol.All(vol.Coerce(float), vol.Range(min=0, max=100)),
+    vol.Optional("charging_pct_per_hour"): vol.All(
+        vol.Coerce(float), vol.Range(min=0.1, max=100)
+    ),
+    vol.Optional("start_hour"): vol.In(HOURS),
+    vol.Optional("ready_hour"): vol.In(HOURS),
+    vol.Optional("continuous"): cv.boolean,
+    vol.Optional("apply_limit"): cv.boolean,
+    vol.Optional("max_price"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+}
+
+COMPUTE_SCHEDULE_SCHEMA = vol.Schema(
+    {vol.Required(ATTR_ENTRY_ID): cv.string, **COMPUTE_SCHEDULE_FIELDS}
+)
+
+
+async def compute_schedule(
+    hass: HomeAssistant, entry_id: str, overrides: dict[str, Any]
+) -> dict[str, Any]:
+    """Calculate a schedule for a config entry, without side effects"""
+    coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+    if coordinator is None:
+        raise HomeAssistantError(f"Config entry {entry_id} not found")
+    return await coordinator.compute_schedule(overrides)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Set up the services."""
+
+    async def async_compute_schedule(call: ServiceCall) -> None:
+        """Calculate a schedule and fire it as an event"""
+        overrides = dict(call.data)
+        entry_id = overrides.pop(ATTR_ENTRY_ID)
+        result = await compute_schedule(hass, entry_id, overrides)
+        hass.bus.async_fire(
+            EVENT_SCHEDULE_COMPUTED, {ATTR_ENTRY_ID: entry_id, **result}
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_COMPUTE_SCHEDULE,
+        async_compute_schedule,
+        schema=COMPUTE_SCHEDULE_SCHEMA,
+    )
@@ -1,6 +1,6 @@
 """Switch platform for EV Smart Charging."""
 import logging
-from typing import Any
+from typing import Any, TYPE_CHECKING
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.const import STATE_ON
@@ -18,9 +18,11 @@ from .const import (
     ICON_CONNECTION,
     SWITCH,
 )
-from .coordinator import EVSmartChargingCoordinator
 from .entity import EVSmartChargingEntity
 
+if TYPE_CHECKING:
+    from .coordinator import EVSmartChargingCoordinator
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -43,7 +45,7 @@ async def async_setup_entry(
 class EVSmartChargingSwitch(EVSmartChargingEntity, SwitchEntity, RestoreEntity):
     """EV Smart Charging switch class."""
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSwitch.__init__()")
         super().__init__(entry)
         self.coordinator = coordinator
@@ -73,7 +75,7 @@ class EVSmartChargingSwitchActive(EVSmartChargingSwitch):
 
     _attr_name = ENTITY_NAME_ACTIVE_SWITCH
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSwitchActive.__init__()")
         super().__init__(entry, coordinator)
         if self.is_on is None:
@@ -97,7 +99,7 @@ class EVSmartChargingSwitchApplyLimit(EVSmartChargingSwitch):
 
     _attr_name = ENTITY_NAME_APPLY_LIMIT_SWITCH
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSwitchApplyLimit.__init__()")
         super().__init__(entry, coordinator)
         if self.is_on is None:
@@ -122,7 +124,7 @@ class EVSmartChargingSwitchContinuous(EVSmartChargingSwitch):
 
     _attr_name = ENTITY_NAME_CONTINUOUS_SWITCH
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSwitchContinuous.__init__()")
         super().__init__(entry, coordinator)
         if self.is_on is None:
@@ -147,7 +149,7 @@ class EVSmartChargingSwitchEVConnected(EVSmartChargingSwitch):
     _attr_name = ENTITY_NAME_EV_CONNECTED_SWITCH
     _attr_icon = ICON_CONNECTION
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSwitchEVConnected.__init__()")
         super().__init__(entry, coordinator)
         if self.is_on is None:
@@ -171,7 +173,7 @@ class EVSmartChargingSwitchKeepOn(EVSmartChargingSwitch):
 
     _attr_name = ENTITY_NAME_KEEP_ON_SWITCH
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSwitchKeepOn.__init__()")
         super().__init__(entry, coordinator)
         if self.is_on is None:
@@ -196,7 +198,7 @@ class EVSmartChargingSwitchOpportunistic(EVSmartChargingSwitch):
 
     _attr_name = ENTITY_NAME_OPPORTUNISTIC_SWITCH
 
-    def __init__(self, entry, coordinator: EVSmartChargingCoordinator):
+    def __init__(self, entry, coordinator: "EVSmartChargingCoordinator"):
         _LOGGER.debug("EVSmartChargingSwitchOpportunistic.__init__()")
         super().__init__(entry, coordinator)
         if self.is_on is None:
@@ -0,0 +1,95 @@
+"""Websocket API for EV Smart Charging."""
+from typing import Any
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+import voluptuous as vol
+
+from .const import DOMAIN
+from .helpers.coordinator import get_charging_stored, get_delta
+from .services import COMPUTE_SCHEDULE_FIELDS, compute_schedule
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Set up the websocket API."""
+    websocket_api.async_register_command(hass, ws_subscribe_schedule)
+    websocket_api.async_register_command(hass, ws_compute_schedule)
+
+
+def get_schedule_message(data: dict[str, Any]) -> dict[str, Any]:
+    """Convert the schedule and prices to a format that can be sent"""
+    return {key: get_charging_stored(items or []) for key, items in data.items()}
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe_schedule",
+        vol.Required("entry_id"): str,
+    }
+)
+@callback
+def ws_subscribe_schedule(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Subscribe to the schedule and prices of a config entry.
+
+    The full schedule and prices are sent first, then only the items
+    that have changed."""
+    coordinator = hass.data.get(DOMAIN, {}).get(msg["entry_id"])
+    if coordinator is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not found"
+        )
+        return
+
+    previous = get_schedule_message(coordinator.get_schedule_data())
+
+    @callback
+    def forward_schedule() -> None:
+        nonlocal previous
+        current = get_schedule_message(coordinator.get_schedule_data())
+        delta: dict[str, Any] = {}
+        for key, items in current.items():
+            if (key_delta := get_delta(previous[key], items)) is not None:
+                delta[key] = key_delta
+        previous = current
+        if delta:
+            connection.send_message(
+                websocket_api.event_message(msg["id"], {"delta": delta})
+            )
+
+    connection.subscriptions[msg["id"]] = coordinator.async_subscribe_schedule(
+        forward_schedule
+    )
+    connection.send_result(msg["id"])
+    connection.send_message(websocket_api.event_message(msg["id"], {"full": previous}))
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/compute_schedule",
+        vol.Required("entry_id"): str,
+        **COMPUTE_SCHEDULE_FIELDS,
+    }
+)
+@websocket_api.async_response
+async def ws_compute_schedule(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict
+) -> None:
+    """Calculate a schedule for hypothetical inputs and return it."""
+    overrides = {key: value for key, value in msg.items() if key not in ("id", "type")}
+    entry_id = overrides.pop("entry_id")
+    try:
+        result = await compute_schedule(hass, entry_id, overrides)
+    except HomeAssistantError as err:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_HOME_ASSISTANT_ERROR, str(err)
+        )
+        return
+    for key in ("charging_start_time", "charging_stop_time"):
+        if result[key] is not None:
+            result[key] = result[key].isoformat()
+    result["slots"] = get_charging_stored(result["slots"])
+    connection.send_result(msg["id"], result)
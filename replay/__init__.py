@@ -0,0 +1 @@
+"""Offline replay tools for ev_smart_charging integration."""
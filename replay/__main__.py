@@ -0,0 +1,112 @@
+"""Replay the scheduling offline
+
+Run from the repository root:
+
+    python -m replay snapshot diagnostics.json [--recalculate]
+    python -m replay trace trace.json [--json result.json]
+    python -m replay trace --synthetic 30
+
+The diagnostics file is the file downloaded from the integration in
+Settings -> Devices & Services, or just the snapshot part of it.
+The trace format is described in replay/trace.py.
+"""
+
+import argparse
+import asyncio
+from datetime import timedelta
+import json
+import logging
+from pathlib import Path
+import sys
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.ev_smart_charging.helpers.replay import replay_snapshot
+from replay.engine import async_replay_trace
+from replay.trace import get_synthetic_trace
+
+SYNTHETIC_TIME_ZONE = "Europe/Stockholm"
+
+
+def run_snapshot(args: argparse.Namespace) -> int:
+    """Replay a diagnostics snapshot and compare with the recorded result"""
+
+    document = json.loads(args.file.read_text(encoding="utf-8"))
+    data = document.get("data", document)
+    snapshot = data.get("snapshot", data)
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone(snapshot["time_zone"]))
+    result = replay_snapshot(snapshot, args.recalculate)
+    recorded = snapshot["result"]
+    differences = sorted(
+        key for key, value in result.items() if recorded.get(key) != value
+    )
+
+    print(
+        json.dumps(
+            {"result": result, "recorded": recorded, "differences": differences},
+            indent=2,
+        )
+    )
+    return 1 if differences else 0
+
+
+def run_trace(args: argparse.Namespace) -> int:
+    """Replay a trace and print the decisions, charger commands and cost"""
+
+    if args.synthetic:
+        dt_util.set_default_time_zone(dt_util.get_time_zone(SYNTHETIC_TIME_ZONE))
+        first_day = dt_util.now().date() - timedelta(days=args.synthetic)
+        trace = get_synthetic_trace(first_day, args.synthetic)
+    elif args.file:
+        trace = json.loads(args.file.read_text(encoding="utf-8"))
+    else:
+        print("Either a trace file or --synthetic is needed", file=sys.stderr)
+        return 2
+
+    logging.basicConfig(level=logging.CRITICAL)
+    result = asyncio.run(async_replay_trace(trace))
+
+    output = json.dumps(result, indent=2)
+    if args.json:
+        args.json.write_text(output + "\n", encoding="utf-8")
+    print(output)
+    return 0
+
+
+def main(argv: list[str] = None) -> int:
+    """Run the replay from the command line"""
+
+    parser = argparse.ArgumentParser(prog="python -m replay")
+    subparsers = parser.add_subparsers(required=True)
+
+    parser_snapshot = subparsers.add_parser(
+        "snapshot", help="replay a diagnostics snapshot"
+    )
+    parser_snapshot.add_argument("file", type=Path)
+    parser_snapshot.add_argument(
+        "--recalculate",
+        action="store_true",
+        help="calculate new base schedules instead of using the recorded ones",
+    )
+    parser_snapshot.set_defaults(func=run_snapshot)
+
+    parser_trace = subparsers.add_parser(
+        "trace", help="replay a trace through the coordinator"
+    )
+    parser_trace.add_argument("file", type=Path, nargs="?")
+    parser_trace.add_argument(
+        "--synthetic",
+        type=int,
+        metavar="DAYS",
+        help="replay a synthetic trace of the last DAYS days",
+    )
+    parser_trace.add_argument("--json", type=Path, help="write the result to a file")
+    parser_trace.set_defaults(func=run_trace)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
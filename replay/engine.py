@@ -0,0 +1,261 @@
+"""Accelerated replay of a trace through the coordinator
+
+The real EVSmartChargingCoordinator runs in a minimal Home Assistant instance.
+The clock is virtual and jumps from one event or full hour to the next, so
+a month of history is replayed in seconds. The price, SOC and charger
+entities are set up by replay/fixtures.py. The charger follows the commands
+from the coordinator.
+"""
+
+from datetime import datetime, timedelta
+import tempfile
+import time
+from typing import Any, Callable
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    EVENT_CALL_SERVICE,
+    SERVICE_TURN_OFF,
+    SERVICE_TURN_ON,
+    STATE_OFF,
+    STATE_ON,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from custom_components.ev_smart_charging.const import (
+    DOMAIN,
+    SWITCH,
+    TRIGGER_HOURLY,
+)
+from custom_components.ev_smart_charging.coordinator import EVSmartChargingCoordinator
+from replay.fixtures import (
+    CHARGER_ENTITY_ID,
+    REPLAY_CONFIG,
+    async_create_hass,
+    create_entities,
+    fire_time_changed,
+    set_charger,
+    set_prices,
+    set_soc,
+    set_target_soc,
+    virtual_clock,
+)
+from replay.trace import get_events
+
+
+def get_local_prices(stored: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Get prices with local datetimes, as the Nordpool integration has them"""
+    if stored is None:
+        return None
+    return [
+        {
+            "start": dt_util.as_local(dt_util.parse_datetime(item["start"])),
+            "end": dt_util.as_local(dt_util.parse_datetime(item["end"])),
+            "value": item["value"],
+        }
+        for item in stored
+    ]
+
+
+def get_cost(
+    commands: list[dict[str, Any]],
+    prices: dict[datetime, dict[str, Any]],
+    end: datetime,
+) -> tuple[float, float]:
+    """Get the hours with the charger on, and the sum of price * hours"""
+
+    hours = 0.0
+    cost = 0.0
+    time_on = None
+    periods = []
+    for command in commands:
+        if command["service"] == SERVICE_TURN_ON and time_on is None:
+            time_on = command["time"]
+        elif command["service"] == SERVICE_TURN_OFF and time_on is not None:
+            periods.append((time_on, command["time"]))
+            time_on = None
+    if time_on is not None:
+        periods.append((time_on, end))
+
+    for period_start, period_end in periods:
+        hours = hours + (period_end - period_start) / timedelta(hours=1)
+        for item in prices.values():
+            overlap = min(period_end, item["end"]) - max(period_start, item["start"])
+            if overlap > timedelta(0):
+                cost = cost + item["value"] * (overlap / timedelta(hours=1))
+    return hours, cost
+
+
+class ReplayEngine:
+    """Replay a trace through the coordinator"""
+
+    def __init__(self, trace: dict[str, Any]) -> None:
+        self.trace = trace
+        self.events = get_events(trace)
+        self.hass: HomeAssistant = None
+        self.coordinator: EVSmartChargingCoordinator = None
+        self.charger = CHARGER_ENTITY_ID
+        self.prices: dict[datetime, dict[str, Any]] = {}
+        self.price_state = (None, None)
+        self.decisions: list[dict[str, Any]] = []
+        self.commands: list[dict[str, Any]] = []
+        self.unsubscribe_commands: Callable[[], None] = None
+
+    def get_steps(self, start: datetime, end: datetime) -> list[tuple]:
+        """Get the events and the full hours, in time order"""
+
+        steps = [(event["time"], 1, event) for event in self.events]
+        hour = start.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        while hour <= end:
+            steps.append((hour, 0, None))
+            hour = hour + timedelta(hours=1)
+        return [(step[0], step[2]) for step in sorted(steps, key=lambda s: s[:2])]
+
+    @callback
+    def record_command(self, event: Event):
+        """Record switch service calls for the charger"""
+        entity_id = event.data["service_data"].get(ATTR_ENTITY_ID)
+        if isinstance(entity_id, list):
+            entity_id = entity_id[0] if len(entity_id) == 1 else None
+        if event.data["domain"] != SWITCH or entity_id != self.charger:
+            return
+        service = event.data["service"]
+        self.commands.append({"time": dt_util.utcnow(), "service": service})
+        set_charger(self.hass, STATE_ON if service == SERVICE_TURN_ON else STATE_OFF)
+
+    def set_prices(self, raw_today: list, raw_tomorrow: list):
+        """Publish prices, with the current price at the current time"""
+        self.price_state = (raw_today, raw_tomorrow)
+        for item in (raw_today or []) + (raw_tomorrow or []):
+            self.prices[item["start"]] = item
+        set_prices(self.hass, raw_today, raw_tomorrow)
+
+    async def apply_event(self, event: dict[str, Any]):
+        """Apply one event of the trace"""
+        if "price" in event:
+            self.set_prices(
+                get_local_prices(event["price"].get("raw_today")),
+                get_local_prices(event["price"].get("raw_tomorrow")),
+            )
+        if "soc" in event:
+            set_soc(self.hass, event["soc"])
+        if "target_soc" in event:
+            set_target_soc(self.hass, event["target_soc"])
+        if "switch" in event:
+            update = getattr(self.coordinator, f"switch_{event['switch']}_update")
+            await update(event["state"])
+
+    def record_decision(self, trigger: str):
+        """Record the state of the coordinator, if it has changed"""
+        scheduler = self.coordinator.scheduler
+        decision = {
+            "auto_charging_state": self.coordinator.auto_charging_state,
+            "status": self.coordinator.sensor_status.native_value,
+            "charging_start_time": scheduler.get_charging_start_time(),
+            "charging_stop_time": scheduler.get_charging_stop_time(),
+            "charging_number_of_hours": scheduler.get_charging_number_of_hours(),
+        }
+        if self.decisions and all(
+            self.decisions[-1][key] == value for key, value in decision.items()
+        ):
+            return
+        self.decisions.append(
+            {
+                "time": dt_util.utcnow(),
+                "trigger": trigger,
+                "current_price": self.coordinator.sensor.current_price,
+            }
+            | decision
+        )
+
+    async def async_setup(self, config_dir: str):
+        """Set up Home Assistant, the input entities and the config entry"""
+
+        self.hass = await async_create_hass(
+            config_dir, self.trace.get("time_zone", "UTC")
+        )
+
+        initial = self.trace.get("initial", {})
+        create_entities(
+            self.hass, initial.get("soc", 50), initial.get("target_soc", 80)
+        )
+
+        config_entry = ConfigEntry(
+            version=5,
+            domain=DOMAIN,
+            title="Replay",
+            data=REPLAY_CONFIG | self.trace.get("config", {}),
+            source="user",
+            entry_id="replay",
+        )
+        await self.hass.config_entries.async_add(config_entry)
+        await self.hass.async_block_till_done()
+        self.coordinator = self.hass.data[DOMAIN][config_entry.entry_id]
+
+        for switch, state in initial.get("switches", {}).items():
+            await getattr(self.coordinator, f"switch_{switch}_update")(state)
+        self.unsubscribe_commands = self.hass.bus.async_listen(
+            EVENT_CALL_SERVICE, self.record_command
+        )
+        await self.hass.async_block_till_done()
+
+    async def async_run(self) -> dict[str, Any]:
+        """Replay the trace"""
+
+        wall_time_start = time.perf_counter()
+        start = self.events[0]["time"] if self.events else dt_util.utcnow()
+        end = start
+        if self.trace.get("end"):
+            end = dt_util.parse_datetime(self.trace["end"])
+        elif self.events:
+            end = self.events[-1]["time"]
+
+        with virtual_clock(start) as clock, tempfile.TemporaryDirectory() as tmp:
+            await self.async_setup(tmp)
+            for step_time, event in self.get_steps(start, end):
+                clock.move_to(step_time)
+                fire_time_changed(self.hass)
+                if event is None:
+                    # The price entity updates the current price every hour
+                    self.set_prices(*self.price_state)
+                    trigger = TRIGGER_HOURLY
+                else:
+                    await self.apply_event(event)
+                    trigger = ", ".join(
+                        key for key in event if key not in ["time", "state"]
+                    )
+                await self.hass.async_block_till_done()
+                self.record_decision(trigger)
+            # Nothing of the replay is stored
+            self.unsubscribe_commands()
+            await self.hass.config_entries.async_remove(
+                self.coordinator.config_entry.entry_id
+            )
+            await self.hass.async_stop(force=True)
+
+        charging_hours, cost = get_cost(self.commands, self.prices, end)
+        return {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "decisions": [
+                {
+                    key: value.isoformat() if isinstance(value, datetime) else value
+                    for key, value in decision.items()
+                }
+                for decision in self.decisions
+            ],
+            "charger_commands": [
+                {"time": command["time"].isoformat(), "service": command["service"]}
+                for command in self.commands
+            ],
+            "charging_hours": round(charging_hours, 3),
+            "cost": round(cost, 3),
+            "wall_time_s": round(time.perf_counter() - wall_time_start, 3),
+        }
+
+
+async def async_replay_trace(trace: dict[str, Any]) -> dict[str, Any]:
+    """Replay a trace and get the decision timeline, charger commands and cost"""
+    return await ReplayEngine(trace).async_run()
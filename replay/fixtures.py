@@ -0,0 +1,178 @@
+"""Home Assistant instance, entities and virtual clock for the replay
+
+The replay runs the real integration in a minimal Home Assistant instance.
+The price, SOC, target SOC and charger entities only hold the states that
+are set by the replay engine.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import time
+from typing import Any, Iterator
+from unittest.mock import patch
+
+from freezegun import freeze_time
+from freezegun.api import FrozenDateTimeFactory, real_datetime
+from homeassistant import auth, bootstrap, config_entries
+from homeassistant.auth import auth_store
+from homeassistant.const import STATE_OFF
+from homeassistant.core import CoreState, HomeAssistant, callback
+from homeassistant.helpers import (
+    area_registry,
+    device_registry,
+    entity,
+    entity_registry,
+    event as event_helper,
+    issue_registry,
+)
+from homeassistant.helpers.entity_registry import EntityRegistry
+from homeassistant.util import dt as dt_util
+
+from custom_components.ev_smart_charging.const import (
+    CONF_CHARGER_ENTITY,
+    CONF_DEVICE_NAME,
+    CONF_EV_CONTROLLED,
+    CONF_EV_SOC_SENSOR,
+    CONF_EV_TARGET_SOC_SENSOR,
+    CONF_MAX_PRICE,
+    CONF_MIN_SOC,
+    CONF_OPPORTUNISTIC_LEVEL,
+    CONF_PCT_PER_HOUR,
+    CONF_PRICE_SENSOR,
+    CONF_READY_HOUR,
+    CONF_START_HOUR,
+    PLATFORM_NORDPOOL,
+    PLATFORM_OCPP,
+    PLATFORM_VW,
+    SENSOR,
+    SWITCH,
+)
+from custom_components.ev_smart_charging.helpers.coordinator import Raw
+
+PRICE_ENTITY_ID = "sensor.nordpool_kwh_se3_sek_2_10_0"
+SOC_ENTITY_ID = "sensor.volkswagen_we_connect_id_state_of_charge"
+TARGET_SOC_ENTITY_ID = "sensor.volkswagen_we_connect_id_target_state_of_charge"
+CHARGER_ENTITY_ID = "switch.ocpp_charge_control"
+
+REPLAY_CONFIG = {
+    CONF_DEVICE_NAME: "EV Smart Charging",
+    CONF_PRICE_SENSOR: PRICE_ENTITY_ID,
+    CONF_EV_SOC_SENSOR: SOC_ENTITY_ID,
+    CONF_EV_TARGET_SOC_SENSOR: TARGET_SOC_ENTITY_ID,
+    CONF_CHARGER_ENTITY: CHARGER_ENTITY_ID,
+    CONF_EV_CONTROLLED: False,
+    CONF_PCT_PER_HOUR: 6.0,
+    CONF_START_HOUR: "None",
+    CONF_READY_HOUR: "08:00",
+    CONF_MAX_PRICE: 0.0,
+    CONF_OPPORTUNISTIC_LEVEL: 50.0,
+    CONF_MIN_SOC: 30.0,
+}
+
+
+def create_entities(hass: HomeAssistant, soc: float, target_soc: float) -> None:
+    """Register the input entities and set their initial states"""
+
+    registry: EntityRegistry = entity_registry.async_get(hass)
+    registry.async_get_or_create(
+        domain=SENSOR, platform=PLATFORM_NORDPOOL, unique_id="kwh_se3_sek_2_10_0"
+    )
+    registry.async_get_or_create(
+        domain=SENSOR, platform=PLATFORM_VW, unique_id="state_of_charge"
+    )
+    registry.async_get_or_create(
+        domain=SENSOR, platform=PLATFORM_VW, unique_id="target_state_of_charge"
+    )
+    registry.async_get_or_create(
+        domain=SWITCH, platform=PLATFORM_OCPP, unique_id="charge_control"
+    )
+    set_prices(hass, None, None)
+    set_soc(hass, soc)
+    set_target_soc(hass, target_soc)
+    set_charger(hass, STATE_OFF)
+
+
+def set_prices(hass: HomeAssistant, raw_today: list, raw_tomorrow: list) -> None:
+    """Set the prices, with the current price at the current time"""
+
+    price = "unavailable"
+    for raw in (raw_today, raw_tomorrow):
+        if value := Raw(raw).get_value(dt_util.now()):
+            price = value
+    hass.states.async_set(
+        PRICE_ENTITY_ID,
+        f"{price}",
+        {
+            "current_price": price,
+            "raw_today": raw_today,
+            "raw_tomorrow": raw_tomorrow,
+        },
+    )
+
+
+def set_soc(hass: HomeAssistant, soc: Any) -> None:
+    """Set the SOC of the EV"""
+    hass.states.async_set(SOC_ENTITY_ID, f"{soc}")
+
+
+def set_target_soc(hass: HomeAssistant, target_soc: Any) -> None:
+    """Set the target SOC of the EV"""
+    hass.states.async_set(TARGET_SOC_ENTITY_ID, f"{target_soc}")
+
+
+def set_charger(hass: HomeAssistant, state: str) -> None:
+    """Set the state of the charger switch"""
+    hass.states.async_set(CHARGER_ENTITY_ID, state)
+
+
+async def async_create_hass(config_dir: str, time_zone: str) -> HomeAssistant:
+    """Create a running Home Assistant instance with empty registries"""
+
+    hass = HomeAssistant()
+    hass.auth = auth.AuthManager(hass, auth_store.AuthStore(hass), {}, {})
+    hass.config.config_dir = config_dir
+    hass.config.skip_pip = True
+    hass.config.set_time_zone(time_zone)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    entity.async_setup(hass)
+    await asyncio.gather(
+        area_registry.async_load(hass),
+        device_registry.async_load(hass),
+        entity_registry.async_load(hass),
+        issue_registry.async_load(hass),
+    )
+    hass.data[bootstrap.DATA_REGISTRIES_LOADED] = None
+    hass.state = CoreState.running
+    return hass
+
+
+def _utcnow() -> datetime:
+    """Get the virtual time, as a plain datetime that can be stored as JSON"""
+    return real_datetime.fromtimestamp(time.time(), timezone.utc)
+
+
+@contextmanager
+def virtual_clock(start: datetime) -> Iterator[FrozenDateTimeFactory]:
+    """Freeze the clock at start, until it is moved by the replay
+
+    dt_util.utcnow is bound to the native datetime.now, which freezegun
+    cannot replace, so it is patched while the replay runs."""
+
+    with freeze_time(start) as frozen, patch.object(
+        dt_util, "utcnow", _utcnow
+    ), patch.object(event_helper, "time_tracker_utcnow", _utcnow):
+        yield frozen
+
+
+@callback
+def fire_time_changed(hass: HomeAssistant) -> None:
+    """Run the timers that are due at the virtual time"""
+
+    for handle in list(hass.loop._scheduled):  # pylint: disable=protected-access
+        if not isinstance(handle, asyncio.TimerHandle) or handle.cancelled():
+            continue
+        if handle.when() <= hass.loop.time():
+            handle._run()  # pylint: disable=protected-access
+            handle.cancel()
@@ -0,0 +1,120 @@
+"""Trace format for the replay engine
+
+A trace is a dict that can be stored as JSON:
+
+    {
+        "version": 1,
+        "time_zone": "Europe/Stockholm",
+        "config": {"pct_per_hour": 6.0, "ready_hour": "08:00"},
+        "initial": {
+            "soc": 50,
+            "target_soc": 80,
+            "switches": {"active": true, "ev_connected": true}
+        },
+        "end": "2022-10-31T00:00:00+01:00",
+        "events": [
+            {"time": "...", "price": {"raw_today": [...], "raw_tomorrow": [...]}},
+            {"time": "...", "soc": 45},
+            {"time": "...", "target_soc": 90},
+            {"time": "...", "switch": "continuous", "state": false}
+        ]
+    }
+
+Prices are lists of {"start": ..., "end": ..., "value": ...} with times in
+ISO format. "config" overrides the configuration of the config entry.
+"""
+
+from datetime import date, datetime, time, timedelta
+import random
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from benchmarks.prices import get_prices, local_midnight
+from custom_components.ev_smart_charging.helpers.coordinator import (
+    get_charging_stored,
+)
+
+TRACE_VERSION = 1
+SWITCHES = [
+    "active",
+    "apply_limit",
+    "continuous",
+    "ev_connected",
+    "keep_on",
+    "opportunistic",
+]
+
+
+def get_events(trace: dict[str, Any]) -> list[dict[str, Any]]:
+    """Get the events of a trace, sorted and with the time as datetime"""
+
+    if trace.get("version") != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version {trace.get('version')}")
+
+    events = []
+    for event in trace["events"]:
+        event = dict(event)
+        event["time"] = dt_util.parse_datetime(event["time"])
+        if "switch" in event and event["switch"] not in SWITCHES:
+            raise ValueError(f"Unknown switch {event['switch']}")
+        events.append(event)
+    return sorted(events, key=lambda event: event["time"])
+
+
+def get_synthetic_trace(first_day: date, days: int, seed: int = 0) -> dict[str, Any]:
+    """Create a trace with synthetic prices and a daily commute
+
+    Tomorrow's prices are published at 13:00. The EV leaves at 07:30 and
+    returns at 17:30 with a lower SOC."""
+
+    rnd = random.Random(seed)
+    prices = get_prices(first_day, days + 1, seed=seed)
+    events = []
+    for day_number in range(days):
+        day = first_day + timedelta(days=day_number)
+        midnight = local_midnight(day)
+        next_midnight = local_midnight(day + timedelta(days=1))
+        day_after = local_midnight(day + timedelta(days=2))
+        raw_today = [
+            item for item in prices if midnight <= item["start"] < next_midnight
+        ]
+        raw_tomorrow = [
+            item for item in prices if next_midnight <= item["start"] < day_after
+        ]
+
+        def at_local(hour: int, minute: int = 0) -> str:
+            return datetime.combine(
+                day, time(hour, minute), tzinfo=dt_util.DEFAULT_TIME_ZONE
+            ).isoformat()
+
+        events.append(
+            {
+                "time": midnight.isoformat(),
+                "price": {"raw_today": get_charging_stored(raw_today)},
+            }
+        )
+        events.append({"time": at_local(7, 30), "soc": 80})
+        events.append(
+            {
+                "time": at_local(13),
+                "price": {
+                    "raw_today": get_charging_stored(raw_today),
+                    "raw_tomorrow": get_charging_stored(raw_tomorrow),
+                },
+            }
+        )
+        events.append({"time": at_local(17, 30), "soc": rnd.randint(30, 60)})
+
+    return {
+        "version": TRACE_VERSION,
+        "time_zone": str(dt_util.DEFAULT_TIME_ZONE),
+        "config": {},
+        "initial": {
+            "soc": 50,
+            "target_soc": 80,
+            "switches": {"active": True, "ev_connected": True},
+        },
+        "end": local_midnight(first_day + timedelta(days=days)).isoformat(),
+        "events": events,
+    }
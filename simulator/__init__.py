@@ -0,0 +1 @@
+"""Charging cost simulator for ev_smart_charging integration."""
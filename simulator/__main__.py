@@ -0,0 +1,152 @@
+"""Sweep charging parameters over a long price history
+
+Run from the repository root:
+
+    python -m simulator --prices prices.json
+    python -m simulator --synthetic 365 --pct-per-hour 5 8 --max-price 0 150
+
+The price file is a JSON list of {"start": ..., "end": ..., "value": ...}
+with hourly prices and times in ISO format, or a CSV file with the columns
+start and value. The results are written as JSON. The combinations with the
+fewest sessions below the target SOC come first, then the lowest average price.
+"""
+
+import argparse
+import csv
+from datetime import timedelta
+import json
+import os
+from pathlib import Path
+import sys
+import time
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from benchmarks.prices import get_prices
+from simulator.model import Sessions, get_combinations, sweep
+
+
+def read_prices(file: Path) -> list[dict[str, Any]]:
+    """Read prices from a JSON or CSV file"""
+
+    if file.suffix == ".csv":
+        with file.open(encoding="utf-8", newline="") as csv_file:
+            rows = list(csv.DictReader(csv_file))
+        prices = []
+        for row in rows:
+            start = dt_util.parse_datetime(row["start"])
+            prices.append(
+                {
+                    "start": start,
+                    "end": start + timedelta(hours=1),
+                    "value": float(row["value"]),
+                }
+            )
+        return prices
+
+    return [
+        {
+            "start": dt_util.parse_datetime(item["start"]),
+            "end": dt_util.parse_datetime(item["end"]),
+            "value": item["value"],
+        }
+        for item in json.loads(file.read_text(encoding="utf-8"))
+    ]
+
+
+def main(argv: list[str] = None) -> int:
+    """Run the simulator from the command line"""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m simulator", description=__doc__.splitlines()[0]
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--prices", type=Path, help="JSON or CSV file with prices")
+    source.add_argument(
+        "--synthetic", type=int, metavar="DAYS", help="use DAYS of synthetic prices"
+    )
+    parser.add_argument("--time-zone", default="Europe/Stockholm")
+    parser.add_argument("--arrival-hour", type=int, default=17)
+    parser.add_argument(
+        "--arrival-soc",
+        type=int,
+        nargs=2,
+        default=[30, 60],
+        metavar=("MIN", "MAX"),
+        help="the arrival SOC is random between MIN and MAX",
+    )
+    parser.add_argument("--target-soc", type=float, default=80.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pct-per-hour", type=float, nargs="+", default=[6.0])
+    parser.add_argument("--ready-hour", type=int, nargs="+", default=[7, 8])
+    parser.add_argument(
+        "--continuous", type=int, nargs="+", choices=[0, 1], default=[0, 1]
+    )
+    parser.add_argument(
+        "--max-price",
+        type=float,
+        nargs="+",
+        default=[0.0],
+        help="price limits, 0 means no limit",
+    )
+    parser.add_argument(
+        "--opportunistic-level",
+        type=int,
+        nargs="+",
+        default=[0],
+        help="opportunistic levels, 0 means off",
+    )
+    parser.add_argument("--opportunistic-percentile", type=int, default=0)
+    parser.add_argument("--min-soc", type=float, nargs="+", default=[0.0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--top", type=int, help="only output the cheapest results")
+    parser.add_argument("--json", type=Path, help="write the results to a file")
+    args = parser.parse_args(argv)
+
+    dt_util.set_default_time_zone(dt_util.get_time_zone(args.time_zone))
+    if args.prices:
+        prices = read_prices(args.prices)
+    else:
+        first_day = dt_util.now().date() - timedelta(days=args.synthetic)
+        prices = get_prices(first_day, args.synthetic, seed=args.seed)
+
+    start = time.perf_counter()
+    sessions = Sessions(
+        prices, args.arrival_hour, args.arrival_soc, args.target_soc, args.seed
+    )
+    combinations = get_combinations(
+        {
+            "charging_pct_per_hour": args.pct_per_hour,
+            "ready_hour": args.ready_hour,
+            "continuous": [bool(value) for value in args.continuous],
+            "max_price": args.max_price,
+            "opportunistic_level": args.opportunistic_level,
+            "min_soc": args.min_soc,
+        }
+    )
+    for combination in combinations:
+        combination["opportunistic_percentile"] = args.opportunistic_percentile
+    results = sweep(sessions, combinations, args.workers)
+    results.sort(
+        key=lambda result: (result["unmet_sessions"], result["average_price"] or 0)
+    )
+    duration = time.perf_counter() - start
+
+    output = json.dumps(
+        {
+            "days": len(sessions.days),
+            "combinations": len(combinations),
+            "duration_s": round(duration, 3),
+            "results": results[: args.top] if args.top else results,
+        },
+        indent=2,
+    )
+    if args.json:
+        args.json.write_text(output + "\n", encoding="utf-8")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Vectorized model of the charging schedule over long price histories
+
+There is one charging session per day. The EV is connected at the arrival
+hour with an arrival SOC, and must be ready at the ready hour the next day.
+The schedule is planned once, at arrival, with the prices known then.
+Tomorrow's prices are known from PRICES_PUBLISHED_HOUR.
+
+The hours are selected with the same rules as the Scheduler in
+custom_components/ev_smart_charging/helpers/coordinator.py:
+
+- get_charging_hours() gives the number of hours, at most 24
+- non-continuous charging uses the cheapest hours of the window, and
+  continuous charging the cheapest run of hours (get_lowest_hours())
+- with a price limit, hours above the limit are not used
+  (get_charging_update())
+- if that gives fewer hours than needed for the minimum SOC, the minimum SOC
+  schedule, without price limit, is used (Scheduler.get_schedule())
+- opportunistic charging lowers the price limit to max_price * level / 100
+  if the last known price, or a percentile of the known prices, is below
+  that (EVSmartChargingCoordinator.get_scheduling_params())
+
+All sessions of one combination of parameters are evaluated at once, as
+arrays with one row per session and one column per hour of the window.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from itertools import product
+from typing import Any
+
+import numpy as np
+
+from homeassistant.util import dt as dt_util
+
+PRICES_PUBLISHED_HOUR = 13
+# Parameters of a combination, in the order of the sweep
+PARAMETERS = [
+    "charging_pct_per_hour",
+    "ready_hour",
+    "continuous",
+    "max_price",
+    "opportunistic_level",
+    "min_soc",
+]
+
+
+def get_price_array(prices: list[dict[str, Any]]) -> tuple[datetime, np.ndarray]:
+    """Get the first hour, in UTC, and an array with one price per hour
+
+    Missing hours are NaN."""
+
+    if not prices:
+        raise ValueError("No prices")
+    prices = sorted(prices, key=lambda item: item["start"])
+    first = dt_util.as_utc(prices[0]["start"])
+    last = dt_util.as_utc(prices[-1]["start"])
+    values = np.full(int((last - first) / timedelta(hours=1)) + 1, np.nan)
+    for item in prices:
+        if item["end"] - item["start"] != timedelta(hours=1):
+            raise ValueError("Only hourly prices are supported")
+        index = (dt_util.as_utc(item["start"]) - first) / timedelta(hours=1)
+        if index != int(index):
+            raise ValueError(f"Price not at a full hour: {item['start']}")
+        values[int(index)] = item["value"]
+    return first, values
+
+
+def get_local_time(day: date, hour: int) -> datetime:
+    """Get the local time of an hour of a day, in UTC. Hour 24 is next midnight"""
+    return dt_util.as_utc(
+        datetime.combine(
+            day + timedelta(days=hour // 24),
+            time(hour % 24),
+            tzinfo=dt_util.DEFAULT_TIME_ZONE,
+        )
+    )
+
+
+class Sessions:
+    """Daily charging sessions and the prices known at arrival"""
+
+    def __init__(
+        self,
+        prices: list[dict[str, Any]],
+        arrival_hour: int,
+        arrival_soc: tuple[int, int],
+        target_soc: float,
+        seed: int = 0,
+    ) -> None:
+        self.first, self.values = get_price_array(prices)
+        self.arrival_hour = arrival_hour
+        self.target_soc = target_soc
+
+        first_day = dt_util.as_local(self.first).date()
+        last_day = dt_util.as_local(
+            self.first + timedelta(hours=len(self.values))
+        ).date()
+        days = []
+        day = first_day
+        while day < last_day:
+            if self.get_index(get_local_time(day, 0)) >= 0:
+                days.append(day)
+            day = day + timedelta(days=1)
+        self.days = days
+
+        # Hour indexes of the start of today, the arrival and the end of the
+        # known prices, for each session
+        self.today = np.array(
+            [self.get_index(get_local_time(d, 0)) for d in days], dtype=int
+        )
+        self.arrival = np.array(
+            [self.get_index(get_local_time(d, arrival_hour)) for d in days], dtype=int
+        )
+        known_days = 2 if arrival_hour >= PRICES_PUBLISHED_HOUR else 1
+        known_end = np.array(
+            [self.get_index(get_local_time(d, 24 * known_days)) for d in days],
+            dtype=int,
+        )
+        # The last sessions are skipped if the prices they need are missing
+        self.complete = known_end <= len(self.values)
+        self.known_end = np.minimum(known_end, len(self.values))
+
+        rng = np.random.default_rng(seed)
+        self.soc = rng.integers(arrival_soc[0], arrival_soc[1] + 1, len(days)).astype(
+            float
+        )
+
+        self.windows: dict[int, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self.reference: dict[int, np.ndarray] = {}
+
+    def get_index(self, time_utc: datetime) -> int:
+        """Get the index of the price of an hour"""
+        return int((time_utc - self.first) / timedelta(hours=1))
+
+    def get_window(self, ready_hour: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the prices from arrival to ready hour, the window lengths and
+        which sessions have all prices
+
+        The prices are padded with 0.0 after the end of each window."""
+
+        if ready_hour not in self.windows:
+            ready = np.array(
+                [self.get_index(get_local_time(d, 24 + ready_hour)) for d in self.days],
+                dtype=int,
+            )
+            length = np.maximum(np.minimum(ready, self.known_end) - self.arrival, 0)
+            columns = np.arange(max(length.max(initial=0), 1))
+            inside = columns < length[:, None]
+            index = np.clip(self.arrival[:, None] + columns, 0, len(self.values) - 1)
+            prices = np.where(inside, self.values[index], 0.0)
+            valid = self.complete & (length > 0) & ~np.isnan(prices).any(axis=1)
+            self.windows[ready_hour] = (np.nan_to_num(prices), length, valid)
+        return self.windows[ready_hour]
+
+    def get_reference_price(self, percentile: int) -> np.ndarray:
+        """Get the price compared with the opportunistic level
+
+        The last known price, or a percentile of the known prices."""
+
+        if percentile not in self.reference:
+            if percentile > 0:
+                columns = np.arange((self.known_end - self.today).max(initial=0))
+                index = np.clip(self.today[:, None] + columns, 0, len(self.values) - 1)
+                known = np.where(
+                    columns < (self.known_end - self.today)[:, None],
+                    self.values[index],
+                    np.nan,
+                )
+                self.reference[percentile] = np.nanpercentile(known, percentile, axis=1)
+            else:
+                self.reference[percentile] = self.values[self.known_end - 1]
+        return self.reference[percentile]
+
+
+def get_charging_hours(
+    soc: np.ndarray, target_soc: float, charging_pct_per_hour: float
+) -> np.ndarray:
+    """Get the number of charging hours, as get_charging_hours()"""
+    return np.ceil(np.clip((target_soc - soc) / charging_pct_per_hour, 0, 24)).astype(
+        int
+    )
+
+
+def get_selected(
+    prices: np.ndarray, length: np.ndarray, hours: np.ndarray, continuous: bool
+) -> np.ndarray:
+    """Get a mask of the selected hours, as get_lowest_hours()"""
+
+    columns = np.arange(prices.shape[1])
+    inside = columns < length[:, None]
+    hours = np.minimum(hours, length)
+
+    if not continuous:
+        padded = np.where(inside, prices, np.inf)
+        order = np.argsort(padded, axis=1, kind="stable")
+        selected = np.zeros(prices.shape, dtype=bool)
+        np.put_along_axis(selected, order, columns < hours[:, None], axis=1)
+        return selected
+
+    # cumulative[:, i] is the sum of the first i prices of the window
+    cumulative = np.zeros((prices.shape[0], prices.shape[1] + 1))
+    np.cumsum(prices, axis=1, out=cumulative[:, 1:])
+    end = np.minimum(columns + hours[:, None], prices.shape[1])
+    sums = np.take_along_axis(cumulative, end, axis=1) - cumulative[:, :-1]
+    sums = np.where(columns + hours[:, None] <= length[:, None], sums, np.inf)
+    start = np.argmin(sums, axis=1)
+    return (columns >= start[:, None]) & (columns < (start + hours)[:, None])
+
+
+def evaluate(sessions: Sessions, combination: dict[str, Any]) -> dict[str, Any]:
+    """Evaluate one combination of parameters over all sessions"""
+
+    prices, length, valid = sessions.get_window(combination["ready_hour"])
+    prices, length = prices[valid], length[valid]
+    soc = sessions.soc[valid]
+    pct = combination["charging_pct_per_hour"]
+    continuous = combination["continuous"]
+
+    needed = get_charging_hours(soc, sessions.target_soc, pct)
+    selected = get_selected(prices, length, needed, continuous)
+
+    max_price = np.full(len(soc), float(combination["max_price"]))
+    if combination["opportunistic_level"] > 0:
+        opportunistic_price = max_price * combination["opportunistic_level"] / 100.0
+        reference = sessions.get_reference_price(
+            combination.get("opportunistic_percentile", 0)
+        )[valid]
+        max_price = np.where(
+            reference < opportunistic_price, opportunistic_price, max_price
+        )
+    limited = selected & ~((prices > max_price[:, None]) & (max_price[:, None] > 0.0))
+
+    if combination["min_soc"] > 0:
+        selected_min_soc = get_selected(
+            prices,
+            length,
+            get_charging_hours(soc, combination["min_soc"], pct),
+            continuous,
+        )
+        use_min_soc = limited.sum(axis=1) < selected_min_soc.sum(axis=1)
+        limited = np.where(use_min_soc[:, None], selected_min_soc, limited)
+
+    hours = limited.sum(axis=1)
+    cost = (prices * limited).sum(axis=1)
+    # Compared with charging the same number of hours as soon as possible
+    cumulative = np.zeros((prices.shape[0], prices.shape[1] + 1))
+    np.cumsum(prices, axis=1, out=cumulative[:, 1:])
+    asap_cost = np.take_along_axis(cumulative, hours[:, None], axis=1)[:, 0]
+    shortfall = np.maximum(sessions.target_soc - np.minimum(soc + hours * pct, 100), 0)
+    unmet = shortfall > 0
+
+    total_hours = int(hours.sum())
+    total_cost = float(cost.sum())
+    total_asap_cost = float(asap_cost.sum())
+    return combination | {
+        "sessions": int(len(soc)),
+        "charging_hours": total_hours,
+        "cost": round(total_cost, 2),
+        "average_price": round(total_cost / total_hours, 3) if total_hours else None,
+        "savings": round(total_asap_cost - total_cost, 2),
+        "savings_pct": (
+            round((total_asap_cost - total_cost) / total_asap_cost * 100, 2)
+            if total_asap_cost
+            else None
+        ),
+        "unmet_sessions": int(unmet.sum()),
+        "unmet_ratio": round(float(unmet.mean()), 4) if len(soc) else None,
+        "mean_shortfall_pct": (
+            round(float(shortfall[unmet].mean()), 2) if unmet.any() else 0.0
+        ),
+        "max_shortfall_pct": round(float(shortfall.max(initial=0.0)), 2),
+    }
+
+
+def get_combinations(grid: dict[str, list]) -> list[dict[str, Any]]:
+    """Get all combinations of the parameter values in grid"""
+    return [
+        dict(zip(PARAMETERS, values))
+        for values in product(*(grid[parameter] for parameter in PARAMETERS))
+    ]
+
+
+_WORKER_SESSIONS: Sessions = None
+
+
+def _init_worker(sessions: Sessions, time_zone: str):
+    """Set up a worker process"""
+    global _WORKER_SESSIONS  # pylint: disable=global-statement
+    dt_util.set_default_time_zone(dt_util.get_time_zone(time_zone))
+    _WORKER_SESSIONS = sessions
+
+
+def _evaluate_in_worker(combination: dict[str, Any]) -> dict[str, Any]:
+    """Evaluate a combination in a worker process"""
+    return evaluate(_WORKER_SESSIONS, combination)
+
+
+def sweep(
+    sessions: Sessions, combinations: list[dict[str, Any]], workers: int = 1
+) -> list[dict[str, Any]]:
+    """Evaluate all combinations, in worker processes if workers > 1"""
+
+    if workers <= 1:
+        return [evaluate(sessions, combination) for combination in combinations]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(sessions, str(dt_util.DEFAULT_TIME_ZONE)),
+    ) as executor:
+        chunksize = max(1, len(combinations) // (workers * 4))
+        return list(
+            executor.map(_evaluate_in_worker, combinations, chunksize=chunksize)
+        )
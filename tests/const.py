@@ -1,6 +1,7 @@
 """Constants for ev_smart_charging tests."""
 from custom_components.ev_smart_charging.const import (
     CONF_CHARGER_ENTITY,
+    CONF_CHARGER_POWER,
     CONF_DEVICE_NAME,
     CONF_EV_CONTROLLED,
     CONF_MAX_PRICE,
@@ -11,6 +12,7 @@ from custom_components.ev_smart_charging.const import (
     CONF_EV_TARGET_SOC_SENSOR,
     CONF_PCT_PER_HOUR,
     CONF_READY_HOUR,
+    CONF_SITE_POWER_LIMIT,
     CONF_START_HOUR,
     NAME,
 )
@@ -287,3 +289,8 @@ MOCK_CONFIG_EV_CONTROLLED = {
     CONF_OPPORTUNISTIC_LEVEL: 50.0,
     CONF_MIN_SOC: 30.0,
 }
+
+MOCK_CONFIG_FLEET = MOCK_CONFIG_ALL | {
+    CONF_CHARGER_POWER: 11.0,
+    CONF_SITE_POWER_LIMIT: 15.0,
+}
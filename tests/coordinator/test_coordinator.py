@@ -82,6 +82,7 @@ async def test_coordinator(
 
     assert coordinator.auto_charging_state == STATE_OFF
     assert coordinator.sensor.state == STATE_OFF
+    assert coordinator.startup_timing["first_schedule"] is not None
 
     # Move time to scheduled charging time
     freezer.move_to("2022-10-01T03:00:00+02:00")
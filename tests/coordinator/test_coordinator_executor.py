@@ -0,0 +1,74 @@
+"""Test ev_smart_charging coordinator."""
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.helpers.entity_registry import EntityRegistry
+from homeassistant.util import dt as dt_util
+
+from custom_components.ev_smart_charging import async_setup_entry, async_unload_entry
+from custom_components.ev_smart_charging.const import DOMAIN
+
+from tests.helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from tests.price import PRICE_20220930, PRICE_20221001
+from tests.const import MOCK_CONFIG_ALL
+
+
+# pylint: disable=unused-argument
+async def test_coordinator_executor(
+    hass: HomeAssistant, skip_service_calls, set_cet_timezone, freezer
+):
+    """Test that base schedules can be solved in the executor."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    with patch("custom_components.ev_smart_charging.coordinator.EXECUTOR_MIN_SLOTS", 0):
+        config_entry = MockConfigEntry(
+            domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test"
+        )
+        assert await async_setup_entry(hass, config_entry)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+        await coordinator.switch_active_update(True)
+        await coordinator.switch_apply_limit_update(False)
+        await coordinator.switch_continuous_update(True)
+        await coordinator.switch_ev_connected_update(True)
+        await coordinator.switch_keep_on_update(False)
+        await hass.async_block_till_done()
+
+        # Same schedule as when solved in the event loop
+        assert coordinator.instrumentation.executor["jobs"] > 0
+        assert coordinator.sensor.charging_start_time == datetime(
+            2022, 10, 1, 3, 0, tzinfo=dt_util.get_time_zone("Europe/Stockholm")
+        )
+        assert coordinator.sensor.charging_number_of_hours == 5
+
+        # The older of two concurrent updates is discarded
+        jobs = coordinator.instrumentation.executor["jobs"]
+        MockSOCEntity.set_state(hass, "75")
+        await asyncio.gather(coordinator.update_sensors(), coordinator.update_sensors())
+        await hass.async_block_till_done()
+        assert coordinator.instrumentation.executor["jobs"] >= jobs + 2
+        assert coordinator.instrumentation.executor["discarded"] >= 1
+        assert coordinator.sensor.charging_number_of_hours == 1
+
+    assert await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
@@ -0,0 +1,214 @@
+"""Test ev_smart_charging coordinator."""
+from datetime import datetime
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.helpers.entity_registry import EntityRegistry
+from homeassistant.util import dt as dt_util
+
+from custom_components.ev_smart_charging import async_setup_entry, async_unload_entry
+from custom_components.ev_smart_charging.const import (
+    DATA_FLEET,
+    DOMAIN,
+    DOMAIN_DATA,
+)
+from custom_components.ev_smart_charging.coordinator import (
+    EVSmartChargingCoordinator,
+)
+from custom_components.ev_smart_charging.helpers.fleet import FleetScheduler
+from custom_components.ev_smart_charging.helpers.replay import replay_snapshot
+from custom_components.ev_smart_charging.sensor import EVSmartChargingSensorCharging
+
+from tests.helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from tests.price import PRICE_20220930, PRICE_20221001
+from tests.const import MOCK_CONFIG_FLEET
+
+
+# pylint: disable=unused-argument
+async def test_coordinator_fleet(
+    hass: HomeAssistant, skip_service_calls, set_cet_timezone, freezer
+):
+    """Test two EVs sharing a site power limit."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    coordinators = []
+    for entry_id in ["ev1", "ev2"]:
+        config_entry = MockConfigEntry(
+            domain=DOMAIN, data=MOCK_CONFIG_FLEET, entry_id=entry_id, title=entry_id
+        )
+        config_entry.add_to_hass(hass)
+        assert await async_setup_entry(hass, config_entry)
+        await hass.async_block_till_done()
+        coordinators.append(hass.data[DOMAIN][entry_id])
+    fleet = hass.data[DOMAIN_DATA][DATA_FLEET]
+    assert all(coordinator.fleet is fleet for coordinator in coordinators)
+
+    for coordinator in coordinators:
+        await coordinator.switch_active_update(True)
+        await coordinator.switch_apply_limit_update(False)
+        await coordinator.switch_continuous_update(True)
+        await coordinator.switch_ev_connected_update(True)
+        await coordinator.switch_keep_on_update(False)
+    await hass.async_block_till_done()
+
+    # 11 kW each and 15 kW for the site, so the EVs take turns.
+    # Alone, both would charge 03:00-08:00.
+    blocks = [
+        coordinator.scheduler.get_charging_blocks() for coordinator in coordinators
+    ]
+    assert [len(block) for block in blocks] == [1, 1]
+    assert blocks[0][0]["start"] != blocks[1][0]["start"]
+    assert fleet.vehicles["ev1"].hours.isdisjoint(fleet.vehicles["ev2"].hours)
+    assert max(fleet.get_usage().values()) == 11.0
+    assert all(
+        coordinator.sensor.charging_number_of_hours == 5 for coordinator in coordinators
+    )
+
+    # The snapshot of a fleet member replays to the same schedule
+    for coordinator in coordinators:
+        snapshot = coordinator.get_snapshot()
+        replayed = replay_snapshot(snapshot, recalculate=True)
+        assert replayed["schedule"] == snapshot["result"]["schedule"]
+    assert snapshot["params"]["unavailable_hours"] == sorted(
+        hour.isoformat() for hour in fleet.vehicles["ev1"].hours
+    )
+
+    # When one EV is disconnected, the other gets the cheapest hours. It is
+    # updated without solving the fleet again.
+    solves = fleet.solves
+    await coordinators[0].switch_ev_connected_update(False)
+    await hass.async_block_till_done()
+    assert fleet.solves == solves + 1
+    assert fleet.vehicles["ev1"].hours == set()
+    assert coordinators[1].sensor.charging_start_time == datetime(
+        2022, 10, 1, 3, 0, tzinfo=dt_util.get_time_zone("Europe/Stockholm")
+    )
+    assert coordinators[1].instrumentation.triggers.get("fleet", 0) > 0
+
+    # Unloading leaves the fleet
+    assert await async_unload_entry(hass, coordinators[1].config_entry)
+    assert list(fleet.vehicles) == ["ev1"]
+    assert await async_unload_entry(hass, coordinators[0].config_entry)
+    await hass.async_block_till_done()
+
+
+async def create_fleet_coordinator(
+    hass: HomeAssistant, config_entry: MockConfigEntry, fleet: FleetScheduler
+) -> EVSmartChargingCoordinator:
+    """Create a coordinator in the fleet, with the switches in place"""
+    coordinator = EVSmartChargingCoordinator(hass, config_entry)
+    coordinator.join_fleet(fleet)
+    await coordinator.load_state()
+    sensor: EVSmartChargingSensorCharging = EVSmartChargingSensorCharging(config_entry)
+    await coordinator.add_sensor([sensor])
+    await coordinator.switch_active_update(True)
+    await coordinator.switch_apply_limit_update(False)
+    await coordinator.switch_continuous_update(True)
+    await coordinator.switch_ev_connected_update(True)
+    await coordinator.switch_keep_on_update(False)
+    await hass.async_block_till_done()
+    return coordinator
+
+
+async def test_coordinator_fleet_restore(
+    hass: HomeAssistant, hass_storage, skip_service_calls, set_cet_timezone, freezer
+):
+    """Test that restored schedules are kept apart after a restart."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entries = [
+        MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_FLEET, entry_id=entry_id)
+        for entry_id in ["ev1", "ev2"]
+    ]
+    fleet = FleetScheduler()
+    coordinators = [
+        await create_fleet_coordinator(hass, config_entry, fleet)
+        for config_entry in config_entries
+    ]
+    hours = {entry_id: vehicle.hours for entry_id, vehicle in fleet.vehicles.items()}
+    assert hours["ev1"].isdisjoint(hours["ev2"])
+
+    # Restart while one EV is charging. The SOC has not been updated.
+    freezer.move_to("2022-09-30T23:10:00+02:00")
+    for coordinator in coordinators:
+        await coordinator.update_sensors()
+    await hass.async_block_till_done()
+    assert [coordinator.auto_charging_state for coordinator in coordinators].count(
+        STATE_ON
+    ) == 1
+    for coordinator in coordinators:
+        await coordinator.store.async_save(coordinator.get_stored_data())
+    for coordinator in coordinators:
+        coordinator.leave_fleet()
+        coordinator.unsubscribe_listeners()
+
+    # Both EVs are planned from 23:00 when the switches are restored. The
+    # charging EV then gets its schedule from before the restart back, and
+    # the other EV is planned around it.
+    fleet = FleetScheduler()
+    coordinators = [
+        await create_fleet_coordinator(hass, config_entry, fleet)
+        for config_entry in config_entries
+    ]
+    for coordinator in coordinators:
+        await coordinator.restore_state()
+    await hass.async_block_till_done()
+
+    charging = [
+        coordinator
+        for coordinator in coordinators
+        if coordinator.auto_charging_state == STATE_ON
+    ]
+    assert len(charging) == 1
+    charging_id = charging[0].config_entry.entry_id
+    assert charging[0].scheduler.get_base_schedule_hours() == hours[charging_id]
+    for coordinator in coordinators:
+        entry_id = coordinator.config_entry.entry_id
+        assert (
+            fleet.vehicles[entry_id].hours
+            == coordinator.scheduler.get_base_schedule_hours()
+        )
+    assert fleet.vehicles["ev1"].hours.isdisjoint(fleet.vehicles["ev2"].hours)
+    assert max(fleet.get_usage().values()) == 11.0
+
+    # A demand change of the other EV keeps it out of the charging hours
+    other = next(
+        coordinator for coordinator in coordinators if coordinator not in charging
+    )
+    await other.switch_ev_connected_update(False)
+    await other.switch_ev_connected_update(True)
+    await hass.async_block_till_done()
+    current_hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+    assert {
+        hour for hour in hours[charging_id] if hour >= current_hour
+    } <= fleet.vehicles[charging_id].hours
+    assert fleet.vehicles["ev1"].hours.isdisjoint(fleet.vehicles["ev2"].hours)
+    assert max(fleet.get_usage().values()) == 11.0
+
+    for coordinator in coordinators:
+        coordinator.leave_fleet()
+        coordinator.unsubscribe_listeners()
@@ -0,0 +1,92 @@
+"""Test ev_smart_charging coordinator."""
+from datetime import datetime
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.helpers.entity_registry import EntityRegistry
+from homeassistant.util import dt as dt_util
+
+from custom_components.ev_smart_charging import async_setup_entry, async_unload_entry
+from custom_components.ev_smart_charging.const import CONF_FRACTIONAL_HOURS, DOMAIN
+
+from tests.helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from tests.price import PRICE_20220930, PRICE_20221001
+from tests.const import MOCK_CONFIG_ALL
+
+
+# pylint: disable=unused-argument
+async def test_coordinator_fractional(
+    hass: HomeAssistant, skip_service_calls, set_cet_timezone, freezer
+):
+    """Test that only the needed minutes of the last hour are charged."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG_ALL,
+        options={CONF_FRACTIONAL_HOURS: True},
+        entry_id="test",
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    await coordinator.switch_active_update(True)
+    await coordinator.switch_apply_limit_update(False)
+    await coordinator.switch_continuous_update(True)
+    await coordinator.switch_ev_connected_update(True)
+    await coordinator.switch_keep_on_update(False)
+    await hass.async_block_till_done()
+
+    # 25% at 6% per hour is 4 hours and 10 minutes.
+    # The last hour, 07:00-08:00, is the most expensive at the edges of the block.
+    time_zone = dt_util.get_time_zone("Europe/Stockholm")
+    assert coordinator.sensor.charging_start_time == datetime(
+        2022, 10, 1, 3, 0, tzinfo=time_zone
+    )
+    assert coordinator.sensor.charging_stop_time == datetime(
+        2022, 10, 1, 7, 10, tzinfo=time_zone
+    )
+    assert coordinator.sensor.charging_number_of_hours == 5
+    assert coordinator.scheduler.get_charging_blocks() == [
+        {
+            "start": datetime(2022, 10, 1, 3, 0, tzinfo=time_zone),
+            "end": datetime(2022, 10, 1, 7, 10, tzinfo=time_zone),
+        }
+    ]
+    assert coordinator.partial_hour_listener is not None
+
+    # Charging until 07:10
+    freezer.move_to("2022-10-01T07:00:00+02:00")
+    await coordinator.update_hourly()
+    await hass.async_block_till_done()
+    assert coordinator.auto_charging_state == STATE_ON
+
+    freezer.move_to("2022-10-01T07:10:00+02:00")
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+    assert coordinator.auto_charging_state == STATE_OFF
+    assert coordinator.instrumentation.triggers.get("partial_hour") == 1
+    assert coordinator.partial_hour_listener is None
+
+    assert await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
@@ -1,5 +1,6 @@
 """Test ev_smart_charging coordinator."""
 from datetime import datetime
+import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from homeassistant.core import HomeAssistant
@@ -12,7 +13,10 @@ from custom_components.ev_smart_charging import async_setup_entry
 from custom_components.ev_smart_charging.coordinator import (
     EVSmartChargingCoordinator,
 )
-from custom_components.ev_smart_charging.const import DOMAIN
+from custom_components.ev_smart_charging.const import (
+    CONF_OPPORTUNISTIC_PERCENTILE,
+    DOMAIN,
+)
 
 from tests.helpers.helpers import (
     MockChargerEntity,
@@ -137,3 +141,49 @@ async def test_coordinator_opportunistic_1(
     await hass.async_block_till_done()
     assert coordinator.auto_charging_state == STATE_ON
     assert coordinator.sensor.state == STATE_ON
+
+
+async def test_coordinator_opportunistic_percentile(
+    hass: HomeAssistant, set_cet_timezone, freezer
+):
+    """Test Coordinator with a percentile as opportunistic reference."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "38")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG_OPPORTUNISTIC,
+        options={CONF_OPPORTUNISTIC_PERCENTILE: 50},
+        entry_id="test",
+    )
+    config_entry.add_to_hass(hass)
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001A)
+    await coordinator.update_sensors()
+    await hass.async_block_till_done()
+    await coordinator.switch_apply_limit_update(True)
+    await coordinator.switch_opportunistic_update(True)
+    await hass.async_block_till_done()
+
+    # The median price 214.345 is above 200 * 50 / 100, the last price is not
+    assert coordinator.price_statistics.percentile(50) == pytest.approx(214.345)
+    assert coordinator.get_scheduling_params()["max_price"] == 200.0
+
+    # The option is applied without a reload
+    hass.config_entries.async_update_entry(
+        config_entry, options={CONF_OPPORTUNISTIC_PERCENTILE: 25}
+    )
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][config_entry.entry_id] is coordinator
+    assert coordinator.opportunistic_percentile == 25
+    # The 25th percentile 96.03 is below 200 * 50 / 100
+    assert coordinator.get_scheduling_params()["max_price"] == 100.0
@@ -0,0 +1,172 @@
+"""Test ev_smart_charging coordinator."""
+from datetime import datetime
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+)
+
+from homeassistant.core import HomeAssistant
+from homeassistant.const import SERVICE_TURN_OFF, SERVICE_TURN_ON, STATE_ON, STATE_OFF
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.helpers.entity_registry import EntityRegistry
+from homeassistant.util import dt as dt_util
+
+from custom_components.ev_smart_charging.coordinator import (
+    EVSmartChargingCoordinator,
+)
+from custom_components.ev_smart_charging.const import DOMAIN, SWITCH
+from custom_components.ev_smart_charging.sensor import EVSmartChargingSensorCharging
+
+from tests.helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from tests.price import PRICE_20220930, PRICE_20221001
+from tests.const import MOCK_CONFIG_ALL
+
+
+async def create_coordinator(
+    hass: HomeAssistant, config_entry: MockConfigEntry, load: bool = True
+) -> EVSmartChargingCoordinator:
+    """Create a coordinator with the switches in place"""
+    coordinator = EVSmartChargingCoordinator(hass, config_entry)
+    if load:
+        await coordinator.load_state()
+    sensor: EVSmartChargingSensorCharging = EVSmartChargingSensorCharging(config_entry)
+    await coordinator.add_sensor([sensor])
+    await coordinator.switch_active_update(True)
+    await coordinator.switch_apply_limit_update(False)
+    await coordinator.switch_continuous_update(True)
+    await coordinator.switch_ev_connected_update(True)
+    await coordinator.switch_keep_on_update(False)
+    await hass.async_block_till_done()
+    return coordinator
+
+
+# pylint: disable=unused-argument
+async def test_coordinator_restore(
+    hass: HomeAssistant, hass_storage, skip_service_calls, set_cet_timezone, freezer
+):
+    """Test restore of the coordinator state after a restart, with non-live SOC."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    coordinator = await create_coordinator(hass, config_entry)
+
+    # Move time to scheduled charging time, 03:00-08:00
+    freezer.move_to("2022-10-01T03:00:00+02:00")
+    MockPriceEntity.set_state(hass, PRICE_20221001, None)
+    await coordinator.update_sensors()
+    await hass.async_block_till_done()
+    assert coordinator.auto_charging_state == STATE_ON
+
+    # Restart. The SOC has not been updated.
+    await coordinator.store.async_save(coordinator.get_stored_data())
+    coordinator.unsubscribe_listeners()
+    assert f"{DOMAIN}.test" in hass_storage
+    freezer.move_to("2022-10-01T04:10:00+02:00")
+
+    # Without the stored state, a new schedule from 04:00 is created
+    coordinator2 = await create_coordinator(hass, config_entry, load=False)
+    assert coordinator2.auto_charging_state == STATE_ON
+    assert coordinator2.sensor.charging_start_time == datetime(
+        2022, 10, 1, 4, 0, tzinfo=dt_util.get_time_zone("Europe/Stockholm")
+    )
+    coordinator2.unsubscribe_listeners()
+
+    # With restore, the schedule from before the restart is used
+    coordinator3 = await create_coordinator(hass, config_entry)
+    await coordinator3.restore_state()
+    await hass.async_block_till_done()
+    assert coordinator3.auto_charging_state == STATE_ON
+    assert coordinator3.sensor.state == STATE_ON
+    assert coordinator3.ev_soc_before_last_charging == 55
+    assert coordinator3.sensor.charging_start_time == datetime(
+        2022, 10, 1, 3, 0, tzinfo=dt_util.get_time_zone("Europe/Stockholm")
+    )
+    assert coordinator3.sensor.charging_stop_time == datetime(
+        2022, 10, 1, 8, 0, tzinfo=dt_util.get_time_zone("Europe/Stockholm")
+    )
+
+    # Charging stops according to the restored schedule
+    freezer.move_to("2022-10-01T08:00:00+02:00")
+    await coordinator3.update_sensors()
+    await hass.async_block_till_done()
+    assert coordinator3.auto_charging_state == STATE_OFF
+    coordinator3.unsubscribe_listeners()
+
+    # A changed SOC invalidates the stored schedule
+    freezer.move_to("2022-10-01T04:10:00+02:00")
+    await coordinator.store.async_save(coordinator.get_stored_data())
+    MockSOCEntity.set_state(hass, "60")
+    coordinator4 = await create_coordinator(hass, config_entry)
+    await coordinator4.restore_state()
+    await hass.async_block_till_done()
+    assert coordinator4.ev_soc_before_last_charging != 55
+    assert coordinator4.sensor.charging_start_time == datetime(
+        2022, 10, 1, 4, 0, tzinfo=dt_util.get_time_zone("Europe/Stockholm")
+    )
+    coordinator4.unsubscribe_listeners()
+
+
+# pylint: disable=unused-argument
+async def test_coordinator_restore_no_commands(
+    hass: HomeAssistant, hass_storage, set_cet_timezone, freezer
+):
+    """Test that the charger is not commanded after a restart with unchanged inputs."""
+
+    turn_on_calls = async_mock_service(hass, SWITCH, SERVICE_TURN_ON)
+    turn_off_calls = async_mock_service(hass, SWITCH, SERVICE_TURN_OFF)
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    coordinator = await create_coordinator(hass, config_entry)
+    freezer.move_to("2022-10-01T03:00:00+02:00")
+    await coordinator.update_sensors()
+    await hass.async_block_till_done()
+    assert coordinator.auto_charging_state == STATE_ON
+    assert len(turn_on_calls) == 1
+    assert len(turn_off_calls) == 0
+
+    # Restart. The updates while the switches are set up wait for the restore.
+    await coordinator.store.async_save(coordinator.get_stored_data())
+    coordinator.unsubscribe_listeners()
+    freezer.move_to("2022-10-01T04:10:00+02:00")
+    coordinator2 = await create_coordinator(hass, config_entry)
+    assert coordinator2.auto_charging_state == STATE_OFF
+    await coordinator2.restore_state()
+    await hass.async_block_till_done()
+    assert coordinator2.auto_charging_state == STATE_ON
+    assert len(turn_on_calls) == 1
+    assert len(turn_off_calls) == 0
+    coordinator2.unsubscribe_listeners()
+
+    # With a changed SOC, the stored schedule and decision are not used, and
+    # the new decision is sent to the charger
+    await coordinator2.store.async_save(coordinator2.get_stored_data())
+    MockSOCEntity.set_state(hass, "60")
+    coordinator3 = await create_coordinator(hass, config_entry)
+    await coordinator3.restore_state()
+    await hass.async_block_till_done()
+    assert coordinator3.auto_charging_state == STATE_ON
+    assert len(turn_on_calls) == 2
+    assert len(turn_off_calls) == 0
+    coordinator3.unsubscribe_listeners()
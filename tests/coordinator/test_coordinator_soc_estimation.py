@@ -0,0 +1,110 @@
+"""Test ev_smart_charging coordinator."""
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.helpers.entity_registry import EntityRegistry
+from homeassistant.util import dt as dt_util
+
+from custom_components.ev_smart_charging import async_setup_entry, async_unload_entry
+from custom_components.ev_smart_charging.const import CONF_SOC_ESTIMATION, DOMAIN
+
+from tests.helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from tests.price import PRICE_20220930, PRICE_20221001
+from tests.const import MOCK_CONFIG_ALL
+
+
+# pylint: disable=unused-argument
+async def test_coordinator_soc_estimation(
+    hass: HomeAssistant, skip_service_calls, set_cet_timezone, freezer
+):
+    """Test that the SOC is estimated between the SOC updates."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG_ALL,
+        options={CONF_SOC_ESTIMATION: True},
+        entry_id="test",
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    await coordinator.switch_active_update(True)
+    await coordinator.switch_apply_limit_update(False)
+    await coordinator.switch_continuous_update(True)
+    await coordinator.switch_ev_connected_update(True)
+    await coordinator.switch_keep_on_update(False)
+    await hass.async_block_till_done()
+    assert coordinator.ev_soc == 55.0
+    assert coordinator.sensor.charging_number_of_hours == 5
+
+    # Nothing is charged before the schedule starts
+    freezer.move_to("2022-10-01T02:00:00+02:00")
+    await coordinator.update_hourly()
+    await hass.async_block_till_done()
+    assert coordinator.ev_soc == 55.0
+    assert coordinator.auto_charging_state == STATE_OFF
+
+    freezer.move_to("2022-10-01T03:00:00+02:00")
+    await coordinator.update_hourly()
+    await hass.async_block_till_done()
+    assert coordinator.auto_charging_state == STATE_ON
+
+    # 6% per hour, without any SOC update
+    freezer.move_to("2022-10-01T05:00:00+02:00")
+    await coordinator.update_hourly()
+    await hass.async_block_till_done()
+    assert coordinator.ev_soc == 67.0
+    assert coordinator.auto_charging_state == STATE_ON
+    assert coordinator.sensor.charging_number_of_hours == 5
+
+    # The charger is turned off when the estimate reaches the target SOC,
+    # without waiting for the next update
+    MockTargetSOCEntity.set_state(hass, "70")
+    await hass.async_block_till_done()
+    assert coordinator.auto_charging_state == STATE_ON
+    freezer.move_to("2022-10-01T05:30:00+02:00")
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+    assert coordinator.ev_soc == 70.0
+    assert coordinator.auto_charging_state == STATE_OFF
+    assert coordinator.soc_target_listener is None
+
+    # A SOC update corrects the estimate
+    freezer.move_to("2022-10-01T06:00:00+02:00")
+    MockSOCEntity.set_state(hass, "68")
+    await hass.async_block_till_done()
+    assert coordinator.ev_soc == 68.0
+    assert coordinator.soc_estimator.correction == 2.0
+    assert coordinator.auto_charging_state == STATE_ON
+
+    # Attribute-only updates of the SOC entity are not new readings
+    freezer.move_to("2022-10-01T06:10:00+02:00")
+    hass.states.async_set(
+        "sensor.volkswagen_we_connect_id_state_of_charge", "68", {"range": 300}
+    )
+    await hass.async_block_till_done()
+    assert coordinator.ev_soc == 69.0
+    assert coordinator.soc_estimator.correction == 2.0
+
+    assert await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
@@ -0,0 +1,94 @@
+"""Test ev_smart_charging coordinator."""
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.helpers.entity_registry import EntityRegistry
+
+from custom_components.ev_smart_charging import async_setup_entry, async_unload_entry
+from custom_components.ev_smart_charging.const import (
+    CONF_LEARNED_CHARGING_SPEED,
+    DOMAIN,
+)
+
+from tests.helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from tests.price import PRICE_20220930, PRICE_20221001
+from tests.const import MOCK_CONFIG_ALL
+
+
+# pylint: disable=unused-argument
+async def test_coordinator_learned_speed(
+    hass: HomeAssistant, skip_service_calls, set_cet_timezone, freezer
+):
+    """Test that the charging speed is learned from the SOC changes."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG_ALL,
+        options={CONF_LEARNED_CHARGING_SPEED: True},
+        entry_id="test",
+    )
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    await coordinator.switch_active_update(True)
+    await coordinator.switch_apply_limit_update(False)
+    await coordinator.switch_continuous_update(True)
+    await coordinator.switch_ev_connected_update(True)
+    await coordinator.switch_keep_on_update(False)
+    await hass.async_block_till_done()
+    assert coordinator.get_scheduling_params()["charging_curve"] == []
+
+    # SOC changes while not charging are not used
+    freezer.move_to("2022-09-30T20:00:00+02:00")
+    MockSOCEntity.set_state(hass, "54")
+    await hass.async_block_till_done()
+
+    freezer.move_to("2022-10-01T03:00:00+02:00")
+    await coordinator.update_hourly()
+    await hass.async_block_till_done()
+    assert coordinator.auto_charging_state == STATE_ON
+
+    # 3% per hour from 56% to 60%
+    for time, soc in [
+        ("03:05", "56"),
+        ("03:45", "58"),
+        ("04:05", "59"),
+        ("04:25", "60"),
+    ]:
+        freezer.move_to(f"2022-10-01T{time}:00+02:00")
+        MockSOCEntity.set_state(hass, soc)
+        await hass.async_block_till_done()
+
+    assert coordinator.speed_estimator.get_stored() == [
+        [56.0, 58.0, 0.6667],
+        [58.0, 59.0, 0.3333],
+        [59.0, 60.0, 0.3333],
+    ]
+    assert coordinator.get_scheduling_params()["charging_curve"] == [
+        [50.0, 3.0],
+        [60.0, 6.0],
+    ]
+    assert (
+        coordinator.get_stored_data()["charging_speed_observations"]
+        == coordinator.speed_estimator.get_stored()
+    )
+
+    assert await async_unload_entry(hass, config_entry)
+    await hass.async_block_till_done()
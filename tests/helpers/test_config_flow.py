@@ -16,6 +16,7 @@ from custom_components.ev_smart_charging.helpers.config_flow import (
 )
 from custom_components.ev_smart_charging.const import (
     BUTTON,
+    CONF_CHARGING_CURVE,
     DOMAIN,
     NAME,
     PLATFORM_NORDPOOL,
@@ -285,6 +286,17 @@ async def test_validate_step_user_charger(hass: HomeAssistant):
     )
     assert FlowValidator.validate_step_user(hass, MOCK_CONFIG_USER) is None
 
+    # Check the charging curve of the options
+    assert (
+        FlowValidator.validate_step_user(
+            hass, MOCK_CONFIG_USER | {CONF_CHARGING_CURVE: "80:3, 90:1.5"}
+        )
+        is None
+    )
+    assert FlowValidator.validate_step_user(
+        hass, MOCK_CONFIG_USER | {CONF_CHARGING_CURVE: "80:3, 90"}
+    ) == ("base", "charging_curve_invalid")
+
 
 async def test_find_entity(hass: HomeAssistant):
     """Test the FindEntity."""
@@ -329,6 +341,7 @@ async def test_device_name_creator(hass: HomeAssistant):
     names = []
 
     config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
     assert (name := DeviceNameCreator.create(hass)) == NAME
     names.append(name)
     device_registry.async_get_or_create(
@@ -340,6 +353,7 @@ async def test_device_name_creator(hass: HomeAssistant):
     config_entry2 = MockConfigEntry(
         domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test2"
     )
+    config_entry2.add_to_hass(hass)
     assert (name2 := DeviceNameCreator.create(hass)) not in names
     names.append(name2)
     device_registry.async_get_or_create(
@@ -355,6 +369,7 @@ async def test_device_name_creator(hass: HomeAssistant):
     config_entry3 = MockConfigEntry(
         domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test3"
     )
+    config_entry3.add_to_hass(hass)
     device_registry.async_get_or_create(
         config_entry_id=config_entry3.entry_id,
         name=name3,
@@ -362,3 +377,31 @@ async def test_device_name_creator(hass: HomeAssistant):
     )
     assert (name4 := DeviceNameCreator.create(hass)) not in names
     assert NAME in name4
+    assert name4 == f"{NAME} 3"
+
+    # Devices of other integrations are not considered
+    other_entry = MockConfigEntry(domain="other", entry_id="other")
+    other_entry.add_to_hass(hass)
+    device_registry.async_get_or_create(
+        config_entry_id=other_entry.entry_id,
+        name=f"{NAME} 3",
+        identifiers={("other", other_entry.entry_id)},
+    )
+    assert DeviceNameCreator.create(hass) == f"{NAME} 3"
+
+    # A gap in the numbering is reused
+    config_entry4 = MockConfigEntry(
+        domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test4"
+    )
+    config_entry4.add_to_hass(hass)
+    device_registry.async_get_or_create(
+        config_entry_id=config_entry4.entry_id,
+        name=f"{NAME} 4",
+        identifiers={(DOMAIN, config_entry4.entry_id)},
+    )
+    assert DeviceNameCreator.create(hass) == f"{NAME} 3"
+
+    # A name given by the user is also taken
+    device = device_registry.async_get_device({(DOMAIN, config_entry3.entry_id)})
+    device_registry.async_update_device(device.id, name_by_user=f"{NAME} 3")
+    assert DeviceNameCreator.create(hass) == f"{NAME} 5"
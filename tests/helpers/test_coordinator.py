@@ -1,7 +1,8 @@
 """Test ev_smart_charging/helpers/coordinator.py"""
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from homeassistant.util import dt as dt_util
+import pytest
 from custom_components.ev_smart_charging.const import (
     PLATFORM_ENERGIDATASERVICE,
     PLATFORM_ENTSOE,
@@ -10,13 +11,22 @@ from custom_components.ev_smart_charging.const import (
 )
 
 from custom_components.ev_smart_charging.helpers.coordinator import (
+    ChargingCurve,
+    PriceStatistics,
     Raw,
     Scheduler,
+    get_charging_fraction,
     get_charging_hours,
+    get_cheapest_blocks,
     get_charging_original,
+    get_charging_restored,
+    get_charging_stored,
     get_charging_update,
     get_charging_value,
+    get_compact,
+    get_delta,
     get_lowest_hours,
+    get_partial_hour,
     get_ready_hour_utc,
     get_start_hour_utc,
 )
@@ -204,6 +214,38 @@ async def test_raw_entsoe(hass, set_cet_timezone, freezer):
     assert price.last_value() is None
 
 
+async def test_price_statistics(hass, set_cet_timezone):
+    """Test PriceStatistics"""
+
+    statistics = PriceStatistics(Raw(PRICE_20220930))
+    assert statistics.count == 24
+    assert statistics.min == 49.64
+    assert statistics.max == 388.65
+    assert statistics.mean == pytest.approx(211.6833333)
+    assert statistics.last == 49.64
+    assert statistics.percentile(0) == 49.64
+    assert statistics.percentile(50) == pytest.approx(214.345)
+    assert statistics.percentile(100) == 388.65
+    assert statistics.count_within_limit(200) == 11
+    assert statistics.count_within_limit(0) == 0
+    assert statistics.window_sum(0, 3) == pytest.approx(104.95 + 99.74 + 93.42)
+    assert statistics.window_mean(0, 4) == pytest.approx(97.84)
+
+    raw_two_days = Raw(PRICE_20220930)
+    statistics = raw_two_days.get_statistics()
+    assert raw_two_days.get_statistics() is statistics
+    raw_two_days.extend(Raw(PRICE_20221001))
+    assert raw_two_days.get_statistics() is not statistics
+    assert raw_two_days.get_statistics().count == 48
+
+    statistics = PriceStatistics(Raw([]))
+    assert statistics.count == 0
+    assert statistics.max is None
+    assert statistics.last is None
+    assert statistics.percentile(50) is None
+    assert statistics.count_within_limit(200) == 0
+
+
 async def test_get_lowest_hours_non_continuous(hass, set_cet_timezone, freezer):
     """Test get_lowest_hours()"""
 
@@ -592,6 +634,187 @@ async def test_get_lowest_hours_continuous(hass, set_cet_timezone, freezer):
     ]
 
 
+async def test_get_lowest_hours_unavailable(hass, set_cet_timezone):
+    """Test get_lowest_hours() with unavailable hours"""
+
+    raw_two_days: Raw = Raw(PRICE_20220930)
+    raw_two_days.extend(Raw(PRICE_20221001))
+    time_now = datetime(2022, 9, 30, 15, 10, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    start_hour = datetime(2022, 9, 28, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    ready_hour = datetime(2022, 10, 1, 8, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+    def get_starts(indexes) -> set[datetime]:
+        return {raw_two_days.get_raw()[index]["start"] for index in indexes}
+
+    for continuous in [False, True]:
+        assert get_lowest_hours(
+            start_hour, ready_hour, continuous, raw_two_days, 5, time_now, set()
+        ) == [27, 28, 29, 30, 31]
+    assert get_lowest_hours(
+        start_hour, ready_hour, False, raw_two_days, 5, time_now, get_starts([28])
+    ) == [23, 27, 29, 30, 31]
+    assert get_lowest_hours(
+        start_hour, ready_hour, True, raw_two_days, 5, time_now, get_starts([28])
+    ) == [23, 24, 25, 26, 27]
+
+    # No continuous range left, the cheapest available hours are used
+    unavailable = get_starts(range(16, 32, 3))
+    for continuous in [False, True]:
+        assert get_lowest_hours(
+            start_hour, ready_hour, continuous, raw_two_days, 5, time_now, unavailable
+        ) == [23, 26, 27, 29, 30]
+
+    # Fewer available hours than needed
+    unavailable = get_starts(index for index in range(15, 32) if index not in [20, 25])
+    for continuous in [False, True]:
+        assert get_lowest_hours(
+            start_hour, ready_hour, continuous, raw_two_days, 5, time_now, unavailable
+        ) == [20, 25]
+
+
+async def test_get_cheapest_blocks():
+    """Test get_cheapest_blocks()"""
+
+    prices = [5, 1, 5, 1, 5, 1, 9, 9, 2, 2]
+    assert get_cheapest_blocks(prices, 3, 0, 0.0) == [1, 3, 5]
+    assert get_cheapest_blocks(prices, 3, 1, 0.0) == [3, 4, 5]
+    assert get_cheapest_blocks(prices, 3, 2, 0.0) == [5, 8, 9]
+    assert get_cheapest_blocks(prices, 3, 0, 3.0) == [3, 4, 5]
+    assert get_cheapest_blocks(prices, 0, 1, 0.0) == []
+
+    # Hours that are None can't be used
+    assert get_cheapest_blocks([1, None, 1, 1, None, 1], 3, 1, 0.0) is None
+    assert get_cheapest_blocks([1, None, 1, 1, None, 1], 3, 2, 0.0) == [0, 2, 3]
+
+
+async def test_get_lowest_hours_blocks(hass, set_cet_timezone):
+    """Test get_lowest_hours() with few charging blocks"""
+
+    raw_two_days: Raw = Raw(PRICE_20220930)
+    raw_two_days.extend(Raw(PRICE_20221001))
+    time_now = datetime(2022, 9, 30, 15, 10, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    start_hour = datetime(2022, 9, 28, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    ready_hour = datetime(2022, 10, 1, 8, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+
+    # The cheapest 8 hours are in two blocks
+    assert get_lowest_hours(
+        start_hour, ready_hour, False, raw_two_days, 8, time_now
+    ) == [22, 23, 26, 27, 28, 29, 30, 31]
+    assert get_lowest_hours(
+        start_hour, ready_hour, False, raw_two_days, 8, time_now, None, 2
+    ) == [22, 23, 26, 27, 28, 29, 30, 31]
+    assert get_lowest_hours(
+        start_hour, ready_hour, False, raw_two_days, 8, time_now, None, 1
+    ) == [24, 25, 26, 27, 28, 29, 30, 31]
+
+    # A second block costs more than the price difference
+    assert get_lowest_hours(
+        start_hour, ready_hour, False, raw_two_days, 8, time_now, None, 0, 10.0
+    ) == [22, 23, 26, 27, 28, 29, 30, 31]
+    assert get_lowest_hours(
+        start_hour, ready_hour, False, raw_two_days, 8, time_now, None, 0, 50.0
+    ) == [24, 25, 26, 27, 28, 29, 30, 31]
+
+    # No single block fits, the cheapest available hours are used
+    unavailable = {raw_two_days.get_raw()[index]["start"] for index in range(16, 32, 3)}
+    assert get_lowest_hours(
+        start_hour, ready_hour, False, raw_two_days, 5, time_now, unavailable, 1
+    ) == [23, 26, 27, 29, 30]
+
+
+async def test_get_lowest_hours_no_prices_left(hass, set_cet_timezone):
+    """Test get_lowest_hours() after the last price"""
+
+    raw_two_days: Raw = Raw(PRICE_20220930)
+    time_now = datetime(2022, 10, 1, 12, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    start_hour = datetime(2022, 9, 28, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    ready_hour = datetime(2022, 10, 2, 8, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    for continuous, max_blocks in [(True, 0), (False, 0), (False, 2)]:
+        assert (
+            get_lowest_hours(
+                start_hour,
+                ready_hour,
+                continuous,
+                raw_two_days,
+                4,
+                time_now,
+                None,
+                max_blocks,
+            )
+            == []
+        )
+
+
+async def test_charging_curve():
+    """Test ChargingCurve and get_charging_hours() with a charging curve"""
+
+    assert ChargingCurve.parse("") == []
+    assert ChargingCurve.parse("90:1.5, 80:3") == [[80.0, 3.0], [90.0, 1.5]]
+    for text in ["80", "80:0", "110:3", "80:3:1", "a:3"]:
+        with pytest.raises(ValueError):
+            ChargingCurve.parse(text)
+
+    curve = ChargingCurve(10.0, [[80.0, 5.0], [90.0, 2.0]])
+    assert curve.get_hours(0, 80) == 8.0
+    assert curve.get_hours(70, 90) == 3.0
+    assert curve.get_hours(85, 100) == 6.0
+    assert curve.get_hours(100, 100) == 0.0
+    assert curve.get_hours(90, 80) == 0.0
+    assert curve.get_soc(70, 3.0) == 90.0
+    assert curve.get_soc(0, 8.5) == 82.5
+    assert curve.get_soc(95, 10.0) == 100.0
+    assert curve.get_soc(50, 0.0) == 50.0
+
+    # 4 hours at a constant speed, 9 hours with the taper
+    charging_curve = [[80.0, 5.0], [90.0, 2.0]]
+    assert get_charging_hours(60, 100, 10.0) == 4
+    assert get_charging_hours(60, 100, 10.0, charging_curve) == 9
+    assert get_charging_fraction(60, 100, 10.0, charging_curve) == 1.0
+    # 0.5 + 2 + 3 hours
+    assert get_charging_hours(75, 96, 10.0, charging_curve) == 6
+    assert get_charging_fraction(75, 96, 10.0, charging_curve) == pytest.approx(0.5)
+    # At most 24 hours
+    assert get_charging_hours(0, 100, 1.0, charging_curve) == 24
+
+
+async def test_get_partial_hour(hass, set_cet_timezone):
+    """Test get_charging_fraction() and get_partial_hour()"""
+
+    assert get_charging_fraction(55, 80, 6) == pytest.approx(1 / 6)
+    assert get_charging_fraction(50, 80, 6) == 1.0
+    assert get_charging_fraction(80, 80, 6) == 1.0
+
+    start = datetime(2022, 10, 1, 1, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    prices = [
+        {
+            "start": start + timedelta(hours=hour),
+            "end": start + timedelta(hours=hour + 1),
+            "value": value,
+        }
+        for hour, value in enumerate([30.0, 10.0, 5.0, 20.0, 40.0, 50.0])
+    ]
+    schedule = [
+        item | {"value": 100.0 if hour in [0, 1, 2, 3, 5] else 0.0}
+        for hour, item in enumerate(prices)
+    ]
+
+    # The first hour of the block is the most expensive edge, so charging
+    # starts late. 50.0 is in a single hour, and more expensive.
+    partial_hour = get_partial_hour(schedule, prices, 0.25)
+    assert partial_hour["start"] == start + timedelta(hours=5)
+    assert partial_hour["on"] == start + timedelta(hours=5)
+    assert partial_hour["off"] == start + timedelta(hours=5, minutes=15)
+
+    schedule[5]["value"] = 0.0
+    partial_hour = get_partial_hour(schedule, prices, 0.25)
+    assert partial_hour["start"] == start
+    assert partial_hour["on"] == start + timedelta(minutes=45)
+    assert partial_hour["off"] == start + timedelta(hours=1)
+    assert partial_hour["minutes"] == 15
+
+    assert get_partial_hour(schedule, prices, 1.0) is None
+
+
 async def test_get_charging_original(hass, set_cet_timezone, freezer):
     """Test get_charging_original()"""
 
@@ -611,6 +834,87 @@ async def test_get_charging_original(hass, set_cet_timezone, freezer):
     )
 
 
+async def test_get_charging_restored(hass, set_cet_timezone, freezer):
+    """Test get_charging_stored() and get_charging_restored()"""
+
+    raw_two_days: Raw = Raw(PRICE_20220930)
+    raw_two_days.extend(Raw(PRICE_20221001))
+
+    freezer.move_to("2022-09-30T15:10:00+02:00")
+    charging_original = get_charging_original([27, 28, 29], raw_two_days)
+    stored = get_charging_stored(charging_original)
+    assert isinstance(stored[27]["start"], str)
+    assert get_charging_restored(stored, raw_two_days) == charging_original
+
+    # Only tomorrow's prices, as after midnight
+    freezer.move_to("2022-10-01T02:10:00+02:00")
+    result = get_charging_restored(stored, Raw(PRICE_20221001))
+    assert len(result) == 24
+    assert result[2]["value"] is None
+    assert result[3]["value"] == raw_two_days.get_raw()[27]["value"]
+    assert result[5]["value"] == raw_two_days.get_raw()[29]["value"]
+    assert result[6]["value"] is None
+
+    # Charging hours missing in the prices
+    freezer.move_to("2022-09-30T15:10:00+02:00")
+    assert get_charging_restored(stored, Raw(PRICE_20220930)) is None
+
+    # Changed price for a charging hour
+    stored[28]["value"] = stored[28]["value"] + 1.0
+    assert get_charging_restored(stored, raw_two_days) is None
+
+    # A changed price in the past doesn't matter
+    freezer.move_to("2022-10-01T05:10:00+02:00")
+    assert get_charging_restored(stored, raw_two_days) is not None
+
+
+async def test_get_compact(hass, set_cet_timezone):
+    """Test get_compact()"""
+
+    assert get_compact(None) is None
+    assert get_compact([]) is None
+
+    raw_two_days: Raw = Raw(PRICE_20220930)
+    raw_two_days.extend(Raw(PRICE_20221001))
+    result = get_compact(raw_two_days.get_raw())
+    assert result["start"] == raw_two_days.get_raw()[0]["start"]
+    assert result["width"] == 3600
+    assert result["values"] == [item["value"] for item in raw_two_days.get_raw()]
+
+    charging = get_charging_update(
+        get_charging_original([27, 28, 29], raw_two_days), True, False, 0.0, 99
+    )
+    result = get_compact(charging, True)
+    assert result["start"] == raw_two_days.get_raw()[0]["start"]
+    assert result["width"] == 3600
+    assert result["values"] == [0.0, 99, 0.0]
+    assert result["counts"] == [27, 3, 18]
+
+    # Not contiguous
+    items = raw_two_days.get_raw()[0:2] + raw_two_days.get_raw()[3:5]
+    assert get_compact(items) is None
+
+
+async def test_get_delta(hass, set_cet_timezone):
+    """Test get_delta()"""
+
+    raw_today = Raw(PRICE_20220930).get_raw()
+    raw_tomorrow = Raw(PRICE_20221001).get_raw()
+    assert get_delta(raw_today, raw_today) is None
+    assert get_delta(None, None) is None
+
+    result = get_delta(None, raw_today)
+    assert result["changed"] == raw_today
+    assert result["removed"] == []
+
+    # New day, with one updated price
+    current = raw_today[1:] + raw_tomorrow
+    current[0] = current[0] | {"value": 1.0}
+    result = get_delta(raw_today, current)
+    assert result["changed"] == [current[0]] + raw_tomorrow
+    assert result["removed"] == [raw_today[0]["start"]]
+
+
 async def test_get_charging_update(hass):
     """Test get_charging_update()"""
 
@@ -725,6 +1029,21 @@ async def test_scheduler(hass, set_cet_timezone, freezer):
         2022, 10, 1, 7, 0, tzinfo=dt_util.get_time_zone("Europe/Stockholm")
     )
     assert scheduler.get_charging_number_of_hours() == 4
+    prices = [item["value"] for item in raw_two_days.get_raw()]
+    assert scheduler.get_charging_cost() == pytest.approx(sum(prices[27:31]))
+    assert scheduler.get_charging_average_price() == pytest.approx(
+        sum(prices[27:31]) / 4
+    )
+    # Charging as soon as possible would start 14:00
+    assert scheduler.get_charging_savings() == pytest.approx(
+        sum(prices[14:18]) - sum(prices[27:31])
+    )
+    assert scheduler.get_charging_blocks() == [
+        {
+            "start": scheduler.get_charging_start_time(),
+            "end": scheduler.get_charging_stop_time(),
+        }
+    ]
 
     scheduling_params.update({"min_soc": 80})
     scheduler.create_base_schedule(scheduling_params, raw_two_days)
@@ -741,12 +1060,29 @@ async def test_scheduler(hass, set_cet_timezone, freezer):
         2022, 10, 1, 7, 0, tzinfo=dt_util.get_time_zone("Europe/Stockholm")
     )
     assert scheduler.get_charging_number_of_hours() == 8
+    assert scheduler.get_charging_cost() == pytest.approx(sum(prices[23:31]))
+    assert scheduler.get_charging_savings() == pytest.approx(
+        sum(prices[14:22]) - sum(prices[23:31])
+    )
+
+    stored = scheduler.get_stored_base_schedule()
+    scheduler2 = Scheduler()
+    assert scheduler2.restore_base_schedule(stored, raw_two_days)
+    assert scheduler2.schedule_base == scheduler.schedule_base
+    assert scheduler2.schedule_base_min_soc == scheduler.schedule_base_min_soc
+    assert scheduler2.asap_prices == scheduler.asap_prices
+    assert not scheduler2.restore_base_schedule(stored, Raw(PRICE_20220930))
+    assert not scheduler2.restore_base_schedule({}, raw_two_days)
 
     scheduler.set_empty_schedule()
     assert scheduler.get_charging_is_planned() is False
     assert scheduler.get_charging_start_time() is None
     assert scheduler.get_charging_stop_time() is None
     assert scheduler.get_charging_number_of_hours() == 0
+    assert scheduler.get_charging_blocks() == []
+    assert scheduler.get_charging_cost() is None
+    assert scheduler.get_charging_average_price() is None
+    assert scheduler.get_charging_savings() is None
 
 
 async def test_get_empty_schedule(hass, set_cet_timezone, freezer):
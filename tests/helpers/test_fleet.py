@@ -0,0 +1,105 @@
+"""Test ev_smart_charging/helpers/fleet.py"""
+from datetime import datetime
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.ev_smart_charging.helpers.coordinator import Raw, Scheduler
+from custom_components.ev_smart_charging.helpers.fleet import FleetScheduler
+from tests.price import PRICE_20220930, PRICE_20221001
+
+
+def get_params(ev_soc: float, min_soc: float = 0.0) -> dict:
+    """Get scheduling parameters at 2022-09-30 15:10"""
+    return {
+        "ev_soc": ev_soc,
+        "ev_target_soc": 80.0,
+        "min_soc": min_soc,
+        "charging_pct_per_hour": 6.0,
+        "start_hour": datetime(2022, 9, 28, tzinfo=dt_util.DEFAULT_TIME_ZONE),
+        "ready_hour": datetime(2022, 10, 1, 8, tzinfo=dt_util.DEFAULT_TIME_ZONE),
+        "switch_continuous": False,
+        "time_now": datetime(2022, 9, 30, 15, 10, tzinfo=dt_util.DEFAULT_TIME_ZONE),
+    }
+
+
+# pylint: disable=unused-argument
+async def test_fleet_scheduler(hass, set_cet_timezone):
+    """Test the fleet scheduler"""
+
+    raw_two_days = Raw(PRICE_20220930)
+    raw_two_days.extend(Raw(PRICE_20221001))
+    replanned = []
+    fleet = FleetScheduler()
+    schedulers = {}
+    for vehicle_id in ["a", "b", "c"]:
+        schedulers[vehicle_id] = Scheduler()
+        fleet.add_vehicle(
+            vehicle_id,
+            schedulers[vehicle_id],
+            11.0,
+            25.0,
+            lambda vehicle_id=vehicle_id: replanned.append(vehicle_id),
+        )
+
+    # 5 hours each. At most two vehicles can charge at the same time.
+    for vehicle_id in ["a", "b", "c"]:
+        fleet.update_demand(vehicle_id, get_params(50.0), raw_two_days)
+    assert all(len(vehicle.hours) == 5 for vehicle in fleet.vehicles.values())
+    assert max(fleet.get_usage().values()) == 22.0
+    assert len(fleet.get_usage()) == 10
+    hours = {
+        vehicle_id: schedulers[vehicle_id].get_base_schedule_hours()
+        for vehicle_id in schedulers
+    }
+    assert hours["a"] == hours["b"] == fleet.vehicles["a"].hours
+    assert hours["a"].isdisjoint(hours["c"])
+    assert replanned == []
+
+    # The order is kept when c needs more hours, so only c is planned again
+    replanned.clear()
+    order = [fleet.vehicles[vehicle_id].order for vehicle_id in ["a", "b", "c"]]
+    plans = fleet.plans
+    reuses = fleet.reuses
+    fleet.update_demand("c", get_params(26.0), raw_two_days)
+    assert [fleet.vehicles[vehicle_id].order for vehicle_id in ["a", "b", "c"]] == order
+    assert fleet.plans == plans + 1
+    assert fleet.reuses == reuses + 2
+    assert len(fleet.vehicles["c"].hours) == 9
+    assert fleet.vehicles["c"].hours.isdisjoint(hours["a"])
+    assert replanned == []
+    assert max(fleet.get_usage().values()) == 22.0
+
+    # A change of b only affects the vehicles after it
+    replanned.clear()
+    plans = fleet.plans
+    fleet.update_demand("b", get_params(56.0), raw_two_days)
+    assert fleet.plans == plans + 2
+    assert fleet.vehicles["a"].hours == hours["a"]
+    assert len(fleet.vehicles["b"].hours) == 4
+    assert replanned == ["c"]
+    assert max(fleet.get_usage().values()) == 22.0
+
+    # A vehicle below the minimum SOC is placed first when it gets a demand
+    replanned.clear()
+    fleet.clear_demand("a")
+    fleet.update_demand("a", get_params(10.0, 20.0), raw_two_days)
+    assert fleet.vehicles["a"].get_priority("a")[0] is False
+    assert fleet.vehicles["a"].order < fleet.vehicles["b"].order
+    scheduler = Scheduler()
+    scheduler.create_base_schedule(get_params(10.0, 20.0), raw_two_days)
+    assert fleet.vehicles["a"].hours == scheduler.get_base_schedule_hours()
+    assert max(fleet.get_usage().values()) == 22.0
+    assert fleet.as_dict()["vehicles"]["a"]["unavailable_hours"] == []
+    assert fleet.as_dict()["vehicles"]["b"]["unavailable_hours"] == sorted(
+        hour.isoformat() for hour in fleet.get_unavailable_hours("b")
+    )
+
+    # Without demand, a vehicle does not use any power
+    replanned.clear()
+    fleet.clear_demand("a")
+    fleet.remove_vehicle("b")
+    assert fleet.vehicles["a"].hours == set()
+    assert max(fleet.get_usage().values()) == 11.0
+    assert fleet.as_dict()["vehicles"]["c"]["power"] == 11.0
+    assert fleet.as_dict()["site_power_limit"] == 25.0
+    assert fleet.as_dict()["vehicles"]["a"]["unavailable_hours"] is None
@@ -16,6 +16,7 @@ from custom_components.ev_smart_charging.const import (
 from custom_components.ev_smart_charging.helpers.config_flow import FindEntity
 from custom_components.ev_smart_charging.helpers.general import (
     Validator,
+    get_cost_units,
     get_parameter,
     get_platform,
 )
@@ -71,6 +72,15 @@ async def test_get_parameter(hass):
     assert get_parameter(config_entry, CONF_READY_HOUR, 12) == 12
 
 
+async def test_get_cost_units(hass):
+    """Test get_cost_units"""
+
+    assert get_cost_units("SEK/kWh", "EUR") == ("SEK", "SEK/kWh")
+    assert get_cost_units("öre / kWh", "EUR") == ("öre", "öre / kWh")
+    assert get_cost_units("SEK", "EUR") == ("SEK", "SEK/kWh")
+    assert get_cost_units(None, "EUR") == ("EUR", "EUR/kWh")
+
+
 async def test_get_platform(hass: HomeAssistant):
     """Test the get_platform."""
 
@@ -0,0 +1,172 @@
+"""Test ev_smart_charging/helpers/speed.py"""
+from datetime import datetime, timedelta
+
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import State
+
+from custom_components.ev_smart_charging.helpers.coordinator import ChargingCurve
+from custom_components.ev_smart_charging.helpers.speed import (
+    ChargingSpeedEstimator,
+    SocEstimator,
+    get_band,
+    get_history_observations,
+)
+
+TIME = datetime(2022, 10, 1, 1)
+
+
+def test_get_band():
+    """Test get_band"""
+
+    assert get_band(0.0) == 0
+    assert get_band(9.9) == 0
+    assert get_band(10.0) == 1
+    assert get_band(85.0) == 8
+    assert get_band(100.0) == 9
+
+
+def test_charging_speed_estimator():
+    """Test ChargingSpeedEstimator"""
+
+    estimator = ChargingSpeedEstimator()
+
+    # Not charging
+    assert not estimator.add_soc(TIME, 50.0)
+    assert not estimator.add_soc(TIME + timedelta(hours=1), 52.0)
+
+    # The first reading after the charger is turned on only starts a period
+    estimator.set_charging(True)
+    assert not estimator.add_soc(TIME + timedelta(hours=2), 60.0)
+    assert estimator.add_soc(TIME + timedelta(hours=3), 66.0)
+    # Too short
+    assert not estimator.add_soc(TIME + timedelta(hours=3, minutes=1), 67.0)
+    assert estimator.add_soc(TIME + timedelta(hours=4), 71.0)
+    assert estimator.get_stored() == [[60.0, 66.0, 1.0], [66.0, 71.0, 1.0]]
+    # Not enough observations
+    assert estimator.get_speed(65.0) is None
+
+    # A period with the charger turned off is not used
+    estimator.set_charging(False)
+    assert not estimator.add_soc(TIME + timedelta(hours=5), 72.0)
+    estimator.set_charging(True)
+    assert not estimator.add_soc(TIME + timedelta(hours=6), 72.0)
+    assert estimator.add_soc(TIME + timedelta(hours=7), 76.0)
+    assert estimator.add_soc(TIME + timedelta(hours=8), 79.0)
+    assert estimator.add_soc(TIME + timedelta(hours=9), 82.0)
+    assert estimator.add_soc(TIME + timedelta(hours=10), 85.0)
+
+    # 4.0, 3.0 and 3.0 % per hour in the 70-80 band
+    assert round(estimator.get_speed(75.0), 3) == 3.64
+    assert estimator.get_speed(65.0) is None
+    assert estimator.as_dict() == {
+        "observations": 6,
+        "bands": {
+            "60-70": {"speed": 5.8, "observations": 2},
+            "70-80": {"speed": 3.64, "observations": 3},
+            "80-90": {"speed": 3.0, "observations": 1},
+        },
+    }
+
+    # Stored observations are restored before the new ones
+    restored = ChargingSpeedEstimator()
+    restored.add_observation(20.0, 30.0, 1.0)
+    restored.add_history(estimator.get_stored())
+    assert restored.get_stored()[0] == [60.0, 66.0, 1.0]
+    assert restored.get_stored()[-1] == [20.0, 30.0, 1.0]
+    assert restored.bands == estimator.bands | {2: [10.0, 1]}
+
+
+def test_charging_speed_estimator_curve():
+    """Test ChargingSpeedEstimator.get_charging_curve"""
+
+    estimator = ChargingSpeedEstimator()
+    assert estimator.get_charging_curve(10.0, [[80.0, 3.0]]) == [[80.0, 3.0]]
+
+    for _ in range(3):
+        estimator.add_observation(80.0, 82.0, 1.0)
+        estimator.add_observation(30.0, 38.0, 1.0)
+    estimator.add_observation(50.0, 59.0, 1.0)
+
+    curve = estimator.get_charging_curve(10.0, [[80.0, 3.0], [90.0, 1.5]])
+    assert curve == [[30.0, 8.0], [40.0, 10.0], [80.0, 2.0], [90.0, 1.5]]
+
+    # 30 -> 40 at 8 % per hour, then 40 -> 50 at 10 % per hour
+    assert ChargingCurve(10.0, curve).get_hours(30.0, 50.0) == 2.25
+    assert ChargingCurve(10.0, curve).get_hours(80.0, 90.0) == 5.0
+
+
+def test_get_history_observations():
+    """Test get_history_observations"""
+
+    def soc(value: str, hours: float) -> State:
+        time = TIME + timedelta(hours=hours)
+        return State("sensor.soc", value, last_changed=time, last_updated=time)
+
+    def charging(value: str, hours: float) -> State:
+        time = TIME + timedelta(hours=hours)
+        return State("sensor.charging", value, last_changed=time, last_updated=time)
+
+    soc_states = [
+        soc("40", 0),
+        soc("unavailable", 0.5),
+        soc("46", 1),
+        soc("52", 2),
+        soc("58", 3),
+        soc("60", 4),
+    ]
+    charging_states = [
+        charging(STATE_ON, 0),
+        charging(STATE_OFF, 2.5),
+        charging(STATE_ON, 3),
+    ]
+    assert get_history_observations(soc_states, charging_states) == [
+        (40.0, 46.0, 1.0),
+        (46.0, 52.0, 1.0),
+        (58.0, 60.0, 1.0),
+    ]
+
+
+def test_soc_estimator():
+    """Test SocEstimator"""
+
+    estimator = SocEstimator()
+    assert estimator.get_soc(TIME, 10.0, []) is None
+
+    assert estimator.add_reading(TIME, 50.0)
+    assert not estimator.add_reading(TIME, 50.0)
+    assert estimator.get_soc(TIME + timedelta(hours=1), 10.0, []) == 50.0
+
+    # Two periods with the charger on
+    estimator.set_charging(TIME + timedelta(hours=1), True)
+    assert estimator.get_soc(TIME + timedelta(hours=2), 10.0, []) == 60.0
+    estimator.set_charging(TIME + timedelta(hours=2, minutes=30), False)
+    estimator.set_charging(TIME + timedelta(hours=4), True)
+    assert estimator.get_soc(TIME + timedelta(hours=5), 10.0, []) == 75.0
+    # Slower above 80%
+    assert estimator.get_soc(TIME + timedelta(hours=6), 10.0, [[80.0, 4.0]]) == 82.0
+
+    # A reading replaces the estimate, and the charging continues from it
+    assert estimator.add_reading(TIME + timedelta(hours=6), 79.0)
+    assert estimator.correction == 3.0
+    assert estimator.get_soc(TIME + timedelta(hours=6), 10.0, [[80.0, 4.0]]) == 79.0
+    assert estimator.get_soc(TIME + timedelta(hours=7), 10.0, [[80.0, 4.0]]) == 83.6
+    assert estimator.get_soc(TIME + timedelta(hours=20), 10.0, [[80.0, 4.0]]) == 100.0
+
+    # The time when the estimate reaches a SOC, only while charging
+    estimator.get_soc(TIME + timedelta(hours=6), 10.0, [[80.0, 4.0]])
+    assert estimator.get_time_at_soc(TIME + timedelta(hours=6), 79.0) is None
+    assert estimator.get_time_at_soc(
+        TIME + timedelta(hours=6), 84.0
+    ) == TIME + timedelta(hours=7, minutes=6)
+    estimator.set_charging(TIME + timedelta(hours=6), False)
+    assert estimator.get_time_at_soc(TIME + timedelta(hours=6), 84.0) is None
+    estimator.set_charging(TIME + timedelta(hours=6), True)
+    estimator.get_soc(TIME + timedelta(hours=20), 10.0, [[80.0, 4.0]])
+
+    assert estimator.as_dict() == {
+        "reading": {"time": (TIME + timedelta(hours=6)).isoformat(), "soc": 79.0},
+        "charged_hours": 0.0,
+        "charging_since": (TIME + timedelta(hours=6)).isoformat(),
+        "estimate": 100.0,
+        "correction": 3.0,
+    }
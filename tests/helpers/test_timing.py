@@ -0,0 +1,64 @@
+"""Test ev_smart_charging/helpers/timing.py"""
+from custom_components.ev_smart_charging.helpers.timing import (
+    Instrumentation,
+    StageTiming,
+)
+
+
+# pylint: disable=unused-argument
+async def test_stage_timing(hass):
+    """Test StageTiming"""
+
+    timing = StageTiming()
+    assert timing.as_dict()["count"] == 0
+    assert timing.as_dict()["mean_ms"] is None
+
+    for duration in [0.5, 2.0, 7.0, 600.0]:
+        timing.record(duration)
+    result = timing.as_dict()
+    assert result["count"] == 4
+    assert result["total_ms"] == 609.5
+    assert result["last_ms"] == 600.0
+    assert result["max_ms"] == 600.0
+    assert result["mean_ms"] == 152.375
+    assert result["histogram"] == {
+        "<1ms": 1,
+        "<5ms": 1,
+        "<10ms": 1,
+        "<50ms": 0,
+        "<100ms": 0,
+        "<500ms": 0,
+        ">=500ms": 1,
+    }
+
+    # Only the latest durations are kept for the histogram
+    for _ in range(200):
+        timing.record(0.1)
+    result = timing.as_dict()
+    assert result["count"] == 204
+    assert result["max_ms"] == 0.1
+    assert result["histogram"]["<1ms"] == 100
+
+
+async def test_instrumentation(hass):
+    """Test Instrumentation"""
+
+    instrumentation = Instrumentation()
+    with instrumentation.measure("stage"):
+        pass
+    with instrumentation.measure("stage"):
+        pass
+    instrumentation.count_trigger("price")
+    instrumentation.count_trigger("price")
+    instrumentation.count_trigger("soc")
+    instrumentation.count_cache("cache", True)
+    instrumentation.count_cache("cache", True)
+    instrumentation.count_cache("cache", False)
+    instrumentation.count_cache("cache", True)
+
+    result = instrumentation.as_dict()
+    assert result["stages"]["stage"]["count"] == 2
+    assert instrumentation.get_stage("stage").count == 2
+    assert instrumentation.get_stage("other") is None
+    assert result["triggers"] == {"price": 2, "soc": 1}
+    assert result["caches"] == {"cache": {"hits": 3, "misses": 1, "hit_ratio": 0.75}}
@@ -0,0 +1,58 @@
+"""Test the benchmark helpers."""
+from datetime import date, timedelta
+
+from benchmarks.prices import PROFILE_FLAT, get_prices, next_dst_change
+from benchmarks.scheduling import compare
+
+
+# pylint: disable=unused-argument
+async def test_get_prices(hass, set_cet_timezone):
+    """Test the synthetic prices."""
+
+    prices = get_prices(date(2022, 9, 30), 2, 15, PROFILE_FLAT)
+    assert len(prices) == 2 * 24 * 4
+    assert all(item["value"] == 100.0 for item in prices)
+    for item, next_item in zip(prices, prices[1:]):
+        assert item["end"] == next_item["start"]
+        assert item["end"] - item["start"] == timedelta(minutes=15)
+
+    # Same seed, same prices
+    assert get_prices(date(2022, 9, 30), 7) == get_prices(date(2022, 9, 30), 7)
+
+    spring = next_dst_change(date(2023, 1, 1), True)
+    assert spring == date(2023, 3, 26)
+    assert len(get_prices(spring, 1)) == 23
+    autumn = next_dst_change(date(2023, 1, 1), False)
+    assert autumn == date(2023, 10, 29)
+    assert len(get_prices(autumn, 1)) == 25
+
+
+async def test_compare(hass):
+    """Test the comparison with the baselines."""
+
+    baselines = {
+        "reference": {"relative": 1.0, "peak_kib": 1.0},
+        "case/a": {"relative": 2.0, "peak_kib": 10.0},
+    }
+    results = {
+        "reference": {"min_us": 50.0, "peak_kib": 1.0},
+        "case/a": {"min_us": 150.0, "peak_kib": 10.5},
+    }
+    assert compare(results, baselines, 1.0, 0.1) == []
+
+    # A slower machine has a slower reference
+    results = {
+        "reference": {"min_us": 200.0, "peak_kib": 1.0},
+        "case/a": {"min_us": 500.0, "peak_kib": 10.0},
+    }
+    assert compare(results, baselines, 1.0, 0.1) == []
+
+    results = {
+        "reference": {"min_us": 50.0, "peak_kib": 1.0},
+        "case/a": {"min_us": 250.0, "peak_kib": 12.0},
+        "case/b": {"min_us": 250.0, "peak_kib": 12.0},
+    }
+    assert compare(results, baselines, 1.0, 0.1) == [
+        "case/a min_us: 250.0 (baseline 100.0)",
+        "case/a peak_kib: 12.0 (baseline 10.0)",
+    ]
@@ -0,0 +1,107 @@
+"""Test ev_smart_charging calendar."""
+from datetime import datetime
+
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ev_smart_charging.const import DOMAIN
+
+from .const import MOCK_CONFIG_ALL
+from .helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from .price import PRICE_20220930, PRICE_20221001
+
+
+# pylint: disable=unused-argument
+async def test_calendar(hass, skip_service_calls, set_cet_timezone, freezer):
+    """Test the charging calendar."""
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, None)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    calendar = coordinator.calendar
+    tz_info = dt_util.get_time_zone("Europe/Stockholm")
+
+    # No prices for tomorrow, so no charging is planned
+    assert calendar.event is None
+    assert hass.states.get(calendar.entity_id).state == STATE_OFF
+
+    # Charging is planned 03:00-08:00
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+    await hass.async_block_till_done()
+    assert calendar.event.start == datetime(2022, 10, 1, 3, 0, tzinfo=tz_info)
+    assert calendar.event.end == datetime(2022, 10, 1, 8, 0, tzinfo=tz_info)
+    assert calendar.event.summary == config_entry.title
+    assert hass.states.get(calendar.entity_id).state == STATE_OFF
+
+    events = await calendar.async_get_events(
+        hass,
+        datetime(2022, 9, 30, 0, 0, tzinfo=tz_info),
+        datetime(2022, 10, 2, 0, 0, tzinfo=tz_info),
+    )
+    assert len(events) == 1
+    events = await calendar.async_get_events(
+        hass,
+        datetime(2022, 10, 1, 7, 0, tzinfo=tz_info),
+        datetime(2022, 10, 1, 9, 0, tzinfo=tz_info),
+    )
+    assert len(events) == 1
+    events = await calendar.async_get_events(
+        hass,
+        datetime(2022, 10, 1, 8, 0, tzinfo=tz_info),
+        datetime(2022, 10, 2, 0, 0, tzinfo=tz_info),
+    )
+    assert len(events) == 0
+    events = await calendar.async_get_events(
+        hass,
+        datetime(2022, 9, 30, 0, 0, tzinfo=tz_info),
+        datetime(2022, 10, 1, 3, 0, tzinfo=tz_info),
+    )
+    assert len(events) == 0
+
+    # Non-continuous charging, 22:00-00:00 and 02:00-08:00
+    MockTargetSOCEntity.set_state(hass, "100")
+    await coordinator.switch_continuous_update(False)
+    await hass.async_block_till_done()
+    events = await calendar.async_get_events(
+        hass,
+        datetime(2022, 9, 30, 0, 0, tzinfo=tz_info),
+        datetime(2022, 10, 2, 0, 0, tzinfo=tz_info),
+    )
+    assert len(events) == 2
+    assert events[0].start == datetime(2022, 9, 30, 22, 0, tzinfo=tz_info)
+    assert events[0].end == datetime(2022, 10, 1, 0, 0, tzinfo=tz_info)
+    assert events[1].start == datetime(2022, 10, 1, 2, 0, tzinfo=tz_info)
+    assert events[1].end == datetime(2022, 10, 1, 8, 0, tzinfo=tz_info)
+    events = await calendar.async_get_events(
+        hass,
+        datetime(2022, 10, 1, 0, 0, tzinfo=tz_info),
+        datetime(2022, 10, 1, 2, 30, tzinfo=tz_info),
+    )
+    assert len(events) == 1
+    assert events[0].start == datetime(2022, 10, 1, 2, 0, tzinfo=tz_info)
+
+    # The calendar is on during charging
+    freezer.move_to(events[0].start)
+    await coordinator.update_sensors()
+    await hass.async_block_till_done()
+    assert hass.states.get(calendar.entity_id).state == STATE_ON
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
@@ -8,7 +8,19 @@ from homeassistant.core import HomeAssistant
 import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.ev_smart_charging.const import DOMAIN
+from custom_components.ev_smart_charging.const import (
+    CONF_CHARGER_POWER,
+    CONF_CHARGING_BLOCK_PENALTY,
+    CONF_CHARGING_CURVE,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_FRACTIONAL_HOURS,
+    CONF_LEARNED_CHARGING_SPEED,
+    CONF_MAX_CHARGING_BLOCKS,
+    CONF_OPPORTUNISTIC_PERCENTILE,
+    CONF_SITE_POWER_LIMIT,
+    CONF_SOC_ESTIMATION,
+    DOMAIN,
+)
 
 from .const import (
     MOCK_CONFIG_ALL,
@@ -112,7 +124,18 @@ async def test_successful_config_flow_option(
     # Check that the option flow is complete and a new entry is created with
     # the input data
     assert result["type"] == data_entry_flow.RESULT_TYPE_CREATE_ENTRY
-    assert result["data"] == MOCK_CONFIG_USER
+    assert result["data"] == MOCK_CONFIG_USER | {
+        CONF_COMPACT_ATTRIBUTES: False,
+        CONF_OPPORTUNISTIC_PERCENTILE: 0,
+        CONF_CHARGER_POWER: 11.0,
+        CONF_SITE_POWER_LIMIT: 0.0,
+        CONF_MAX_CHARGING_BLOCKS: 0,
+        CONF_CHARGING_BLOCK_PENALTY: 0.0,
+        CONF_FRACTIONAL_HOURS: False,
+        CONF_CHARGING_CURVE: "",
+        CONF_LEARNED_CHARGING_SPEED: False,
+        CONF_SOC_ESTIMATION: False,
+    }
     if "errors" in result.keys():
         assert len(result["errors"]) == 0
     assert result["result"]
@@ -0,0 +1,156 @@
+"""Test ev_smart_charging diagnostics."""
+import json
+
+from homeassistant.const import STATE_OFF
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ev_smart_charging import (
+    async_setup_entry,
+    async_unload_entry,
+)
+from custom_components.ev_smart_charging.const import DOMAIN
+from custom_components.ev_smart_charging.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.ev_smart_charging.helpers.replay import replay_snapshot
+from replay.__main__ import main as replay_main
+
+from .const import MOCK_CONFIG_ALL
+from .helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from .price import PRICE_20220930, PRICE_20221001
+
+
+# pylint: disable=unused-argument
+async def test_diagnostics(hass, bypass_validate_input_sensors):
+    """Test config entry diagnostics."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+    assert diagnostics["startup_timing"]["import"] >= 0.0
+    assert diagnostics["startup_timing"]["setup"] >= 0.0
+    # No prices, so no schedule
+    assert diagnostics["startup_timing"]["first_schedule"] is None
+    instrumentation = diagnostics["instrumentation"]
+    assert instrumentation["stages"]["update_sensors"]["count"] >= 1
+    assert "get_schedule" not in instrumentation["stages"]
+    assert instrumentation["triggers"]["other"] >= 1
+    assert diagnostics["charging_speed"] == {"observations": 0, "bands": {}}
+    assert diagnostics["soc_estimate"]["correction"] is None
+
+    assert await async_unload_entry(hass, config_entry)
+
+
+async def test_diagnostics_instrumentation(
+    hass, set_cet_timezone, freezer, skip_service_calls
+):
+    """Test the instrumentation in the diagnostics."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+    entity_registry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    await coordinator.switch_active_update(True)
+    await coordinator.switch_ev_connected_update(True)
+
+    MockSOCEntity.set_state(hass, "56")
+    await hass.async_block_till_done()
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001, 124)
+    await hass.async_block_till_done()
+
+    instrumentation = (await async_get_config_entry_diagnostics(hass, config_entry))[
+        "instrumentation"
+    ]
+    for stage in [
+        "update_sensors",
+        "create_base_schedule",
+        "get_schedule",
+        "update_state",
+    ]:
+        assert instrumentation["stages"][stage]["count"] >= 1
+    assert instrumentation["triggers"]["configuration"] >= 2
+    assert instrumentation["triggers"]["soc"] == 1
+    assert instrumentation["triggers"]["price"] == 1
+    assert instrumentation["caches"]["price_statistics"]["hits"] >= 1
+    assert instrumentation["caches"]["price_statistics"]["misses"] == 2
+    assert instrumentation["caches"]["base_schedule"]["misses"] >= 1
+
+    # The diagnostic sensor is disabled by default
+    assert (
+        entity_registry.async_get_entity_id(
+            "sensor", DOMAIN, "test.sensor.updateduration"
+        )
+        is not None
+    )
+    assert hass.states.get("sensor.ev_smart_charging_update_duration") is None
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_diagnostics_snapshot(
+    hass, set_cet_timezone, freezer, skip_service_calls, tmp_path
+):
+    """Test that the snapshot in the diagnostics can be replayed."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+    entity_registry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    await coordinator.switch_active_update(True)
+    await coordinator.switch_ev_connected_update(True)
+    await coordinator.switch_continuous_update(True)
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+    # The snapshot must survive being stored as JSON
+    snapshot = json.loads(json.dumps(diagnostics["snapshot"]))
+    assert snapshot["inputs"]["ev_soc"] == 55.0
+    assert snapshot["inputs"]["switches"]["active"] is True
+    assert len(snapshot["prices"]) == 48
+    result = snapshot["result"]
+    assert result["charging_is_planned"] is True
+    assert result["charging_start_time"] == "2022-10-01T03:00:00+02:00"
+    assert result["charging_number_of_hours"] == 5
+    assert result["charging_value"] == 0.0
+
+    # Replaying gives the same result, also when the clock has moved
+    freezer.move_to("2022-10-01T05:30:00+02:00")
+    replayed = replay_snapshot(snapshot)
+    assert replayed == {
+        key: value
+        for key, value in result.items()
+        if key not in ["auto_charging_state", "status"]
+    }
+    assert replay_snapshot(snapshot, recalculate=True) == replayed
+
+    file = tmp_path / "diagnostics.json"
+    file.write_text(json.dumps({"data": diagnostics}), encoding="utf-8")
+    assert replay_main(["snapshot", str(file)]) == 0
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
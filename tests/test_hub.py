@@ -0,0 +1,81 @@
+"""Test ev_smart_charging hub."""
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_OFF
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.helpers.entity_registry import EntityRegistry
+
+from custom_components.ev_smart_charging import async_setup_entry, async_unload_entry
+from custom_components.ev_smart_charging.const import (
+    DATA_HUB,
+    DOMAIN,
+    DOMAIN_DATA,
+)
+
+from tests.helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from tests.price import PRICE_20220930, PRICE_20221001
+from tests.const import MOCK_CONFIG_ALL
+
+
+# pylint: disable=unused-argument
+async def test_hub(hass: HomeAssistant, skip_service_calls, set_cet_timezone, freezer):
+    """Test the hourly update and the prices shared by two config entries."""
+
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry: EntityRegistry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    coordinators = []
+    for entry_id in ["ev1", "ev2"]:
+        config_entry = MockConfigEntry(
+            domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id=entry_id, title=entry_id
+        )
+        config_entry.add_to_hass(hass)
+        assert await async_setup_entry(hass, config_entry)
+        await hass.async_block_till_done()
+        coordinators.append(hass.data[DOMAIN][entry_id])
+
+    hub = hass.data[DOMAIN_DATA][DATA_HUB]
+    assert list(hub.coordinators) == ["ev1", "ev2"]
+    assert all(coordinator.hub is hub for coordinator in coordinators)
+    # One hourly listener and one device registry listener
+    assert len(hub.listeners) == 2
+
+    # The prices are parsed once and shared
+    assert coordinators[0].price_data is not None
+    assert coordinators[0].price_data is coordinators[1].price_data
+
+    # Both config entries are updated by the hourly tick
+    await hub.update_hourly()
+    await hass.async_block_till_done()
+    assert all(
+        coordinator.instrumentation.triggers.get("hourly") == 1
+        for coordinator in coordinators
+    )
+
+    # New prices are parsed again, once
+    MockPriceEntity.set_state(hass, PRICE_20220930, None)
+    await hass.async_block_till_done()
+    assert coordinators[0].price_data is coordinators[1].price_data
+    assert coordinators[0].price_data.tomorrow_valid is False
+
+    # The listeners are removed with the last config entry
+    assert await async_unload_entry(hass, coordinators[0].config_entry)
+    assert list(hub.coordinators) == ["ev2"]
+    assert len(hub.listeners) == 2
+    assert await async_unload_entry(hass, coordinators[1].config_entry)
+    await hass.async_block_till_done()
+    assert not hub.coordinators
+    assert not hub.listeners
+    assert coordinators[0].hub is None
@@ -6,10 +6,15 @@ from pytest_homeassistant_custom_component.common import MockConfigEntry
 from custom_components.ev_smart_charging import (
     async_migrate_entry,
     async_reload_entry,
+    async_remove_entry,
     async_setup_entry,
     async_unload_entry,
 )
-from custom_components.ev_smart_charging.const import DOMAIN
+from custom_components.ev_smart_charging.const import (
+    CONF_CHARGER_ENTITY,
+    CONF_PRICE_SENSOR,
+    DOMAIN,
+)
 from custom_components.ev_smart_charging.coordinator import (
     EVSmartChargingCoordinator,
 )
@@ -19,6 +24,7 @@ from .const import (
     MOCK_CONFIG_ALL_V1,
     MOCK_CONFIG_ALL_V2,
     MOCK_CONFIG_ALL_V3,
+    MOCK_CONFIG_USER,
 )
 
 
@@ -223,3 +229,59 @@ async def test_setup_new_integration_name(hass, bypass_validate_input_sensors):
     assert await async_unload_entry(hass, config_entry)
     await hass.async_block_till_done()
     assert config_entry.entry_id not in hass.data[DOMAIN]
+
+
+async def test_update_options(hass, bypass_validate_input_sensors):
+    """Test that options are applied in place unless the price sensor changes."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    assert coordinator.charger_switch == "switch.ocpp_charge_control"
+
+    # New charger. The running coordinator is reconfigured.
+    options = dict(MOCK_CONFIG_USER)
+    options[CONF_CHARGER_ENTITY] = "switch.ocpp_charge_control_new"
+    hass.config_entries.async_update_entry(config_entry, options=options)
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][config_entry.entry_id] is coordinator
+    assert coordinator.charger_switch == "switch.ocpp_charge_control_new"
+
+    # No charger
+    options = dict(options)
+    options[CONF_CHARGER_ENTITY] = ""
+    hass.config_entries.async_update_entry(config_entry, options=options)
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][config_entry.entry_id] is coordinator
+    assert coordinator.charger_switch is None
+
+    # New price sensor. The config entry is reloaded.
+    options = dict(options)
+    options[CONF_PRICE_SENSOR] = "sensor.nordpool_kwh_se3_sek_2_10_0_new"
+    hass.config_entries.async_update_entry(config_entry, options=options)
+    await hass.async_block_till_done()
+    assert hass.data[DOMAIN][config_entry.entry_id] is not coordinator
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    assert coordinator.price_entity_id == "sensor.nordpool_kwh_se3_sek_2_10_0_new"
+
+    # Unload the entry and verify that the data has been removed
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert config_entry.entry_id not in hass.data[DOMAIN]
+
+
+async def test_remove_entry(hass, hass_storage, bypass_validate_input_sensors):
+    """Test that the stored state is removed with the config entry."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    await coordinator.store.async_save(coordinator.get_stored_data())
+    assert f"{DOMAIN}.test" in hass_storage
+
+    assert await async_unload_entry(hass, config_entry)
+    await async_remove_entry(hass, config_entry)
+    assert f"{DOMAIN}.test" not in hass_storage
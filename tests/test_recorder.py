@@ -0,0 +1,66 @@
+"""Test ev_smart_charging recorder platform."""
+from datetime import timedelta
+
+from homeassistant.components.recorder.history import get_significant_states
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.ev_smart_charging.const import (
+    ATTR_CHARGING_SCHEDULE,
+    ATTR_RAW_TWO_DAYS,
+    DOMAIN,
+)
+
+from .const import MOCK_CONFIG_ALL
+
+
+# pylint: disable=unused-argument
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(recorder_db_url, enable_custom_integrations):
+    """Prepare the recorder database before hass is set up."""
+    yield
+
+
+async def test_exclude_attributes(
+    recorder_mock, hass, bypass_validate_input_sensors, skip_service_calls
+):
+    """Test that the price and schedule series are not recorded."""
+    now = dt_util.utcnow()
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    entity_id = coordinator.sensor.entity_id
+    assert ATTR_RAW_TWO_DAYS in hass.states.get(entity_id).attributes
+    assert ATTR_CHARGING_SCHEDULE in hass.states.get(entity_id).attributes
+
+    # The recorder platform is registered once the integration has loaded
+    await async_wait_recording_done(hass)
+    coordinator.sensor.current_price = 12.3
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+    states = await hass.async_add_executor_job(
+        get_significant_states,
+        hass,
+        now - timedelta(seconds=1),
+        None,
+        [entity_id],
+        None,
+        True,
+        False,
+    )
+    state = states[entity_id][-1]
+    assert state.attributes["current_price"] == 12.3
+    assert ATTR_RAW_TWO_DAYS not in state.attributes
+    assert ATTR_CHARGING_SCHEDULE not in state.attributes
+    assert "Charging is planned" in state.attributes
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,39 @@
+"""Test the replay of traces."""
+from datetime import date
+
+from homeassistant.const import SERVICE_TURN_ON
+
+from replay.engine import async_replay_trace
+from replay.trace import TRACE_VERSION, get_synthetic_trace
+
+
+# pylint: disable=unused-argument
+async def test_replay_synthetic_trace(set_cet_timezone):
+    """Test the replay of a synthetic trace."""
+
+    trace = get_synthetic_trace(date(2022, 10, 3), 3)
+    assert trace["version"] == TRACE_VERSION
+    assert len(trace["events"]) == 3 * 4
+
+    result = await async_replay_trace(trace)
+    assert result["start"] == "2022-10-02T22:00:00+00:00"
+    assert result["end"] == "2022-10-05T22:00:00+00:00"
+
+    # The charger is turned on and off every night
+    services = [command["service"] for command in result["charger_commands"]]
+    assert services.count(SERVICE_TURN_ON) >= 3
+    assert services[0] == SERVICE_TURN_ON
+    assert all(first != second for first, second in zip(services, services[1:]))
+    assert result["charging_hours"] > 0
+    assert result["cost"] > 0
+
+    triggers = {decision["trigger"] for decision in result["decisions"]}
+    assert "soc" in triggers
+    assert any(
+        decision["auto_charging_state"] == "on" for decision in result["decisions"]
+    )
+
+    # The replay does not depend on the wall clock
+    again = await async_replay_trace(trace)
+    assert again["charger_commands"] == result["charger_commands"]
+    assert again["cost"] == result["cost"]
@@ -2,7 +2,10 @@
 from zoneinfo import ZoneInfo
 from datetime import datetime
 
-from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.components.sensor import ATTR_STATE_CLASS, SensorStateClass
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, STATE_OFF, STATE_ON
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+import pytest
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.ev_smart_charging import (
@@ -15,6 +18,7 @@ from custom_components.ev_smart_charging.coordinator import (
 from custom_components.ev_smart_charging.const import (
     CHARGING_STATUS_CHARGING,
     CHARGING_STATUS_WAITING_CHARGING,
+    CONF_COMPACT_ATTRIBUTES,
     DOMAIN,
 )
 from custom_components.ev_smart_charging.sensor import (
@@ -23,6 +27,14 @@ from custom_components.ev_smart_charging.sensor import (
 )
 
 from .const import MOCK_CONFIG_ALL
+from .helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from .price import PRICE_20220930, PRICE_20221001
+from .schedule import MOCK_SCHEDULE_20220930
 
 
 # We can pass fixtures as defined in conftest.py to tell pytest to use the fixture
@@ -121,3 +133,100 @@ async def test_sensor(hass, bypass_validate_input_sensors):
     # Unload the entry and verify that the data has been removed
     assert await async_unload_entry(hass, config_entry)
     assert config_entry.entry_id not in hass.data[DOMAIN]
+
+
+async def test_sensor_compact(hass, bypass_validate_input_sensors):
+    """Test the compact format of the attributes."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG_ALL,
+        options={CONF_COMPACT_ATTRIBUTES: True},
+        entry_id="test",
+    )
+
+    assert await async_setup_entry(hass, config_entry)
+    await hass.async_block_till_done()
+    sensor = hass.data[DOMAIN][config_entry.entry_id].sensor
+
+    sensor.raw_two_days_local = MOCK_SCHEDULE_20220930
+    sensor.charging_schedule = MOCK_SCHEDULE_20220930
+    extra = sensor.extra_state_attributes
+    assert extra["raw_two_days"]["start"] == MOCK_SCHEDULE_20220930[0]["start"]
+    assert extra["raw_two_days"]["width"] == 3600
+    assert len(extra["raw_two_days"]["values"]) == 48
+    assert extra["charging_schedule"]["values"][0] == 0.0
+    assert sum(extra["charging_schedule"]["counts"]) == 48
+
+    # Irregular data is given in the verbose format
+    sensor.charging_schedule = MOCK_SCHEDULE_20220930[0:2] + MOCK_SCHEDULE_20220930[3:5]
+    assert isinstance(sensor.extra_state_attributes["charging_schedule"], list)
+
+    assert await async_unload_entry(hass, config_entry)
+
+
+async def test_sensor_cost(hass, skip_service_calls, set_cet_timezone, freezer):
+    """Test the cost, average price and savings sensors."""
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    # Charging is planned 03:00-08:00
+    prices = [item["value"] for item in PRICE_20220930 + PRICE_20221001]
+    assert coordinator.sensor.charging_number_of_hours == 5
+    assert coordinator.sensor_cost.native_value == pytest.approx(sum(prices[27:32]))
+    assert coordinator.sensor_average_price.native_value == pytest.approx(
+        sum(prices[27:32]) / 5
+    )
+    assert coordinator.sensor_savings.native_value > 0.0
+    assert float(
+        hass.states.get(coordinator.sensor_cost.entity_id).state
+    ) == pytest.approx(sum(prices[27:32]))
+
+    # Without a unit of the price sensor, the configured currency is used
+    state = hass.states.get(coordinator.sensor_cost.entity_id)
+    assert state.attributes[ATTR_UNIT_OF_MEASUREMENT] == hass.config.currency
+    assert state.attributes[ATTR_STATE_CLASS] == SensorStateClass.MEASUREMENT
+    assert (
+        hass.states.get(coordinator.sensor_average_price.entity_id).attributes[
+            ATTR_UNIT_OF_MEASUREMENT
+        ]
+        == f"{hass.config.currency}/kWh"
+    )
+
+    price_state = hass.states.get("sensor.nordpool_kwh_se3_sek_2_10_0")
+    hass.states.async_set(
+        price_state.entity_id,
+        price_state.state,
+        price_state.attributes | {ATTR_UNIT_OF_MEASUREMENT: "SEK/kWh"},
+    )
+    await hass.async_block_till_done()
+    for sensor, unit in (
+        (coordinator.sensor_cost, "SEK"),
+        (coordinator.sensor_average_price, "SEK/kWh"),
+        (coordinator.sensor_savings, "SEK"),
+    ):
+        assert (
+            hass.states.get(sensor.entity_id).attributes[ATTR_UNIT_OF_MEASUREMENT]
+            == unit
+        )
+
+    # No charging planned
+    await coordinator.switch_active_update(False)
+    await hass.async_block_till_done()
+    assert coordinator.sensor_cost.native_value is None
+    assert coordinator.sensor_average_price.native_value is None
+    assert coordinator.sensor_savings.native_value is None
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
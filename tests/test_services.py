@@ -0,0 +1,105 @@
+"""Test ev_smart_charging services."""
+from datetime import datetime
+from unittest.mock import patch
+
+from homeassistant.const import STATE_OFF
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from homeassistant.util import dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+)
+
+from custom_components.ev_smart_charging.const import (
+    DOMAIN,
+    EVENT_SCHEDULE_COMPUTED,
+    SERVICE_COMPUTE_SCHEDULE,
+)
+
+from .const import MOCK_CONFIG_ALL
+from .helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from .price import PRICE_20220930, PRICE_20221001
+
+
+# pylint: disable=unused-argument
+async def test_compute_schedule(hass, set_cet_timezone, freezer):
+    """Test the compute_schedule service."""
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    schedule = coordinator.sensor.charging_schedule
+    tz_info = dt_util.get_time_zone("Europe/Stockholm")
+
+    events = async_capture_events(hass, EVENT_SCHEDULE_COMPUTED)
+
+    # The current inputs give the same schedule as the coordinator
+    await hass.services.async_call(
+        DOMAIN, SERVICE_COMPUTE_SCHEDULE, {"entry_id": "test"}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert len(events) == 1
+    result = events[0].data
+    assert result["entry_id"] == "test"
+    assert result["charging_start_time"] == coordinator.sensor.charging_start_time
+    assert result["charging_stop_time"] == coordinator.sensor.charging_stop_time
+    assert result["charging_number_of_hours"] == 5
+    assert len(result["slots"]) == 5
+    assert result["cost"] == pytest.approx(
+        sum(slot["value"] for slot in result["slots"])
+    )
+
+    # Same result when solved in the executor
+    with patch("custom_components.ev_smart_charging.coordinator.EXECUTOR_MIN_SLOTS", 0):
+        assert await coordinator.compute_schedule({}) == {
+            key: value for key, value in result.items() if key != "entry_id"
+        }
+
+    # Hypothetical inputs
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_COMPUTE_SCHEDULE,
+        {
+            "entry_id": "test",
+            "ev_soc": 20,
+            "ev_target_soc": 32,
+            "continuous": False,
+            "ready_hour": "00:00",
+        },
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+    assert len(events) == 2
+    result = events[1].data
+    assert result["charging_number_of_hours"] == 2
+    assert result["charging_stop_time"] <= datetime(2022, 10, 1, 0, 0, tzinfo=tz_info)
+
+    # Nothing in the coordinator has changed
+    assert coordinator.ev_soc == 55
+    assert coordinator.sensor.charging_schedule == schedule
+    assert coordinator.sensor.charging_number_of_hours == 5
+
+    with pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            DOMAIN, SERVICE_COMPUTE_SCHEDULE, {"entry_id": "none"}, blocking=True
+        )
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
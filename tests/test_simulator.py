@@ -0,0 +1,115 @@
+"""Test the charging cost simulator."""
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.prices import get_prices
+from custom_components.ev_smart_charging.helpers.coordinator import (
+    Raw,
+    Scheduler,
+)
+from simulator.model import Sessions, evaluate, get_combinations, get_local_time, sweep
+
+
+# pylint: disable=unused-argument
+@pytest.mark.parametrize("continuous", [False, True])
+@pytest.mark.parametrize("max_price", [0.0, 120.0])
+@pytest.mark.parametrize("min_soc", [0.0, 45.0])
+async def test_simulator_matches_scheduler(
+    hass, set_cet_timezone, continuous, max_price, min_soc
+):
+    """Test that the simulator selects the same hours as the Scheduler."""
+
+    prices = get_prices(date(2022, 10, 20), 14, seed=3)
+    sessions = Sessions(prices, 17, (20, 70), 80.0, seed=3)
+    combination = {
+        "charging_pct_per_hour": 6.0,
+        "ready_hour": 8,
+        "continuous": continuous,
+        "max_price": max_price,
+        "opportunistic_level": 0,
+        "min_soc": min_soc,
+    }
+    result = evaluate(sessions, combination)
+    # The last day has no prices for tomorrow. 2022-10-30 has 25 hours.
+    assert result["sessions"] == 13
+
+    hours = 0
+    cost = 0.0
+    for index, day in enumerate(sessions.days[:-1]):
+        raw_two_days = Raw(
+            [
+                item
+                for item in prices
+                if get_local_time(day, 0) <= item["start"] < get_local_time(day, 48)
+            ]
+        )
+        params = {
+            "ev_soc": sessions.soc[index],
+            "ev_target_soc": 80.0,
+            "min_soc": min_soc,
+            "charging_pct_per_hour": 6.0,
+            "start_hour": get_local_time(day, 0) - timedelta(days=2),
+            "ready_hour": get_local_time(day, 32),
+            "switch_active": True,
+            "switch_apply_limit": max_price > 0.0,
+            "switch_continuous": continuous,
+            "max_price": max_price,
+            "time_now": get_local_time(day, 17),
+            "value_in_graph": 1.0,
+        }
+        scheduler = Scheduler()
+        scheduler.create_base_schedule(params, raw_two_days)
+        scheduler.get_schedule(params)
+        hours = hours + scheduler.get_charging_number_of_hours()
+        cost = cost + (scheduler.get_charging_cost() or 0.0)
+
+    assert result["charging_hours"] == hours
+    assert result["cost"] == pytest.approx(cost, abs=0.01)
+
+
+async def test_simulator_sweep(hass, set_cet_timezone):
+    """Test the statistics of a sweep."""
+
+    prices = get_prices(date(2022, 10, 1), 30)
+    sessions = Sessions(prices, 17, (30, 60), 80.0)
+    combinations = get_combinations(
+        {
+            "charging_pct_per_hour": [3.0, 8.0],
+            "ready_hour": [7],
+            "continuous": [False],
+            "max_price": [0.0, 40.0],
+            "opportunistic_level": [0, 50],
+            "min_soc": [0.0],
+        }
+    )
+    assert len(combinations) == 8
+    results = {
+        (
+            result["charging_pct_per_hour"],
+            result["max_price"],
+            result["opportunistic_level"],
+        ): result
+        for result in sweep(sessions, combinations)
+    }
+
+    # Fast charging, no limit: the target is always reached
+    result = results[(8.0, 0.0, 0)]
+    assert result["sessions"] == 29
+    assert result["unmet_sessions"] == 0
+    assert result["max_shortfall_pct"] == 0.0
+    assert result["savings"] > 0
+
+    # 14 hours from 17:00 to 07:00 is too short for 3% per hour
+    assert results[(3.0, 0.0, 0)]["unmet_sessions"] > 0
+
+    # A price limit lowers the average price but leaves some sessions short
+    limited = results[(8.0, 40.0, 0)]
+    assert limited["average_price"] < result["average_price"]
+    assert limited["unmet_sessions"] > 0
+    assert limited["mean_shortfall_pct"] > 0
+    # Opportunistic charging can only lower the limit further
+    assert results[(8.0, 40.0, 50)]["charging_hours"] <= limited["charging_hours"]
+
+    # The same results in worker processes
+    assert sweep(sessions, combinations, 2) == list(results.values())
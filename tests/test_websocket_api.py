@@ -0,0 +1,132 @@
+"""Test ev_smart_charging websocket API."""
+from homeassistant.const import STATE_OFF
+from homeassistant.helpers.entity_registry import async_get as async_entity_registry_get
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ev_smart_charging.const import DOMAIN
+
+from .const import MOCK_CONFIG_ALL
+from .helpers.helpers import (
+    MockChargerEntity,
+    MockPriceEntity,
+    MockSOCEntity,
+    MockTargetSOCEntity,
+)
+from .price import PRICE_20220930, PRICE_20221001
+
+
+# pylint: disable=unused-argument
+async def test_subscribe_schedule(
+    hass, hass_ws_client, skip_service_calls, set_cet_timezone, freezer
+):
+    """Test subscription to the schedule and prices."""
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, None)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {"id": 1, "type": "ev_smart_charging/subscribe_schedule", "entry_id": "test"}
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+    msg = await client.receive_json()
+    assert msg["type"] == "event"
+    assert len(msg["event"]["full"]["prices"]) == 24
+    assert len(msg["event"]["full"]["schedule"]) == 48
+
+    # Tomorrow's prices are added and a schedule is created
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+    await hass.async_block_till_done()
+    msg = await client.receive_json()
+    delta = msg["event"]["delta"]
+    assert len(delta["prices"]["changed"]) == 24
+    assert delta["prices"]["removed"] == []
+    assert len(delta["schedule"]["changed"]) > 0
+    assert coordinator.scheduler.get_charging_is_planned()
+
+    # Nothing is sent when nothing has changed
+    await coordinator.update_sensors()
+    await hass.async_block_till_done()
+
+    # Unsubscribe
+    await client.send_json({"id": 2, "type": "unsubscribe_events", "subscription": 1})
+    msg = await client.receive_json()
+    assert msg["id"] == 2
+    assert msg["success"]
+    assert not coordinator.schedule_listeners
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_subscribe_schedule_not_found(hass, hass_ws_client):
+    """Test subscription to a config entry that doesn't exist."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {"id": 1, "type": "ev_smart_charging/subscribe_schedule", "entry_id": "none"}
+    )
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == "not_found"
+
+
+async def test_compute_schedule(
+    hass, hass_ws_client, skip_service_calls, set_cet_timezone, freezer
+):
+    """Test computation of a schedule for hypothetical inputs."""
+    freezer.move_to("2022-09-30T14:00:00+02:00")
+
+    entity_registry = async_entity_registry_get(hass)
+    MockSOCEntity.create(hass, entity_registry, "55")
+    MockTargetSOCEntity.create(hass, entity_registry, "80")
+    MockPriceEntity.create(hass, entity_registry, 123)
+    MockChargerEntity.create(hass, entity_registry, STATE_OFF)
+    MockPriceEntity.set_state(hass, PRICE_20220930, PRICE_20221001)
+
+    config_entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG_ALL, entry_id="test")
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json(
+        {
+            "id": 1,
+            "type": "ev_smart_charging/compute_schedule",
+            "entry_id": "test",
+            "ev_target_soc": 67,
+        }
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+    assert msg["result"]["charging_is_planned"]
+    assert msg["result"]["charging_number_of_hours"] == 2
+    assert len(msg["result"]["slots"]) == 2
+    assert msg["result"]["charging_start_time"] == msg["result"]["slots"][0]["start"]
+
+    await client.send_json(
+        {"id": 2, "type": "ev_smart_charging/compute_schedule", "entry_id": "none"}
+    )
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == "home_assistant_error"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()